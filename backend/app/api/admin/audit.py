@@ -15,6 +15,8 @@ from app.database import get_db
 from app.models.user import User
 from app.models.community import Post, PostComment
 from app.models.system import Admin, AdminLog
+from app.services.cache import cache, post_tag
+from app.services.counters import counters, POST_VIEWS, POST_LIKES, POST_COMMENTS
 from app.utils.security import get_current_admin
 from app.utils.response import success, error, paginate
 
@@ -65,6 +67,11 @@ async def get_pending_posts(
         users_result = await db.execute(select(User).where(User.id.in_(user_ids)))
         users = {u.id: u for u in users_result.scalars().all()}
     
+    # 合并未刷新的计数
+    view_counts = await counters.merge(POST_VIEWS, posts, "view_count")
+    like_counts = await counters.merge(POST_LIKES, posts, "like_count")
+    comment_counts = await counters.merge(POST_COMMENTS, posts, "comment_count")
+    
     items = []
     for p in posts:
         user = users.get(p.user_id)
@@ -75,9 +82,9 @@ async def get_pending_posts(
             "video_url": p.video_url,
             "location": p.location,
             "status": p.status,
-            "view_count": p.view_count,
-            "like_count": p.like_count,
-            "comment_count": p.comment_count,
+            "view_count": view_counts[p.id],
+            "like_count": like_counts[p.id],
+            "comment_count": comment_counts[p.id],
             "user": {
                 "id": user.id if user else None,
                 "nickname": user.nickname if user else "未知用户",
@@ -125,6 +132,8 @@ async def audit_post(
     
     await db.commit()
     
+    await cache.invalidate_tags(post_tag(post_id))
+    
     return success(message="审核完成")
 
 
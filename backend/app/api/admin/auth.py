@@ -5,6 +5,7 @@ POST /auth/logout - 退出登录
 GET /auth/info - 获取当前管理员信息
 """
 from fastapi import APIRouter, Depends, Request
+from fastapi.security import HTTPAuthorizationCredentials
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, update
 from pydantic import BaseModel, Field
@@ -12,7 +13,10 @@ from datetime import datetime
 
 from app.database import get_db
 from app.models.system import Admin, AdminLog
-from app.utils.security import verify_password, create_access_token, get_current_admin
+from app.services.login_throttle import admin_login_throttle
+from app.utils.security import (
+    security, verify_password_async, create_access_token, get_current_admin, revoke_token,
+)
 from app.utils.response import success, error
 
 router = APIRouter(prefix="/auth", tags=["管理员认证"])
@@ -39,18 +43,25 @@ async def login(
     db: AsyncSession = Depends(get_db)
 ):
     """管理员登录"""
+    ip = request.client.host if request.client else None
+    
+    # 登录限流（在验证密码前计数）
+    retry_after = await admin_login_throttle.hit(data.username, ip)
+    if retry_after:
+        minutes = (retry_after + 59) // 60
+        return error(429, f"登录尝试过于频繁，请 {minutes} 分钟后再试")
+    
     # 查询管理员
     result = await db.execute(
         select(Admin).where(Admin.username == data.username)
     )
     admin = result.scalar_one_or_none()
     
-    if not admin:
+    # 验证密码（用户名不存在时同样执行一次比对，避免通过耗时判断用户名）
+    if not await verify_password_async(data.password, admin.password if admin else None):
         return error(401, "用户名或密码错误")
     
-    # 验证密码
-    if not verify_password(data.password, admin.password):
-        return error(401, "用户名或密码错误")
+    await admin_login_throttle.reset(data.username)
     
     # 检查状态
     if admin.status != 1:
@@ -69,7 +80,7 @@ async def login(
         target_type="admin",
         target_id=admin.id,
         content="管理员登录",
-        ip=request.client.host if request.client else None,
+        ip=ip,
         user_agent=request.headers.get("user-agent"),
     )
     db.add(log)
@@ -88,10 +99,14 @@ async def login(
 @router.post("/logout")
 async def logout(
     request: Request,
+    credentials: HTTPAuthorizationCredentials = Depends(security),
     admin: Admin = Depends(get_current_admin),
     db: AsyncSession = Depends(get_db)
 ):
     """退出登录"""
+    # 吊销当前 Token
+    await revoke_token(credentials.credentials)
+    
     # 记录登出日志
     log = AdminLog(
         admin_id=admin.id,
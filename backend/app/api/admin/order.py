@@ -14,8 +14,10 @@ from datetime import datetime
 
 from app.database import get_db
 from app.models.user import User
-from app.models.order import Order, OrderItem
+from app.models.order import Order
 from app.models.system import Admin, AdminLog
+from app.services.order_service import with_items, serialize_item
+from app.services import rollup_service
 from app.utils.security import get_current_admin
 from app.utils.response import success, error, paginate
 
@@ -66,8 +68,8 @@ async def get_order_list(
         count_query = count_query.where(*conditions)
     total = (await db.execute(count_query)).scalar()
     
-    # 查询列表
-    query = select(Order)
+    # 查询列表（订单商品批量加载）
+    query = with_items(select(Order))
     if conditions:
         query = query.where(*conditions)
     query = query.order_by(desc(Order.created_at)).offset(
@@ -105,6 +107,7 @@ async def get_order_list(
             "tracking_no": o.tracking_no,
             "created_at": o.created_at.strftime("%Y-%m-%d %H:%M:%S") if o.created_at else None,
             "pay_time": o.pay_time.strftime("%Y-%m-%d %H:%M:%S") if o.pay_time else None,
+            "items": [serialize_item(i) for i in o.items],
         })
     
     return paginate(items, total, page, page_size)
@@ -117,7 +120,7 @@ async def get_order_detail(
     db: AsyncSession = Depends(get_db)
 ):
     """获取订单详情"""
-    result = await db.execute(select(Order).where(Order.id == order_id))
+    result = await db.execute(with_items(select(Order).where(Order.id == order_id)))
     order = result.scalar_one_or_none()
     
     if not order:
@@ -127,24 +130,6 @@ async def get_order_detail(
     user_result = await db.execute(select(User).where(User.id == order.user_id))
     user = user_result.scalar_one_or_none()
     
-    # 获取订单项
-    items_result = await db.execute(
-        select(OrderItem).where(OrderItem.order_id == order_id)
-    )
-    order_items = items_result.scalars().all()
-    
-    items = []
-    for item in order_items:
-        items.append({
-            "id": item.id,
-            "product_id": item.product_id,
-            "product_name": item.product_name,
-            "product_image": item.product_image,
-            "spec_name": item.spec_name,
-            "price": float(item.price),
-            "quantity": item.quantity,
-        })
-    
     return success(data={
         "id": order.id,
         "order_no": order.order_no,
@@ -169,7 +154,7 @@ async def get_order_detail(
         "pay_time": order.pay_time.strftime("%Y-%m-%d %H:%M:%S") if order.pay_time else None,
         "ship_time": order.ship_time.strftime("%Y-%m-%d %H:%M:%S") if order.ship_time else None,
         "receive_time": order.receive_time.strftime("%Y-%m-%d %H:%M:%S") if order.receive_time else None,
-        "items": items,
+        "items": [serialize_item(i) for i in order.items],
     })
 
 
@@ -233,6 +218,10 @@ async def refund_order(
     
     refund_amount = data.refund_amount or float(order.pay_amount)
     
+    # 已计入成交金额的订单，从下单日期的汇总中扣除
+    if order.status in rollup_service.PAID_STATUSES:
+        await rollup_service.incr_daily(db, order.created_at.date(), order_amount=-order.pay_amount)
+    
     order.status = "refunded"
     
     # 记录操作日志
@@ -18,6 +18,8 @@ from pydantic import BaseModel, Field
 from app.database import get_db
 from app.models.shop import Product, ProductCategory
 from app.models.system import Admin, AdminLog
+from app.services.cache import cache, product_tag, TAG_PRODUCT_CATEGORY
+from app.services.product_search import product_search
 from app.utils.security import get_current_admin
 from app.utils.response import success, error, paginate
 
@@ -194,6 +196,8 @@ async def create_product(
     log.target_id = product.id
     await db.commit()
     
+    product_search.upsert(product)
+    
     return success(data={"id": product.id}, message="创建成功")
 
 
@@ -231,6 +235,9 @@ async def update_product(
     
     await db.commit()
     
+    await cache.invalidate_tags(product_tag(product_id))
+    product_search.upsert(product)
+    
     return success(message="更新成功")
 
 
@@ -264,6 +271,9 @@ async def delete_product(
     
     await db.commit()
     
+    await cache.invalidate_tags(product_tag(product_id))
+    product_search.remove(product_id)
+    
     return success(message="删除成功")
 
 
@@ -345,6 +355,8 @@ async def create_category(
     log.target_id = category.id
     await db.commit()
     
+    await cache.invalidate_tags(TAG_PRODUCT_CATEGORY)
+    
     return success(data={"id": category.id}, message="创建成功")
 
 
@@ -384,6 +396,8 @@ async def update_category(
     
     await db.commit()
     
+    await cache.invalidate_tags(TAG_PRODUCT_CATEGORY)
+    
     return success(message="更新成功")
 
 
@@ -437,6 +451,8 @@ async def delete_category(
     
     await db.commit()
     
+    await cache.invalidate_tags(TAG_PRODUCT_CATEGORY)
+    
     return success(message="删除成功")
 
 
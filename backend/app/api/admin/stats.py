@@ -4,106 +4,114 @@ GET /stats/overview - 数据概览
 GET /stats/user - 用户统计
 GET /stats/order - 订单统计
 GET /stats/health - 健康数据统计
+GET /stats/runtime - 运行时指标
+
+每日趋势读取 daily_stats 汇总表（见 app/services/rollup_service.py）
 """
+import asyncio
 from fastapi import APIRouter, Depends, Query
-from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func, and_
+from sqlalchemy import select, func, case
 from datetime import datetime, timedelta
-from typing import Optional
 
-from app.database import get_db
+from app.database import async_session_maker
 from app.models.user import User
 from app.models.order import Order
 from app.models.health import HealthScreening
-from app.models.sport import SportRecord
-from app.models.food import FoodRecord
 from app.models.community import Post
-from app.models.points import CheckinRecord
+from app.models.stats import DailyStats
 from app.models.system import Admin
+from app.services import rollup_service
+from app.services.ai_service import ai_assistant
+from app.services.cache import cache
+from app.services.ephemeral_store import local_store
+from app.services.food_search import food_search
+from app.services.product_search import product_search
+from app.services.token_revocation import revocation_registry
+from app.services.view_events import view_events
 from app.utils.security import get_current_admin
 from app.utils.response import success
 
 router = APIRouter(prefix="/stats", tags=["数据统计"])
 
 
+async def _fetch_all(query) -> list:
+    """在独立会话中执行统计查询，便于互不依赖的查询并发执行"""
+    async with async_session_maker() as session:
+        result = await session.execute(query)
+        return result.fetchall()
+
+
+def _rollup_query(start: datetime, *columns):
+    """读取每日汇总表：返回 (日期, 统计列...)，每天一行"""
+    return select(DailyStats.stat_date, *columns).where(DailyStats.stat_date >= start.date())
+
+
+def _fill_days(rows: list, start: datetime, days: int, fields: list) -> list:
+    """将按天的结果补齐为连续日期，缺失的日期补 0"""
+    by_day = {str(row[0]): row[1:] for row in rows}
+    data = []
+    for i in range(days):
+        day = (start + timedelta(days=i)).strftime("%Y-%m-%d")
+        values = by_day.get(day)
+        item = {"date": day}
+        for idx, (name, convert) in enumerate(fields):
+            item[name] = convert(values[idx] or 0) if values else convert(0)
+        data.append(item)
+    return data
+
+
 @router.get("/overview")
 async def get_overview(
     admin: Admin = Depends(get_current_admin),
-    db: AsyncSession = Depends(get_db)
 ):
     """数据概览"""
     today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
     yesterday = today - timedelta(days=1)
     
-    # 用户总数
-    total_users = (await db.execute(
-        select(func.count()).select_from(User)
-    )).scalar()
-    
-    # 今日新增用户
-    today_new_users = (await db.execute(
-        select(func.count()).select_from(User).where(User.created_at >= today)
-    )).scalar()
-    
-    # 昨日新增用户
-    yesterday_new_users = (await db.execute(
-        select(func.count()).select_from(User).where(
-            and_(User.created_at >= yesterday, User.created_at < today)
-        )
-    )).scalar()
-    
-    # 订单统计
-    total_orders = (await db.execute(
-        select(func.count()).select_from(Order)
-    )).scalar()
-    
-    today_orders = (await db.execute(
-        select(func.count()).select_from(Order).where(Order.created_at >= today)
-    )).scalar()
-    
-    # 今日订单金额
-    today_amount_result = await db.execute(
-        select(func.sum(Order.pay_amount)).where(
-            and_(Order.created_at >= today, Order.status.in_(["paid", "shipped", "received", "completed"]))
-        )
-    )
-    today_amount = today_amount_result.scalar() or 0
-    
-    # 总交易金额
-    total_amount_result = await db.execute(
-        select(func.sum(Order.pay_amount)).where(
-            Order.status.in_(["paid", "shipped", "received", "completed"])
-        )
+    is_paid = Order.status.in_(rollup_service.PAID_STATUSES)
+    
+    daily_rows, user_rows, order_rows, post_rows = await asyncio.gather(
+        # 今日/昨日汇总
+        _fetch_all(_rollup_query(
+            yesterday,
+            DailyStats.new_users,
+            DailyStats.order_count,
+            DailyStats.order_amount,
+            DailyStats.checkin_count,
+        )),
+        # 用户总数
+        _fetch_all(select(func.count()).select_from(User)),
+        # 订单总数、总交易金额
+        _fetch_all(select(
+            func.count(),
+            func.sum(case((is_paid, Order.pay_amount), else_=0)),
+        ).select_from(Order)),
+        # 社区动态数
+        _fetch_all(select(func.count()).select_from(Post).where(Post.status == 1)),
     )
-    total_amount = total_amount_result.scalar() or 0
     
-    # 今日打卡数
-    today_checkins = (await db.execute(
-        select(func.count()).select_from(CheckinRecord).where(
-            CheckinRecord.checkin_date == today.date()
-        )
-    )).scalar()
+    daily = {row[0]: row for row in daily_rows}
+    today_row = daily.get(today.date())
+    yesterday_row = daily.get(yesterday.date())
     
-    # 社区动态数
-    total_posts = (await db.execute(
-        select(func.count()).select_from(Post).where(Post.status == 1)
-    )).scalar()
+    total_users = user_rows[0][0]
+    total_orders, total_amount = order_rows[0]
     
     return success(data={
         "users": {
             "total": total_users,
-            "today_new": today_new_users,
-            "yesterday_new": yesterday_new_users,
+            "today_new": today_row.new_users if today_row else 0,
+            "yesterday_new": yesterday_row.new_users if yesterday_row else 0,
         },
         "orders": {
             "total": total_orders,
-            "today_count": today_orders,
-            "today_amount": float(today_amount),
-            "total_amount": float(total_amount),
+            "today_count": today_row.order_count if today_row else 0,
+            "today_amount": float(today_row.order_amount) if today_row else 0.0,
+            "total_amount": float(total_amount or 0),
         },
         "activities": {
-            "today_checkins": today_checkins,
-            "total_posts": total_posts,
+            "today_checkins": today_row.checkin_count if today_row else 0,
+            "total_posts": post_rows[0][0],
         }
     })
 
@@ -112,55 +120,35 @@ async def get_overview(
 async def get_user_stats(
     days: int = Query(7, ge=1, le=30, description="统计天数"),
     admin: Admin = Depends(get_current_admin),
-    db: AsyncSession = Depends(get_db)
 ):
     """用户统计"""
     today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+    start = today - timedelta(days=days - 1)
+    
+    daily_rows, member_rows, level_rows = await asyncio.gather(
+        _fetch_all(_rollup_query(start, DailyStats.new_users)),
+        _fetch_all(select(User.member_level, func.count()).group_by(User.member_level)),
+        _fetch_all(select(User.user_level, func.count()).group_by(User.user_level)),
+    )
     
     # 每日新增用户
-    daily_data = []
-    for i in range(days - 1, -1, -1):
-        day_start = today - timedelta(days=i)
-        day_end = day_start + timedelta(days=1)
-        
-        count = (await db.execute(
-            select(func.count()).select_from(User).where(
-                and_(User.created_at >= day_start, User.created_at < day_end)
-            )
-        )).scalar()
-        
-        daily_data.append({
-            "date": day_start.strftime("%Y-%m-%d"),
-            "count": count,
-        })
+    daily_data = _fill_days(daily_rows, start, days, [("count", int)])
     
     # 会员类型分布 (0:普通 1:月卡 2:年卡 3:终身)
-    member_distribution = []
+    member_counts = {row[0]: row[1] for row in member_rows}
     member_labels = {0: "普通用户", 1: "月卡会员", 2: "年卡会员", 3: "终身会员"}
-    for level in [0, 1, 2, 3]:
-        count = (await db.execute(
-            select(func.count()).select_from(User).where(
-                User.member_level == level
-            )
-        )).scalar()
-        member_distribution.append({
-            "type": member_labels[level],
-            "level": level,
-            "count": count,
-        })
+    member_distribution = [{
+        "type": member_labels[level],
+        "level": level,
+        "count": member_counts.get(level, 0),
+    } for level in [0, 1, 2, 3]]
     
     # 用户等级分布
-    level_distribution = []
-    for level in range(1, 11):
-        count = (await db.execute(
-            select(func.count()).select_from(User).where(
-                User.user_level == level
-            )
-        )).scalar()
-        level_distribution.append({
-            "level": level,
-            "count": count,
-        })
+    level_counts = {row[0]: row[1] for row in level_rows}
+    level_distribution = [{
+        "level": level,
+        "count": level_counts.get(level, 0),
+    } for level in range(1, 11)]
     
     return success(data={
         "daily_new_users": daily_data,
@@ -173,50 +161,25 @@ async def get_user_stats(
 async def get_order_stats(
     days: int = Query(7, ge=1, le=30, description="统计天数"),
     admin: Admin = Depends(get_current_admin),
-    db: AsyncSession = Depends(get_db)
 ):
     """订单统计"""
     today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+    start = today - timedelta(days=days - 1)
     
-    # 每日订单数和金额
-    daily_data = []
-    for i in range(days - 1, -1, -1):
-        day_start = today - timedelta(days=i)
-        day_end = day_start + timedelta(days=1)
-        
-        count = (await db.execute(
-            select(func.count()).select_from(Order).where(
-                and_(Order.created_at >= day_start, Order.created_at < day_end)
-            )
-        )).scalar()
-        
-        amount_result = await db.execute(
-            select(func.sum(Order.pay_amount)).where(
-                and_(
-                    Order.created_at >= day_start,
-                    Order.created_at < day_end,
-                    Order.status.in_(["paid", "shipped", "received", "completed"])
-                )
-            )
-        )
-        amount = amount_result.scalar() or 0
-        
-        daily_data.append({
-            "date": day_start.strftime("%Y-%m-%d"),
-            "count": count,
-            "amount": float(amount),
-        })
+    daily_rows, status_rows = await asyncio.gather(
+        # 每日订单数和金额
+        _fetch_all(_rollup_query(start, DailyStats.order_count, DailyStats.order_amount)),
+        # 订单状态分布
+        _fetch_all(select(Order.status, func.count()).group_by(Order.status)),
+    )
     
-    # 订单状态分布
-    status_distribution = []
-    for status in ["pending", "paid", "shipped", "received", "completed", "cancelled", "refunded"]:
-        count = (await db.execute(
-            select(func.count()).select_from(Order).where(Order.status == status)
-        )).scalar()
-        status_distribution.append({
-            "status": status,
-            "count": count,
-        })
+    daily_data = _fill_days(daily_rows, start, days, [("count", int), ("amount", float)])
+    
+    status_counts = {row[0]: row[1] for row in status_rows}
+    status_distribution = [{
+        "status": status,
+        "count": status_counts.get(status, 0),
+    } for status in ["pending", "paid", "shipped", "received", "completed", "cancelled", "refunded"]]
     
     return success(data={
         "daily_orders": daily_data,
@@ -228,80 +191,45 @@ async def get_order_stats(
 async def get_health_stats(
     days: int = Query(7, ge=1, le=30, description="统计天数"),
     admin: Admin = Depends(get_current_admin),
-    db: AsyncSession = Depends(get_db)
 ):
     """健康数据统计"""
     today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+    start = today - timedelta(days=days - 1)
+    
+    daily_rows, risk_rows = await asyncio.gather(
+        # 每日筛查、运动记录、饮食记录数
+        _fetch_all(_rollup_query(
+            start, DailyStats.screening_count, DailyStats.sport_count, DailyStats.food_count
+        )),
+        # 风险等级分布
+        _fetch_all(select(HealthScreening.risk_level, func.count()).group_by(HealthScreening.risk_level)),
+    )
     
-    # 每日筛查数
-    screening_data = []
-    for i in range(days - 1, -1, -1):
-        day_start = today - timedelta(days=i)
-        day_end = day_start + timedelta(days=1)
-        
-        count = (await db.execute(
-            select(func.count()).select_from(HealthScreening).where(
-                and_(HealthScreening.created_at >= day_start, HealthScreening.created_at < day_end)
-            )
-        )).scalar()
-        
-        screening_data.append({
-            "date": day_start.strftime("%Y-%m-%d"),
-            "count": count,
-        })
-    
-    # 风险等级分布
-    risk_distribution = []
-    for risk_level in ["low", "medium", "high"]:
-        count = (await db.execute(
-            select(func.count()).select_from(HealthScreening).where(
-                HealthScreening.risk_level == risk_level
-            )
-        )).scalar()
-        risk_distribution.append({
-            "level": risk_level,
-            "count": count,
-        })
-    
-    # 每日运动记录数
-    sport_data = []
-    for i in range(days - 1, -1, -1):
-        day_start = today - timedelta(days=i)
-        day_end = day_start + timedelta(days=1)
-        
-        count = (await db.execute(
-            select(func.count()).select_from(SportRecord).where(
-                and_(SportRecord.created_at >= day_start, SportRecord.created_at < day_end)
-            )
-        )).scalar()
-        
-        sport_data.append({
-            "date": day_start.strftime("%Y-%m-%d"),
-            "count": count,
-        })
-    
-    # 每日饮食记录数
-    food_data = []
-    for i in range(days - 1, -1, -1):
-        day_start = today - timedelta(days=i)
-        day_end = day_start + timedelta(days=1)
-        
-        count = (await db.execute(
-            select(func.count()).select_from(FoodRecord).where(
-                and_(FoodRecord.created_at >= day_start, FoodRecord.created_at < day_end)
-            )
-        )).scalar()
-        
-        food_data.append({
-            "date": day_start.strftime("%Y-%m-%d"),
-            "count": count,
-        })
+    risk_counts = {row[0]: row[1] for row in risk_rows}
+    risk_distribution = [{
+        "level": risk_level,
+        "count": risk_counts.get(risk_level, 0),
+    } for risk_level in ["low", "medium", "high"]]
     
     return success(data={
-        "daily_screenings": screening_data,
+        "daily_screenings": _fill_days([(r[0], r[1]) for r in daily_rows], start, days, [("count", int)]),
         "risk_distribution": risk_distribution,
-        "daily_sports": sport_data,
-        "daily_foods": food_data,
+        "daily_sports": _fill_days([(r[0], r[2]) for r in daily_rows], start, days, [("count", int)]),
+        "daily_foods": _fill_days([(r[0], r[3]) for r in daily_rows], start, days, [("count", int)]),
     })
 
 
+@router.get("/runtime")
+async def get_runtime_stats(
+    admin: Admin = Depends(get_current_admin),
+):
+    """运行时指标（当前进程）"""
+    return success(data={
+        "ai_reply_cache": ai_assistant.cache_stats(),
+        "cache": cache.stats,
+        "ephemeral_store": {"local_size": len(local_store.data), "local_counters": len(local_store.counters)},
+        "food_search_index": {"ready": food_search.index.ready, "size": len(food_search.index)},
+        "product_search_index": {"ready": product_search.index.ready, "size": len(product_search.index)},
+        "view_events": {**view_events.stats, "pending": await view_events.pending()},
+        "token_revocation": revocation_registry.runtime_stats(),
+    })
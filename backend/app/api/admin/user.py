@@ -13,7 +13,10 @@ from pydantic import BaseModel, Field
 from app.database import get_db
 from app.models.user import User, UserHealthProfile
 from app.models.system import Admin, AdminLog
-from app.utils.security import get_current_admin
+from app.services.leaderboard import leaderboard
+from app.services.user_cache import user_cache
+from app.utils.security import get_current_admin, revoke_subject_tokens
+from app.services.counters import counters, USER_FOLLOWERS, USER_FOLLOWING
 from app.utils.response import success, error, paginate
 
 router = APIRouter(prefix="/user", tags=["用户管理"])
@@ -122,6 +125,10 @@ async def get_user_detail(
             "allergies": health_profile.allergies,
         }
     
+    # 合并未刷新的关注计数
+    follower_count = (await counters.merge(USER_FOLLOWERS, [user], "follower_count"))[user.id]
+    following_count = (await counters.merge(USER_FOLLOWING, [user], "following_count"))[user.id]
+    
     return success(data={
         "id": user.id,
         "openid": user.openid,
@@ -140,8 +147,8 @@ async def get_user_detail(
         "continuous_checkin_days": user.continuous_checkin_days,
         "last_checkin_date": user.last_checkin_date.strftime("%Y-%m-%d") if user.last_checkin_date else None,
         "user_level": user.user_level,
-        "follower_count": user.follower_count,
-        "following_count": user.following_count,
+        "follower_count": follower_count,
+        "following_count": following_count,
         "status": user.status,
         "created_at": user.created_at.strftime("%Y-%m-%d %H:%M:%S") if user.created_at else None,
         "updated_at": user.updated_at.strftime("%Y-%m-%d %H:%M:%S") if user.updated_at else None,
@@ -186,6 +193,14 @@ async def update_user_status(
     
     await db.commit()
     
+    # 禁用用户移出积分榜，启用后重新上榜
+    await leaderboard.sync_points(user)
+    await user_cache.invalidate(user.id)
+    
+    # 禁用后吊销已签发的 Token
+    if data.status != 1:
+        await revoke_subject_tokens("user", user.id)
+    
     return success(message="操作成功")
 
 
@@ -11,9 +11,10 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 
 from app.database import get_db
-from app.models.user import User, UserAddress
+from app.models.user import UserAddress
 from app.schemas.user import UserAddressCreate, UserAddressUpdate, UserAddressSchema
-from app.utils.security import get_current_user
+from app.services.user_cache import UserPrincipal
+from app.utils.security import get_current_principal
 from app.utils.response import success, error
 
 router = APIRouter(prefix="/address", tags=["地址"])
@@ -21,7 +22,7 @@ router = APIRouter(prefix="/address", tags=["地址"])
 
 @router.get("/list")
 async def get_addresses(
-    current_user: User = Depends(get_current_user),
+    current_user: UserPrincipal = Depends(get_current_principal),
     db: AsyncSession = Depends(get_db)
 ):
     """获取地址列表"""
@@ -40,7 +41,7 @@ async def get_addresses(
 @router.post("")
 async def create_address(
     data: UserAddressCreate,
-    current_user: User = Depends(get_current_user),
+    current_user: UserPrincipal = Depends(get_current_principal),
     db: AsyncSession = Depends(get_db)
 ):
     """添加地址"""
@@ -67,7 +68,7 @@ async def create_address(
 async def update_address(
     address_id: int,
     data: UserAddressUpdate,
-    current_user: User = Depends(get_current_user),
+    current_user: UserPrincipal = Depends(get_current_principal),
     db: AsyncSession = Depends(get_db)
 ):
     """修改地址"""
@@ -104,7 +105,7 @@ async def update_address(
 @router.delete("/{address_id}")
 async def delete_address(
     address_id: int,
-    current_user: User = Depends(get_current_user),
+    current_user: UserPrincipal = Depends(get_current_principal),
     db: AsyncSession = Depends(get_db)
 ):
     """删除地址"""
@@ -128,7 +129,7 @@ async def delete_address(
 @router.put("/{address_id}/default")
 async def set_default_address(
     address_id: int,
-    current_user: User = Depends(get_current_user),
+    current_user: UserPrincipal = Depends(get_current_principal),
     db: AsyncSession = Depends(get_db)
 ):
     """设为默认地址"""
@@ -1,12 +1,14 @@
 """
 AI健康助手接口
 POST /ai/chat - AI健康助手对话
+POST /ai/chat/stream - AI健康助手流式对话（SSE）
 GET /ai/history - AI对话历史
 GET /ai/sessions - 会话列表
 DELETE /ai/history/{session_id} - 删除会话历史
 POST /ai/new-session - 创建新会话
 """
 from fastapi import APIRouter, Depends, Query
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, func, desc
 from typing import Optional, List
@@ -14,14 +16,20 @@ from pydantic import BaseModel, Field
 from datetime import date
 from decimal import Decimal
 import uuid
+import json
 import logging
 
-from app.database import get_db
+import anyio
+
+from app.database import get_db, async_session_maker
 from app.models.user import User, UserHealthProfile
-from app.models.system import AIChatRecord
-from app.utils.security import get_current_user
+from app.models.system import AIChatRecord, AIChatSession
+from app.services.user_cache import UserPrincipal
+from app.utils.security import get_current_user, get_current_principal
 from app.utils.response import success, error, paginate
-from app.services.ai_service import AIHealthAssistant
+from app.services.ai_service import ai_assistant
+from app.services import ai_session
+from app.services.ai_context import conversation_context, estimate_tokens
 
 router = APIRouter(prefix="/ai", tags=["AI助手"])
 logger = logging.getLogger(__name__)
@@ -161,15 +169,24 @@ def build_user_context(user: User, health_profile: Optional[UserHealthProfile])
     return context
 
 
-@router.post("/chat")
-async def chat(
-    data: ChatRequest,
-    current_user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db)
-):
-    """AI健康助手对话
+class ChatTurn:
+    """一轮对话的准备结果"""
+    
+    def __init__(self, session_id: str, context: dict, window: dict):
+        self.session_id = session_id
+        self.context = context
+        self.window = window
+        self.history: List[dict] = []
+        self.summary: Optional[str] = window["summary"]
+        # 超出 token 预算、待压缩进摘要的较早消息
+        self.overflow: List[dict] = []
+
+
+async def _prepare_chat(db: AsyncSession, current_user: User, data: ChatRequest) -> ChatTurn:
+    """
+    准备对话：加载用户上下文和会话窗口，保存并提交用户消息
     
-    支持上下文对话，自动记录对话历史，基于用户健康档案提供个性化建议。
+    提交后再调用AI，避免调用期间占用数据库连接。
     """
     # 生成或使用已有的会话ID
     session_id = data.session_id or str(uuid.uuid4())[:8]
@@ -187,60 +204,106 @@ async def chat(
     
     logger.info(f"用户上下文: {context}")
     
-    # 获取历史对话作为上下文（最近10轮，即20条消息）
-    history_result = await db.execute(
-        select(AIChatRecord).where(
-            AIChatRecord.user_id == current_user.id,
-            AIChatRecord.session_id == session_id
-        ).order_by(desc(AIChatRecord.created_at)).limit(20)
+    # 会话窗口（缓存），按 token 预算截取历史对话
+    window = await conversation_context.load(db, current_user.id, session_id)
+    turn = ChatTurn(session_id, context, window)
+    turn.history, turn.overflow = conversation_context.select_history(
+        window, reserve=estimate_tokens(data.message)
     )
-    history_records = history_result.scalars().all()
-    history_records = list(reversed(history_records))  # 按时间正序
-    
-    history = []
-    for record in history_records:
-        history.append({
-            "role": record.role,
-            "content": record.content
-        })
     
     # 保存用户消息
-    user_message = AIChatRecord(
-        user_id=current_user.id,
-        session_id=session_id,
-        role="user",
-        content=data.message,
-    )
-    db.add(user_message)
+    record = await ai_session.add_message(db, current_user.id, session_id, "user", data.message)
+    await db.commit()
+    await conversation_context.append(current_user.id, session_id, record)
+    
+    return turn
+
+
+async def _save_reply(db: AsyncSession, user_id: int, turn: ChatTurn, reply: str):
+    """保存AI回复，并在后台压缩超出预算的较早消息"""
+    record = await ai_session.add_message(db, user_id, turn.session_id, "assistant", reply)
+    await db.commit()
+    await conversation_context.append(user_id, turn.session_id, record)
+    conversation_context.compress_later(user_id, turn.session_id, turn.overflow)
+
+
+@router.post("/chat")
+async def chat(
+    data: ChatRequest,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """AI健康助手对话
+    
+    支持上下文对话，自动记录对话历史，基于用户健康档案提供个性化建议。
+    """
+    turn = await _prepare_chat(db, current_user, data)
     
     # 调用AI服务
-    ai_assistant = AIHealthAssistant()
     reply = await ai_assistant.chat(
         user_message=data.message,
-        context=context,
-        history=history
+        context=turn.context,
+        history=turn.history,
+        summary=turn.summary,
     )
     
     # 保存AI回复
-    ai_message = AIChatRecord(
-        user_id=current_user.id,
-        session_id=session_id,
-        role="assistant",
-        content=reply,
-    )
-    db.add(ai_message)
-    
-    await db.commit()
+    await _save_reply(db, current_user.id, turn, reply)
     
     return success(data={
-        "session_id": session_id,
+        "session_id": turn.session_id,
         "reply": reply,
     })
 
 
+def _sse(data: dict) -> str:
+    return f"data: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+@router.post("/chat/stream")
+async def chat_stream(
+    data: ChatRequest,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """AI健康助手流式对话（SSE）
+    
+    每个事件为 data: {"session_id": ..., "delta": ...}，结束时发送 data: [DONE]。
+    用户消息在开始输出前保存，AI回复在输出结束后保存。
+    """
+    turn = await _prepare_chat(db, current_user, data)
+    session_id = turn.session_id
+    user_id = current_user.id
+    
+    async def event_stream():
+        parts = []
+        try:
+            async for delta in ai_assistant.chat_stream(
+                user_message=data.message,
+                context=turn.context,
+                history=turn.history,
+                summary=turn.summary,
+            ):
+                parts.append(delta)
+                yield _sse({"session_id": session_id, "delta": delta})
+            yield "data: [DONE]\n\n"
+        finally:
+            # 客户端中途断开时也保存已生成的部分；此时所在任务已被取消，需屏蔽取消才能完成保存
+            if parts:
+                with anyio.CancelScope(shield=True):
+                    async with async_session_maker() as session:
+                        await _save_reply(session, user_id, turn, "".join(parts))
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 @router.post("/new-session")
 async def create_new_session(
-    current_user: User = Depends(get_current_user),
+    current_user: UserPrincipal = Depends(get_current_principal),
 ):
     """创建新会话
     
@@ -252,77 +315,47 @@ async def create_new_session(
     })
 
 
+async def _list_sessions(db: AsyncSession, user_id: int, page: int, page_size: int) -> dict:
+    """按最后消息时间倒序分页读取会话汇总"""
+    total = (await db.execute(
+        select(func.count()).select_from(AIChatSession).where(AIChatSession.user_id == user_id)
+    )).scalar()
+    
+    result = await db.execute(
+        select(AIChatSession).where(
+            AIChatSession.user_id == user_id
+        ).order_by(
+            desc(AIChatSession.last_message_at), desc(AIChatSession.id)
+        ).offset((page - 1) * page_size).limit(page_size)
+    )
+    
+    items = []
+    for s in result.scalars().all():
+        # 使用第一条用户消息作为会话标题
+        title = s.title or s.last_message
+        items.append({
+            "session_id": s.session_id,
+            "title": title[:30] + "..." if len(title) > 30 else title,
+            "message_count": s.message_count,
+            "last_message": s.last_message[:50] + "..." if len(s.last_message) > 50 else s.last_message,
+            "last_time": s.last_message_at.strftime("%Y-%m-%d %H:%M:%S") if s.last_message_at else None,
+        })
+    
+    return paginate(items, total, page, page_size)
+
+
 @router.get("/sessions")
 async def get_sessions(
     page: int = Query(1, ge=1),
     page_size: int = Query(20, ge=1, le=50),
-    current_user: User = Depends(get_current_user),
+    current_user: UserPrincipal = Depends(get_current_principal),
     db: AsyncSession = Depends(get_db)
 ):
     """获取会话列表
     
     返回用户所有的AI对话会话，按最后消息时间倒序排列。
     """
-    from sqlalchemy import distinct
-    
-    # 获取所有会话ID
-    session_query = select(distinct(AIChatRecord.session_id)).where(
-        AIChatRecord.user_id == current_user.id
-    )
-    session_result = await db.execute(session_query)
-    session_ids = [row[0] for row in session_result.fetchall()]
-    
-    items = []
-    for sid in session_ids:
-        # 获取每个会话的最后一条消息和第一条消息
-        last_msg_query = select(AIChatRecord).where(
-            AIChatRecord.user_id == current_user.id,
-            AIChatRecord.session_id == sid
-        ).order_by(desc(AIChatRecord.created_at)).limit(1)
-        
-        last_msg_result = await db.execute(last_msg_query)
-        last_msg = last_msg_result.scalar_one_or_none()
-        
-        first_msg_query = select(AIChatRecord).where(
-            AIChatRecord.user_id == current_user.id,
-            AIChatRecord.session_id == sid,
-            AIChatRecord.role == "user"
-        ).order_by(AIChatRecord.created_at).limit(1)
-        
-        first_msg_result = await db.execute(first_msg_query)
-        first_msg = first_msg_result.scalar_one_or_none()
-        
-        if last_msg:
-            # 获取会话消息数
-            count = (await db.execute(
-                select(func.count()).select_from(AIChatRecord).where(
-                    AIChatRecord.user_id == current_user.id,
-                    AIChatRecord.session_id == sid
-                )
-            )).scalar()
-            
-            # 使用第一条用户消息作为会话标题
-            title = first_msg.content if first_msg else last_msg.content
-            title = title[:30] + "..." if len(title) > 30 else title
-            
-            items.append({
-                "session_id": sid,
-                "title": title,
-                "message_count": count,
-                "last_message": last_msg.content[:50] + "..." if len(last_msg.content) > 50 else last_msg.content,
-                "last_time": last_msg.created_at.strftime("%Y-%m-%d %H:%M:%S") if last_msg.created_at else None,
-            })
-    
-    # 按最后消息时间排序
-    items.sort(key=lambda x: x["last_time"] or "", reverse=True)
-    
-    # 分页
-    total = len(items)
-    start = (page - 1) * page_size
-    end = start + page_size
-    items = items[start:end]
-    
-    return paginate(items, total, page, page_size)
+    return await _list_sessions(db, current_user.id, page, page_size)
 
 
 @router.get("/history")
@@ -330,138 +363,83 @@ async def get_history(
     session_id: Optional[str] = Query(None, description="会话ID，不传则获取会话列表"),
     page: int = Query(1, ge=1),
     page_size: int = Query(20, ge=1, le=50),
-    current_user: User = Depends(get_current_user),
+    current_user: UserPrincipal = Depends(get_current_principal),
     db: AsyncSession = Depends(get_db)
 ):
     """获取AI对话历史
     
     如果传入session_id，返回该会话的所有消息；否则返回会话列表。
     """
-    if session_id:
-        # 获取指定会话的消息
-        conditions = [
-            AIChatRecord.user_id == current_user.id,
-            AIChatRecord.session_id == session_id
-        ]
-        
-        count_query = select(func.count()).select_from(AIChatRecord).where(*conditions)
-        total = (await db.execute(count_query)).scalar()
-        
-        query = select(AIChatRecord).where(*conditions).order_by(
-            AIChatRecord.created_at
-        ).offset((page - 1) * page_size).limit(page_size)
-        
-        result = await db.execute(query)
-        records = result.scalars().all()
-        
-        items = []
-        for r in records:
-            items.append({
-                "id": r.id,
-                "role": r.role,
-                "content": r.content,
-                "created_at": r.created_at.strftime("%Y-%m-%d %H:%M:%S") if r.created_at else None,
-            })
-        
-        return paginate(items, total, page, page_size)
-    
-    else:
+    if not session_id:
         # 获取会话列表（兼容旧接口）
-        from sqlalchemy import distinct
-        
-        session_query = select(distinct(AIChatRecord.session_id)).where(
-            AIChatRecord.user_id == current_user.id
-        )
-        session_result = await db.execute(session_query)
-        session_ids = [row[0] for row in session_result.fetchall()]
-        
-        items = []
-        for sid in session_ids:
-            last_msg_query = select(AIChatRecord).where(
-                AIChatRecord.user_id == current_user.id,
-                AIChatRecord.session_id == sid
-            ).order_by(desc(AIChatRecord.created_at)).limit(1)
-            
-            last_msg_result = await db.execute(last_msg_query)
-            last_msg = last_msg_result.scalar_one_or_none()
-            
-            if last_msg:
-                count = (await db.execute(
-                    select(func.count()).select_from(AIChatRecord).where(
-                        AIChatRecord.user_id == current_user.id,
-                        AIChatRecord.session_id == sid
-                    )
-                )).scalar()
-                
-                items.append({
-                    "session_id": sid,
-                    "message_count": count,
-                    "last_message": last_msg.content[:50] + "..." if len(last_msg.content) > 50 else last_msg.content,
-                    "last_time": last_msg.created_at.strftime("%Y-%m-%d %H:%M:%S") if last_msg.created_at else None,
-                })
-        
-        items.sort(key=lambda x: x["last_time"] or "", reverse=True)
-        
-        total = len(items)
-        start = (page - 1) * page_size
-        end = start + page_size
-        items = items[start:end]
-        
-        return paginate(items, total, page, page_size)
+        return await _list_sessions(db, current_user.id, page, page_size)
+    
+    # 获取指定会话的消息
+    conditions = [
+        AIChatRecord.user_id == current_user.id,
+        AIChatRecord.session_id == session_id
+    ]
+    
+    count_query = select(func.count()).select_from(AIChatRecord).where(*conditions)
+    total = (await db.execute(count_query)).scalar()
+    
+    query = select(AIChatRecord).where(*conditions).order_by(
+        AIChatRecord.created_at
+    ).offset((page - 1) * page_size).limit(page_size)
+    
+    result = await db.execute(query)
+    records = result.scalars().all()
+    
+    items = []
+    for r in records:
+        items.append({
+            "id": r.id,
+            "role": r.role,
+            "content": r.content,
+            "created_at": r.created_at.strftime("%Y-%m-%d %H:%M:%S") if r.created_at else None,
+        })
+    
+    return paginate(items, total, page, page_size)
 
 
 @router.delete("/history/{session_id}")
 async def delete_history(
     session_id: str,
-    current_user: User = Depends(get_current_user),
+    current_user: UserPrincipal = Depends(get_current_principal),
     db: AsyncSession = Depends(get_db)
 ):
     """删除会话历史
     
     删除指定会话的所有消息记录。
     """
-    result = await db.execute(
-        select(AIChatRecord).where(
-            AIChatRecord.user_id == current_user.id,
-            AIChatRecord.session_id == session_id
-        )
-    )
-    records = result.scalars().all()
-    
-    if not records:
+    count = await ai_session.delete_sessions(db, current_user.id, session_id)
+    if not count:
         return error(404, "会话不存在")
     
-    for record in records:
-        await db.delete(record)
-    
     await db.commit()
+    await conversation_context.forget(current_user.id, [session_id])
     
-    logger.info(f"用户 {current_user.id} 删除会话 {session_id}，共 {len(records)} 条消息")
+    logger.info(f"用户 {current_user.id} 删除会话 {session_id}，共 {count} 条消息")
     
     return success(message="删除成功")
 
 
 @router.delete("/history")
 async def clear_all_history(
-    current_user: User = Depends(get_current_user),
+    current_user: UserPrincipal = Depends(get_current_principal),
     db: AsyncSession = Depends(get_db)
 ):
     """清空所有对话历史
     
     删除用户的所有AI对话记录。
     """
-    result = await db.execute(
-        select(AIChatRecord).where(
-            AIChatRecord.user_id == current_user.id
-        )
-    )
-    records = result.scalars().all()
-    
-    count = len(records)
-    for record in records:
-        await db.delete(record)
+    session_ids = (await db.execute(
+        select(AIChatSession.session_id).where(AIChatSession.user_id == current_user.id)
+    )).scalars().all()
+    count = await ai_session.delete_sessions(db, current_user.id)
     
     await db.commit()
+    await conversation_context.forget(current_user.id, list(session_ids))
     
     logger.info(f"用户 {current_user.id} 清空所有对话历史，共 {count} 条消息")
     
@@ -3,18 +3,26 @@
 POST /auth/login - 微信登录
 POST /auth/dev-login - 开发环境登录（无需微信）
 GET /auth/check - 检查登录状态
+POST /auth/logout - 退出登录
+POST /auth/logout-all - 退出所有设备
 """
 from fastapi import APIRouter, Depends
+from fastapi.security import HTTPAuthorizationCredentials
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 from datetime import datetime
-import httpx
 
 from app.database import get_db
+from app.http_client import get_http_client
 from app.config import settings
 from app.models.user import User
 from app.schemas.auth import LoginRequest, RegisterRequest
-from app.utils.security import create_access_token, get_current_user
+from app.services import rollup_service
+from app.services.user_cache import UserPrincipal, user_cache
+from app.utils.security import (
+    security, create_access_token, get_current_user, get_current_principal,
+    revoke_token, revoke_subject_tokens,
+)
 from app.utils.response import success, error
 
 router = APIRouter(prefix="/auth", tags=["认证"])
@@ -38,7 +46,7 @@ async def wechat_login(
         return error(400, "微信登录未配置，请使用开发登录接口 /auth/dev-login")
     
     # 调用微信API获取openid
-    url = "https://api.weixin.qq.com/sns/jscode2session"
+    url = "/sns/jscode2session"
     params = {
         "appid": settings.WECHAT_APPID,
         "secret": settings.WECHAT_SECRET,
@@ -47,9 +55,8 @@ async def wechat_login(
     }
     
     try:
-        async with httpx.AsyncClient() as client:
-            response = await client.get(url, params=params)
-            result = response.json()
+        response = await get_http_client("wechat").get(url, params=params)
+        result = response.json()
     except Exception as e:
         return error(500, f"微信API调用失败: {str(e)}")
     
@@ -75,6 +82,7 @@ async def wechat_login(
             created_at=datetime.now()
         )
         db.add(user)
+        await rollup_service.incr_daily(db, user.created_at.date(), new_users=1)
         await db.commit()
         await db.refresh(user)
         is_new_user = True
@@ -115,6 +123,7 @@ async def dev_login(
             created_at=datetime.now()
         )
         db.add(user)
+        await rollup_service.incr_daily(db, user.created_at.date(), new_users=1)
         await db.commit()
         await db.refresh(user)
         is_new_user = True
@@ -132,7 +141,7 @@ async def dev_login(
 
 
 @router.get("/check")
-async def check_login(current_user: User = Depends(get_current_user)):
+async def check_login(current_user: UserPrincipal = Depends(get_current_principal)):
     """检查登录状态"""
     return success(data={
         "user_id": current_user.id,
@@ -142,6 +151,23 @@ async def check_login(current_user: User = Depends(get_current_user)):
     })
 
 
+@router.post("/logout")
+async def logout(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    current_user: UserPrincipal = Depends(get_current_principal)
+):
+    """退出登录（吊销当前 Token）"""
+    await revoke_token(credentials.credentials)
+    return success(message="已退出登录")
+
+
+@router.post("/logout-all")
+async def logout_all(current_user: UserPrincipal = Depends(get_current_principal)):
+    """退出所有设备（吊销该账号已签发的全部 Token）"""
+    await revoke_subject_tokens("user", current_user.id)
+    return success(message="已退出所有设备")
+
+
 @router.put("/register")
 async def complete_register(
     data: RegisterRequest,
@@ -157,6 +183,7 @@ async def complete_register(
     
     await db.commit()
     await db.refresh(current_user)
+    await user_cache.invalidate(current_user.id)
     
     return success(
         data={
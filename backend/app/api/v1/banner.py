@@ -10,20 +10,16 @@ from typing import Optional
 
 from app.database import get_db
 from app.models.system import Banner
+from app.services.cache import cache, TAG_BANNER
 from app.utils.response import success
 
 router = APIRouter(prefix="/banner", tags=["轮播图"])
 
 
-@router.get("/list")
-async def get_banners(
-    position: Optional[str] = Query("home", description="位置: home/shop/community"),
-    db: AsyncSession = Depends(get_db)
-):
-    """获取轮播图列表"""
-    now = datetime.now()
-    
-    # 查询条件：启用、位置匹配、在有效期内
+@cache.cached("banner:{position}", ttl=300, tags=[TAG_BANNER])
+async def _load_banners(db: AsyncSession, position: Optional[str]) -> list:
+    """启用的轮播图（含有效期，缓存）"""
+    # 查询条件：启用、位置匹配
     conditions = [
         Banner.is_active == 1,
         Banner.position == position,
@@ -37,21 +33,34 @@ async def get_banners(
     result = await db.execute(query)
     banners = result.scalars().all()
     
+    return [{
+        "id": b.id,
+        "title": b.title,
+        "image_url": b.image_url,
+        "link_type": b.link_type,
+        "link_value": b.link_value,
+        "start_time": b.start_time.isoformat() if b.start_time else None,
+        "end_time": b.end_time.isoformat() if b.end_time else None,
+    } for b in banners]
+
+
+@router.get("/list")
+async def get_banners(
+    position: Optional[str] = Query("home", description="位置: home/shop/community"),
+    db: AsyncSession = Depends(get_db)
+):
+    """获取轮播图列表"""
+    now = datetime.now().isoformat()
+    
     items = []
-    for b in banners:
-        # 检查有效期
-        if b.start_time and b.start_time > now:
+    for b in await _load_banners(db, position):
+        # 检查有效期（每次请求判断，不受缓存影响）
+        if b["start_time"] and b["start_time"] > now:
             continue
-        if b.end_time and b.end_time < now:
+        if b["end_time"] and b["end_time"] < now:
             continue
-            
-        items.append({
-            "id": b.id,
-            "title": b.title,
-            "image_url": b.image_url,
-            "link_type": b.link_type,
-            "link_value": b.link_value,
-        })
+        
+        items.append({k: v for k, v in b.items() if k not in ("start_time", "end_time")})
     
     return success(data=items)
 
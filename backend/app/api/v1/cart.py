@@ -12,10 +12,10 @@ from pydantic import BaseModel, Field
 from typing import Optional
 
 from app.database import get_db
-from app.models.user import User
 from app.models.cart import Cart
 from app.models.shop import Product
-from app.utils.security import get_current_user
+from app.services.user_cache import UserPrincipal
+from app.utils.security import get_current_principal
 from app.utils.response import success, error
 
 router = APIRouter(prefix="/cart", tags=["购物车"])
@@ -36,7 +36,7 @@ class CartUpdate(BaseModel):
 
 @router.get("/count")
 async def get_cart_count(
-    current_user: User = Depends(get_current_user),
+    current_user: UserPrincipal = Depends(get_current_principal),
     db: AsyncSession = Depends(get_db)
 ):
     """获取购物车商品数量"""
@@ -50,7 +50,7 @@ async def get_cart_count(
 
 @router.get("")
 async def get_cart_list(
-    current_user: User = Depends(get_current_user),
+    current_user: UserPrincipal = Depends(get_current_principal),
     db: AsyncSession = Depends(get_db)
 ):
     """获取购物车列表"""
@@ -120,7 +120,7 @@ async def get_cart_list(
 @router.post("")
 async def add_to_cart(
     data: CartAdd,
-    current_user: User = Depends(get_current_user),
+    current_user: UserPrincipal = Depends(get_current_principal),
     db: AsyncSession = Depends(get_db)
 ):
     """添加商品到购物车"""
@@ -172,7 +172,7 @@ async def add_to_cart(
 async def update_cart(
     cart_id: int,
     data: CartUpdate,
-    current_user: User = Depends(get_current_user),
+    current_user: UserPrincipal = Depends(get_current_principal),
     db: AsyncSession = Depends(get_db)
 ):
     """更新购物车"""
@@ -203,7 +203,7 @@ async def update_cart(
 @router.delete("/{cart_id}")
 async def delete_cart(
     cart_id: int,
-    current_user: User = Depends(get_current_user),
+    current_user: UserPrincipal = Depends(get_current_principal),
     db: AsyncSession = Depends(get_db)
 ):
     """删除购物车商品"""
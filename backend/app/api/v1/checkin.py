@@ -14,7 +14,10 @@ from typing import Optional
 from app.database import get_db
 from app.models.user import User
 from app.models.points import CheckinRecord, CoinRecord
-from app.utils.security import get_current_user
+from app.services.leaderboard import leaderboard
+from app.services.user_cache import UserPrincipal, user_cache
+from app.services import rollup_service
+from app.utils.security import get_current_user, get_current_principal
 from app.utils.response import success, error
 
 router = APIRouter(prefix="/checkin", tags=["签到"])
@@ -95,7 +98,12 @@ async def daily_checkin(
     )
     db.add(coin_record2)
     
+    await rollup_service.incr_daily(db, today, checkin_count=1)
+    await rollup_service.incr_user_daily(db, current_user.id, today, checkin_count=1)
+    
     await db.commit()
+    await leaderboard.sync_points(current_user)
+    await user_cache.invalidate(current_user.id)
     
     return success(
         data={
@@ -111,7 +119,7 @@ async def daily_checkin(
 
 @router.get("/status")
 async def get_checkin_status(
-    current_user: User = Depends(get_current_user),
+    current_user: UserPrincipal = Depends(get_current_principal),
     db: AsyncSession = Depends(get_db)
 ):
     """获取今日签到状态"""
@@ -142,7 +150,7 @@ async def get_checkin_status(
 async def get_checkin_calendar(
     year: int = Query(None, description="年份"),
     month: int = Query(None, description="月份"),
-    current_user: User = Depends(get_current_user),
+    current_user: UserPrincipal = Depends(get_current_principal),
     db: AsyncSession = Depends(get_db)
 ):
     """获取签到日历"""
@@ -187,7 +195,7 @@ async def get_checkin_calendar(
 
 @router.get("/stats")
 async def get_checkin_stats(
-    current_user: User = Depends(get_current_user),
+    current_user: UserPrincipal = Depends(get_current_principal),
     db: AsyncSession = Depends(get_db)
 ):
     """获取签到统计"""
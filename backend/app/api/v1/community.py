@@ -1,6 +1,6 @@
 """
 社区接口
-GET /community/posts - 动态列表
+GET /community/posts - 动态列表（支持页码/游标分页）
 POST /community/post - 发布动态
 DELETE /community/post/{id} - 删除动态
 POST /community/post/{id}/like - 点赞
@@ -13,15 +13,27 @@ DELETE /community/follow/{user_id} - 取消关注
 """
 from fastapi import APIRouter, Depends, Query
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func, desc, and_, or_
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy import select, func, desc, delete, and_, or_
 from typing import Optional, List
+from datetime import datetime
 from pydantic import BaseModel, Field
 
 from app.database import get_db
 from app.models.user import User
 from app.models.community import Post, PostComment, PostLike, UserFollow
-from app.utils.security import get_current_user, get_current_user_optional
-from app.utils.response import success, error, paginate
+from app.services.membership import post_likes, user_follows
+from app.services.leaderboard import leaderboard, SPORT_BOARD, POINTS_BOARD
+from app.services.cache import cache, post_tag, TAG_POST, TAG_TOPIC
+from app.services.counters import (
+    counters, POST_VIEWS, POST_LIKES, POST_COMMENTS, USER_FOLLOWERS, USER_FOLLOWING,
+)
+from app.services.user_cache import UserPrincipal
+from app.services.view_events import view_events
+from app.utils.security import get_current_principal, get_current_principal_optional
+from app.utils.response import success, error, paginate, cursor_paginate
+from app.utils.pagination import encode_cursor, decode_cursor, cached_count
+from app.utils.lru import TTLCache
 
 router = APIRouter(prefix="/community", tags=["社区"])
 
@@ -42,17 +54,73 @@ class CommentCreate(BaseModel):
     reply_to_user_id: Optional[int] = Field(None, description="回复用户ID")
 
 
+# 动态总数缓存（游标模式下按需返回，允许短时间内的偏差）
+_post_total_cache = TTLCache(maxsize=1024, ttl=60)
+
+
+async def _build_post_items(db: AsyncSession, posts: list, current_user: Optional[UserPrincipal]) -> list:
+    """组装动态列表数据"""
+    # 获取用户信息
+    user_ids = list(set([p.user_id for p in posts]))
+    users = {}
+    if user_ids:
+        users_result = await db.execute(select(User).where(User.id.in_(user_ids)))
+        users = {u.id: u for u in users_result.scalars().all()}
+    
+    # 获取当前用户对本页动态的点赞状态
+    liked_post_ids = set()
+    if current_user:
+        liked_post_ids = await post_likes.check(db, current_user.id, [p.id for p in posts])
+    
+    # 合并尚未写入数据库的计数
+    view_counts = await counters.merge(POST_VIEWS, posts, "view_count")
+    like_counts = await counters.merge(POST_LIKES, posts, "like_count")
+    comment_counts = await counters.merge(POST_COMMENTS, posts, "comment_count")
+    
+    items = []
+    for p in posts:
+        user = users.get(p.user_id)
+        items.append({
+            "id": p.id,
+            "content": p.content,
+            "images": p.images,
+            "video_url": p.video_url,
+            "location": p.location,
+            "view_count": view_counts[p.id],
+            "like_count": like_counts[p.id],
+            "comment_count": comment_counts[p.id],
+            "is_top": p.is_top,
+            "is_essence": p.is_essence,
+            "is_liked": p.id in liked_post_ids,
+            "user": {
+                "id": user.id if user else None,
+                "nickname": user.nickname if user else "未知用户",
+                "avatar": user.avatar if user else None,
+            },
+            "created_at": p.created_at.strftime("%Y-%m-%d %H:%M:%S") if p.created_at else None,
+        })
+    return items
+
+
 @router.get("/posts")
 async def get_posts(
     page: int = Query(1, ge=1),
     page_size: int = Query(10, ge=1, le=50),
+    cursor: Optional[str] = Query(None, description="游标，传空字符串获取第一页；不传则使用页码分页"),
+    with_total: int = Query(0, description="游标模式下是否返回总数（缓存值）"),
     user_id: Optional[int] = Query(None, description="指定用户的动态"),
     topic_id: Optional[int] = Query(None, description="指定话题"),
     following_only: int = Query(0, description="仅关注的人"),
-    current_user: User = Depends(get_current_user_optional),
+    current_user: Optional[UserPrincipal] = Depends(get_current_principal_optional),
     db: AsyncSession = Depends(get_db)
 ):
-    """获取动态列表"""
+    """
+    获取动态列表
+    
+    支持两种分页方式：
+    - 页码分页：page/page_size，兼容旧版客户端
+    - 游标分页：cursor，按 (is_top, created_at, id) 定位，翻页耗时与页数无关
+    """
     conditions = [Post.status == 1]
     
     if user_id:
@@ -68,135 +136,143 @@ async def get_posts(
         following_ids = [row[0] for row in following_result.fetchall()]
         if following_ids:
             conditions.append(Post.user_id.in_(following_ids))
+        elif cursor is not None:
+            return cursor_paginate([], None, page_size, 0 if with_total == 1 else None)
         else:
             return paginate([], 0, page, page_size)
     
-    # 查询总数
     count_query = select(func.count()).select_from(Post).where(*conditions)
+    
+    # 游标分页
+    if cursor is not None:
+        query = select(Post).where(*conditions)
+        if cursor:
+            cursor_values = decode_cursor(cursor, (int, datetime, int))
+            if cursor_values is None:
+                return error(400, "无效的游标")
+            is_top, created_at, post_id = cursor_values
+            # 展开为 OR/AND 形式：MySQL 不会把行构造器比较 (a, b, c) < (x, y, z) 用作索引范围扫描
+            query = query.where(or_(
+                Post.is_top < is_top,
+                and_(Post.is_top == is_top, Post.created_at < created_at),
+                and_(Post.is_top == is_top, Post.created_at == created_at, Post.id < post_id),
+            ))
+        
+        # 多取一条用于判断是否还有下一页
+        query = query.order_by(
+            desc(Post.is_top), desc(Post.created_at), desc(Post.id)
+        ).limit(page_size + 1)
+        
+        result = await db.execute(query)
+        posts = list(result.scalars().all())
+        
+        next_cursor = None
+        if len(posts) > page_size:
+            posts = posts[:page_size]
+            last = posts[-1]
+            next_cursor = encode_cursor([last.is_top, last.created_at, last.id])
+        
+        total = None
+        if with_total == 1:
+            cache_key = (user_id, topic_id, current_user.id if following_only == 1 and current_user else None)
+            total = await cached_count(db, count_query, _post_total_cache, cache_key)
+        
+        items = await _build_post_items(db, posts, current_user)
+        return cursor_paginate(items, next_cursor, page_size, total)
+    
+    # 查询总数
     total = (await db.execute(count_query)).scalar()
     
     # 查询列表
     query = select(Post).where(*conditions).order_by(
-        desc(Post.is_top), desc(Post.created_at)
+        desc(Post.is_top), desc(Post.created_at), desc(Post.id)
     ).offset((page - 1) * page_size).limit(page_size)
     
     result = await db.execute(query)
     posts = result.scalars().all()
     
-    # 获取用户信息
-    user_ids = list(set([p.user_id for p in posts]))
-    users = {}
-    if user_ids:
-        users_result = await db.execute(select(User).where(User.id.in_(user_ids)))
-        users = {u.id: u for u in users_result.scalars().all()}
-    
-    # 获取当前用户的点赞状态
-    liked_post_ids = set()
-    if current_user:
-        likes_result = await db.execute(
-            select(PostLike.post_id).where(PostLike.user_id == current_user.id)
-        )
-        liked_post_ids = {row[0] for row in likes_result.fetchall()}
-    
-    items = []
-    for p in posts:
-        user = users.get(p.user_id)
-        items.append({
-            "id": p.id,
-            "content": p.content,
-            "images": p.images,
-            "video_url": p.video_url,
-            "location": p.location,
-            "view_count": p.view_count,
-            "like_count": p.like_count,
-            "comment_count": p.comment_count,
-            "is_top": p.is_top,
-            "is_essence": p.is_essence,
-            "is_liked": p.id in liked_post_ids,
-            "user": {
-                "id": user.id if user else None,
-                "nickname": user.nickname if user else "未知用户",
-                "avatar": user.avatar if user else None,
-            },
-            "created_at": p.created_at.strftime("%Y-%m-%d %H:%M:%S") if p.created_at else None,
-        })
+    items = await _build_post_items(db, posts, current_user)
     
     return paginate(items, total, page, page_size)
 
 
-@router.get("/post/{post_id}")
-async def get_post_detail(
-    post_id: int,
-    current_user: User = Depends(get_current_user_optional),
-    db: AsyncSession = Depends(get_db)
-):
-    """获取动态详情"""
-    # 查询动态
+@cache.cached("community:post:{post_id}", ttl=60, tags=[TAG_POST + ":{post_id}"])
+async def _load_post_detail(db: AsyncSession, post_id: int) -> Optional[dict]:
+    """动态详情（与用户无关的部分，缓存；不含计数，计数每次单独读取）"""
     result = await db.execute(
         select(Post).where(Post.id == post_id, Post.status == 1)
     )
     post = result.scalar_one_or_none()
     
     if not post:
-        return error(404, "动态不存在")
-    
-    # 增加浏览量
-    post.view_count = (post.view_count or 0) + 1
-    await db.commit()
+        return None
     
     # 查询作者信息
     user_result = await db.execute(select(User).where(User.id == post.user_id))
     user = user_result.scalar_one_or_none()
     
-    # 检查是否点赞
-    is_liked = False
-    if current_user:
-        like_result = await db.execute(
-            select(PostLike).where(
-                PostLike.post_id == post_id,
-                PostLike.user_id == current_user.id
-            )
-        )
-        is_liked = like_result.scalar_one_or_none() is not None
-    
-    # 检查是否关注作者
-    is_followed = False
-    if current_user and user and current_user.id != user.id:
-        follow_result = await db.execute(
-            select(UserFollow).where(
-                UserFollow.user_id == current_user.id,
-                UserFollow.follow_user_id == user.id
-            )
-        )
-        is_followed = follow_result.scalar_one_or_none() is not None
-    
-    return success(data={
+    return {
         "id": post.id,
         "content": post.content,
         "images": post.images,
         "video_url": post.video_url,
         "location": post.location,
         "topic_id": post.topic_id,
-        "view_count": post.view_count,
-        "like_count": post.like_count,
-        "comment_count": post.comment_count,
         "is_top": post.is_top,
         "is_essence": post.is_essence,
-        "is_liked": is_liked,
         "user": {
             "id": user.id if user else None,
             "nickname": user.nickname if user else "未知用户",
             "avatar": user.avatar if user else None,
         },
-        "is_followed": is_followed,
         "created_at": post.created_at.strftime("%Y-%m-%d %H:%M:%S") if post.created_at else None,
-    })
+    }
+
+
+@router.get("/post/{post_id}")
+async def get_post_detail(
+    post_id: int,
+    current_user: Optional[UserPrincipal] = Depends(get_current_principal_optional),
+    db: AsyncSession = Depends(get_db)
+):
+    """获取动态详情（只读：浏览量通过浏览事件异步累加）"""
+    detail = await _load_post_detail(db, post_id)
+    
+    if not detail:
+        return error(404, "动态不存在")
+    
+    # 记录浏览
+    await view_events.record(post_id)
+    
+    # 计数不进缓存：按主键读取数据库值，再合并尚未写入数据库的增量，
+    # 避免缓存的旧计数与已落库、已清空的增量合并后回退
+    counts = (await db.execute(
+        select(Post.id, Post.view_count, Post.like_count, Post.comment_count).where(Post.id == post_id)
+    )).first()
+    data = dict(detail)
+    for name, field in ((POST_VIEWS, "view_count"), (POST_LIKES, "like_count"), (POST_COMMENTS, "comment_count")):
+        data[field] = (await counters.merge(name, [counts], field))[post_id] if counts else 0
+    
+    # 检查是否点赞
+    is_liked = False
+    if current_user:
+        is_liked = await post_likes.contains(db, current_user.id, post_id)
+    
+    # 检查是否关注作者
+    is_followed = False
+    author_id = detail["user"]["id"]
+    if current_user and author_id and current_user.id != author_id:
+        is_followed = await user_follows.contains(db, current_user.id, author_id)
+    
+    data["is_liked"] = is_liked
+    data["is_followed"] = is_followed
+    return success(data=data)
 
 
 @router.post("/post")
 async def create_post(
     data: PostCreate,
-    current_user: User = Depends(get_current_user),
+    current_user: UserPrincipal = Depends(get_current_principal),
     db: AsyncSession = Depends(get_db)
 ):
     """发布动态"""
@@ -219,7 +295,7 @@ async def create_post(
 @router.delete("/post/{post_id}")
 async def delete_post(
     post_id: int,
-    current_user: User = Depends(get_current_user),
+    current_user: UserPrincipal = Depends(get_current_principal),
     db: AsyncSession = Depends(get_db)
 ):
     """删除动态"""
@@ -234,38 +310,40 @@ async def delete_post(
     post.status = 0
     await db.commit()
     
+    await cache.invalidate_tags(post_tag(post_id))
+    
     return success(message="删除成功")
 
 
 @router.post("/post/{post_id}/like")
 async def like_post(
     post_id: int,
-    current_user: User = Depends(get_current_user),
+    current_user: UserPrincipal = Depends(get_current_principal),
     db: AsyncSession = Depends(get_db)
 ):
     """点赞动态"""
     # 检查动态是否存在
-    post_result = await db.execute(select(Post).where(Post.id == post_id, Post.status == 1))
-    post = post_result.scalar_one_or_none()
-    
-    if not post:
+    post_result = await db.execute(select(Post.id).where(Post.id == post_id, Post.status == 1))
+    if post_result.scalar_one_or_none() is None:
         return error(404, "动态不存在")
     
     # 检查是否已点赞
-    existing = await db.execute(
-        select(PostLike).where(PostLike.post_id == post_id, PostLike.user_id == current_user.id)
-    )
-    if existing.scalar_one_or_none():
+    if await post_likes.contains(db, current_user.id, post_id):
         return error(400, "已点赞")
     
     # 创建点赞记录
     like = PostLike(post_id=post_id, user_id=current_user.id)
     db.add(like)
     
-    # 更新点赞数
-    post.like_count += 1
+    try:
+        await db.commit()
+    except IntegrityError:
+        # 并发重复点赞，由唯一索引 (user_id, post_id) 拦截
+        await db.rollback()
+        return error(400, "已点赞")
     
-    await db.commit()
+    # 更新点赞数
+    await counters.incr(POST_LIKES, post_id)
     
     return success(message="点赞成功")
 
@@ -273,27 +351,21 @@ async def like_post(
 @router.delete("/post/{post_id}/like")
 async def unlike_post(
     post_id: int,
-    current_user: User = Depends(get_current_user),
+    current_user: UserPrincipal = Depends(get_current_principal),
     db: AsyncSession = Depends(get_db)
 ):
     """取消点赞"""
+    # 以实际删除的行数为准，并发重复取消时只扣减一次
     result = await db.execute(
-        select(PostLike).where(PostLike.post_id == post_id, PostLike.user_id == current_user.id)
+        delete(PostLike).where(PostLike.post_id == post_id, PostLike.user_id == current_user.id)
     )
-    like = result.scalar_one_or_none()
+    await db.commit()
     
-    if not like:
+    if not result.rowcount:
         return error(400, "未点赞")
     
-    await db.delete(like)
-    
     # 更新点赞数
-    post_result = await db.execute(select(Post).where(Post.id == post_id))
-    post = post_result.scalar_one_or_none()
-    if post and post.like_count > 0:
-        post.like_count -= 1
-    
-    await db.commit()
+    await counters.incr(POST_LIKES, post_id, -1)
     
     return success(message="取消点赞")
 
@@ -302,15 +374,13 @@ async def unlike_post(
 async def create_comment(
     post_id: int,
     data: CommentCreate,
-    current_user: User = Depends(get_current_user),
+    current_user: UserPrincipal = Depends(get_current_principal),
     db: AsyncSession = Depends(get_db)
 ):
     """发表评论"""
     # 检查动态是否存在
-    post_result = await db.execute(select(Post).where(Post.id == post_id, Post.status == 1))
-    post = post_result.scalar_one_or_none()
-    
-    if not post:
+    post_result = await db.execute(select(Post.id).where(Post.id == post_id, Post.status == 1))
+    if post_result.scalar_one_or_none() is None:
         return error(404, "动态不存在")
     
     # 创建评论
@@ -323,12 +393,12 @@ async def create_comment(
     )
     db.add(comment)
     
-    # 更新评论数
-    post.comment_count += 1
-    
     await db.commit()
     await db.refresh(comment)
     
+    # 更新评论数
+    await counters.incr(POST_COMMENTS, post_id)
+    
     return success(data={"id": comment.id}, message="评论成功")
 
 
@@ -336,7 +406,7 @@ async def create_comment(
 async def get_following(
     page: int = Query(1, ge=1),
     page_size: int = Query(20, ge=1, le=50),
-    current_user: User = Depends(get_current_user),
+    current_user: UserPrincipal = Depends(get_current_principal),
     db: AsyncSession = Depends(get_db)
 ):
     """关注列表"""
@@ -356,6 +426,8 @@ async def get_following(
     result = await db.execute(query)
     rows = result.fetchall()
     
+    follower_counts = await counters.merge(USER_FOLLOWERS, [row[1] for row in rows], "follower_count")
+    
     items = []
     for row in rows:
         follow, user = row
@@ -363,7 +435,7 @@ async def get_following(
             "id": user.id,
             "nickname": user.nickname,
             "avatar": user.avatar,
-            "follower_count": user.follower_count,
+            "follower_count": follower_counts[user.id],
             "follow_time": follow.created_at.strftime("%Y-%m-%d %H:%M:%S") if follow.created_at else None,
         })
     
@@ -374,7 +446,7 @@ async def get_following(
 async def get_followers(
     page: int = Query(1, ge=1),
     page_size: int = Query(20, ge=1, le=50),
-    current_user: User = Depends(get_current_user),
+    current_user: UserPrincipal = Depends(get_current_principal),
     db: AsyncSession = Depends(get_db)
 ):
     """粉丝列表"""
@@ -394,11 +466,10 @@ async def get_followers(
     result = await db.execute(query)
     rows = result.fetchall()
     
-    # 获取当前用户关注的人
-    following_result = await db.execute(
-        select(UserFollow.follow_user_id).where(UserFollow.user_id == current_user.id)
-    )
-    following_ids = {row[0] for row in following_result.fetchall()}
+    # 获取当前用户是否回关了本页粉丝
+    following_ids = await user_follows.check(db, current_user.id, [row[1].id for row in rows])
+    
+    follower_counts = await counters.merge(USER_FOLLOWERS, [row[1] for row in rows], "follower_count")
     
     items = []
     for row in rows:
@@ -407,7 +478,7 @@ async def get_followers(
             "id": user.id,
             "nickname": user.nickname,
             "avatar": user.avatar,
-            "follower_count": user.follower_count,
+            "follower_count": follower_counts[user.id],
             "is_following": user.id in following_ids,
             "follow_time": follow.created_at.strftime("%Y-%m-%d %H:%M:%S") if follow.created_at else None,
         })
@@ -418,7 +489,7 @@ async def get_followers(
 @router.post("/follow/{user_id}")
 async def follow_user(
     user_id: int,
-    current_user: User = Depends(get_current_user),
+    current_user: UserPrincipal = Depends(get_current_principal),
     db: AsyncSession = Depends(get_db)
 ):
     """关注用户"""
@@ -426,31 +497,28 @@ async def follow_user(
         return error(400, "不能关注自己")
     
     # 检查用户是否存在
-    target_user_result = await db.execute(select(User).where(User.id == user_id))
-    target_user = target_user_result.scalar_one_or_none()
-    
-    if not target_user:
+    target_user_result = await db.execute(select(User.id).where(User.id == user_id))
+    if target_user_result.scalar_one_or_none() is None:
         return error(404, "用户不存在")
     
     # 检查是否已关注
-    existing = await db.execute(
-        select(UserFollow).where(
-            UserFollow.user_id == current_user.id,
-            UserFollow.follow_user_id == user_id
-        )
-    )
-    if existing.scalar_one_or_none():
+    if await user_follows.contains(db, current_user.id, user_id):
         return error(400, "已关注该用户")
     
     # 创建关注关系
     follow = UserFollow(user_id=current_user.id, follow_user_id=user_id)
     db.add(follow)
     
-    # 更新计数
-    current_user.following_count += 1
-    target_user.follower_count += 1
+    try:
+        await db.commit()
+    except IntegrityError:
+        # 并发重复关注，由唯一索引 (user_id, follow_user_id) 拦截
+        await db.rollback()
+        return error(400, "已关注该用户")
     
-    await db.commit()
+    # 更新计数
+    await counters.incr(USER_FOLLOWING, current_user.id)
+    await counters.incr(USER_FOLLOWERS, user_id)
     
     return success(message="关注成功")
 
@@ -458,33 +526,25 @@ async def follow_user(
 @router.delete("/follow/{user_id}")
 async def unfollow_user(
     user_id: int,
-    current_user: User = Depends(get_current_user),
+    current_user: UserPrincipal = Depends(get_current_principal),
     db: AsyncSession = Depends(get_db)
 ):
     """取消关注"""
+    # 以实际删除的行数为准，并发重复取消时只扣减一次
     result = await db.execute(
-        select(UserFollow).where(
+        delete(UserFollow).where(
             UserFollow.user_id == current_user.id,
             UserFollow.follow_user_id == user_id
         )
     )
-    follow = result.scalar_one_or_none()
+    await db.commit()
     
-    if not follow:
+    if not result.rowcount:
         return error(400, "未关注该用户")
     
-    await db.delete(follow)
-    
     # 更新计数
-    if current_user.following_count > 0:
-        current_user.following_count -= 1
-    
-    target_user_result = await db.execute(select(User).where(User.id == user_id))
-    target_user = target_user_result.scalar_one_or_none()
-    if target_user and target_user.follower_count > 0:
-        target_user.follower_count -= 1
-    
-    await db.commit()
+    await counters.incr(USER_FOLLOWING, current_user.id, -1)
+    await counters.incr(USER_FOLLOWERS, user_id, -1)
     
     return success(message="取消关注成功")
 
@@ -494,7 +554,7 @@ async def get_post_comments(
     post_id: int,
     page: int = Query(1, ge=1),
     page_size: int = Query(20, ge=1, le=50),
-    current_user: User = Depends(get_current_user_optional),
+    current_user: Optional[UserPrincipal] = Depends(get_current_principal_optional),
     db: AsyncSession = Depends(get_db)
 ):
     """获取帖子评论列表"""
@@ -523,15 +583,16 @@ async def get_post_comments(
         users_result = await db.execute(select(User).where(User.id.in_(user_ids)))
         users = {u.id: u for u in users_result.scalars().all()}
     
-    # 获取每条评论的回复数
+    # 获取每条评论的回复数（一次分组聚合，走 parent_id 索引）
     comment_ids = [c.id for c in comments]
     reply_counts = {}
     if comment_ids:
-        for cid in comment_ids:
-            count = (await db.execute(
-                select(func.count()).select_from(PostComment).where(PostComment.parent_id == cid)
-            )).scalar()
-            reply_counts[cid] = count
+        reply_result = await db.execute(
+            select(PostComment.parent_id, func.count()).where(
+                PostComment.parent_id.in_(comment_ids)
+            ).group_by(PostComment.parent_id)
+        )
+        reply_counts = {row[0]: row[1] for row in reply_result.fetchall()}
     
     items = []
     for c in comments:
@@ -552,14 +613,9 @@ async def get_post_comments(
     return paginate(items, total, page, page_size)
 
 
-@router.get("/topics")
-async def get_topics(
-    page: int = Query(1, ge=1),
-    page_size: int = Query(20, ge=1, le=50),
-    is_hot: Optional[int] = Query(None, description="是否热门"),
-    db: AsyncSession = Depends(get_db)
-):
-    """获取话题列表"""
+@cache.cached("community:topics:{is_hot}:{page}:{page_size}", ttl=60, tags=[TAG_TOPIC])
+async def _load_topics(db: AsyncSession, is_hot: Optional[int], page: int, page_size: int) -> dict:
+    """话题列表（缓存）"""
     from app.models.community import Topic
     
     conditions = []
@@ -593,24 +649,33 @@ async def get_topics(
             "is_hot": t.is_hot,
         })
     
-    return paginate(items, total, page, page_size)
+    return {"items": items, "total": total}
 
 
-@router.get("/topic/{topic_id}")
-async def get_topic_detail(
-    topic_id: int,
+@router.get("/topics")
+async def get_topics(
+    page: int = Query(1, ge=1),
+    page_size: int = Query(20, ge=1, le=50),
+    is_hot: Optional[int] = Query(None, description="是否热门"),
     db: AsyncSession = Depends(get_db)
 ):
-    """获取话题详情"""
+    """获取话题列表"""
+    data = await _load_topics(db, is_hot, page, page_size)
+    return paginate(data["items"], data["total"], page, page_size)
+
+
+@cache.cached("community:topic:{topic_id}", ttl=60, tags=[TAG_TOPIC])
+async def _load_topic(db: AsyncSession, topic_id: int) -> Optional[dict]:
+    """话题详情（缓存）"""
     from app.models.community import Topic
     
     result = await db.execute(select(Topic).where(Topic.id == topic_id))
     topic = result.scalar_one_or_none()
     
     if not topic:
-        return error(404, "话题不存在")
+        return None
     
-    return success(data={
+    return {
         "id": topic.id,
         "name": topic.name,
         "description": topic.description,
@@ -618,7 +683,21 @@ async def get_topic_detail(
         "post_count": topic.post_count,
         "participant_count": topic.participant_count,
         "is_hot": topic.is_hot,
-    })
+    }
+
+
+@router.get("/topic/{topic_id}")
+async def get_topic_detail(
+    topic_id: int,
+    db: AsyncSession = Depends(get_db)
+):
+    """获取话题详情"""
+    topic = await _load_topic(db, topic_id)
+    
+    if not topic:
+        return error(404, "话题不存在")
+    
+    return success(data=topic)
 
 
 @router.get("/ranking")
@@ -626,9 +705,16 @@ async def get_ranking(
     ranking_type: str = Query("checkin", description="排行类型: checkin/sport/points"),
     page: int = Query(1, ge=1),
     page_size: int = Query(20, ge=1, le=50),
+    current_user: Optional[UserPrincipal] = Depends(get_current_principal_optional),
     db: AsyncSession = Depends(get_db)
 ):
-    """获取排行榜"""
+    """
+    获取排行榜
+    
+    登录用户额外返回 my_rank（运动/积分榜），未上榜时为 null
+    """
+    my_rank = None
+    
     if ranking_type == "checkin":
         # 打卡天数排行
         query = select(User).where(User.status == 1).order_by(
@@ -652,27 +738,10 @@ async def get_ranking(
                 "extra": f"累计{u.total_checkin_days}天",
             })
     
-    elif ranking_type == "sport":
-        # 运动时长排行（本周）
-        from datetime import datetime, timedelta
-        from app.models.sport import SportRecord
-        
-        today = datetime.now()
-        week_start = today - timedelta(days=today.weekday())
-        week_start = week_start.replace(hour=0, minute=0, second=0, microsecond=0)
-        
-        # 统计本周运动时长
-        query = select(
-            SportRecord.user_id,
-            func.sum(SportRecord.duration).label("total_duration")
-        ).where(
-            SportRecord.start_time >= week_start
-        ).group_by(SportRecord.user_id).order_by(
-            desc("total_duration")
-        ).offset((page - 1) * page_size).limit(page_size)
-        
-        result = await db.execute(query)
-        rows = result.fetchall()
+    elif ranking_type in (SPORT_BOARD, POINTS_BOARD):
+        # 运动时长排行（本周）/ 积分排行，读取预计算榜单
+        rows = await leaderboard.top(db, ranking_type, (page - 1) * page_size, page_size)
+        total = await leaderboard.count(db, ranking_type)
         
         # 获取用户信息
         user_ids = [row[0] for row in rows]
@@ -682,45 +751,31 @@ async def get_ranking(
             users = {u.id: u for u in users_result.scalars().all()}
         
         items = []
-        for i, row in enumerate(rows):
-            user = users.get(row[0])
+        for i, (uid, score) in enumerate(rows):
+            user = users.get(uid)
+            value = int(score)
+            if ranking_type == SPORT_BOARD:
+                extra = f"{value}分钟"
+            else:
+                extra = f"运动币{user.sport_coins} 膳食币{user.food_coins}" if user else ""
             items.append({
                 "rank": (page - 1) * page_size + i + 1,
-                "user_id": row[0],
+                "user_id": uid,
                 "nickname": user.nickname if user else "未知用户",
                 "avatar": user.avatar if user else None,
-                "value": row[1],
-                "extra": f"{row[1]}分钟",
+                "value": value,
+                "extra": extra,
             })
         
-        total = len(items)
-    
-    elif ranking_type == "points":
-        # 积分排行
-        query = select(User).where(User.status == 1).order_by(
-            desc(User.sport_coins + User.food_coins)
-        ).offset((page - 1) * page_size).limit(page_size)
-        
-        count_query = select(func.count()).select_from(User).where(User.status == 1)
-        total = (await db.execute(count_query)).scalar()
-        
-        result = await db.execute(query)
-        users = result.scalars().all()
-        
-        items = []
-        for i, u in enumerate(users):
-            total_coins = u.sport_coins + u.food_coins
-            items.append({
-                "rank": (page - 1) * page_size + i + 1,
-                "user_id": u.id,
-                "nickname": u.nickname,
-                "avatar": u.avatar,
-                "value": total_coins,
-                "extra": f"运动币{u.sport_coins} 膳食币{u.food_coins}",
-            })
+        # 当前用户名次
+        if current_user:
+            my = await leaderboard.rank(db, ranking_type, current_user.id)
+            my_rank = {"rank": my[0], "value": int(my[1])} if my else None
     
     else:
         return error(400, "不支持的排行类型")
     
-    return paginate(items, total, page, page_size)
+    result = paginate(items, total, page, page_size)
+    result["data"]["my_rank"] = my_rank
+    return result
 
@@ -10,9 +10,9 @@ from sqlalchemy import select, func, and_
 from datetime import datetime
 
 from app.database import get_db
-from app.models.user import User
 from app.models.coupon import Coupon, UserCoupon
-from app.utils.security import get_current_user
+from app.services.user_cache import UserPrincipal
+from app.utils.security import get_current_principal
 from app.utils.response import success, error, paginate
 
 router = APIRouter(prefix="/coupon", tags=["优惠券"])
@@ -20,7 +20,7 @@ router = APIRouter(prefix="/coupon", tags=["优惠券"])
 
 @router.get("/available")
 async def get_available_coupons(
-    current_user: User = Depends(get_current_user),
+    current_user: UserPrincipal = Depends(get_current_principal),
     db: AsyncSession = Depends(get_db)
 ):
     """获取可领取的优惠券"""
@@ -64,7 +64,7 @@ async def get_available_coupons(
 @router.post("/{coupon_id}/receive")
 async def receive_coupon(
     coupon_id: int,
-    current_user: User = Depends(get_current_user),
+    current_user: UserPrincipal = Depends(get_current_principal),
     db: AsyncSession = Depends(get_db)
 ):
     """领取优惠券"""
@@ -118,7 +118,7 @@ async def get_my_coupons(
     status: str = Query("unused", description="状态: unused/used/expired"),
     page: int = Query(1, ge=1),
     page_size: int = Query(10, ge=1, le=50),
-    current_user: User = Depends(get_current_user),
+    current_user: UserPrincipal = Depends(get_current_principal),
     db: AsyncSession = Depends(get_db)
 ):
     """我的优惠券"""
@@ -12,25 +12,30 @@ from sqlalchemy import select, func, desc, and_
 from typing import Optional
 
 from app.database import get_db
-from app.models.user import User
 from app.models.course import Course, UserCourseCollect
-from app.utils.security import get_current_user, get_current_user_optional
+from app.services.membership import course_collects
+from app.services.cache import cache, TAG_COURSE
+from app.services.user_cache import UserPrincipal
+from app.utils.security import get_current_principal, get_current_principal_optional
 from app.utils.response import success, error, paginate
 
 router = APIRouter(prefix="/course", tags=["课程"])
 
 
-@router.get("/list")
-async def get_course_list(
-    page: int = Query(1, ge=1),
-    page_size: int = Query(10, ge=1, le=50),
-    sport_type: Optional[str] = Query(None, description="运动类型"),
-    difficulty: Optional[str] = Query(None, description="难度"),
-    is_recommend: Optional[int] = Query(None, description="是否推荐"),
-    current_user: User = Depends(get_current_user_optional),
-    db: AsyncSession = Depends(get_db)
-):
-    """获取课程列表"""
+@cache.cached(
+    "course:list:{sport_type}:{difficulty}:{is_recommend}:{page}:{page_size}",
+    ttl=60,
+    tags=[TAG_COURSE],
+)
+async def _load_course_page(
+    db: AsyncSession,
+    sport_type: Optional[str],
+    difficulty: Optional[str],
+    is_recommend: Optional[int],
+    page: int,
+    page_size: int,
+) -> dict:
+    """课程列表（与用户无关的部分，缓存）"""
     # 构建查询条件
     conditions = [Course.status == 1]
     if sport_type:
@@ -54,16 +59,6 @@ async def get_course_list(
     result = await db.execute(query)
     courses = result.scalars().all()
     
-    # 获取用户收藏状态
-    collected_ids = set()
-    if current_user:
-        collect_result = await db.execute(
-            select(UserCourseCollect.course_id).where(
-                UserCourseCollect.user_id == current_user.id
-            )
-        )
-        collected_ids = {row[0] for row in collect_result.fetchall()}
-    
     items = []
     for c in courses:
         items.append({
@@ -79,16 +74,38 @@ async def get_course_list(
             "play_count": c.play_count,
             "collect_count": c.collect_count,
             "is_free": c.is_free,
-            "is_collected": c.id in collected_ids,
         })
     
-    return paginate(items, total, page, page_size)
+    return {"items": items, "total": total}
+
+
+@router.get("/list")
+async def get_course_list(
+    page: int = Query(1, ge=1),
+    page_size: int = Query(10, ge=1, le=50),
+    sport_type: Optional[str] = Query(None, description="运动类型"),
+    difficulty: Optional[str] = Query(None, description="难度"),
+    is_recommend: Optional[int] = Query(None, description="是否推荐"),
+    current_user: Optional[UserPrincipal] = Depends(get_current_principal_optional),
+    db: AsyncSession = Depends(get_db)
+):
+    """获取课程列表"""
+    data = await _load_course_page(db, sport_type, difficulty, is_recommend, page, page_size)
+    
+    # 获取用户对本页课程的收藏状态
+    collected_ids = set()
+    if current_user:
+        collected_ids = await course_collects.check(db, current_user.id, [c["id"] for c in data["items"]])
+    
+    items = [{**c, "is_collected": c["id"] in collected_ids} for c in data["items"]]
+    
+    return paginate(items, data["total"], page, page_size)
 
 
 @router.get("/{course_id}")
 async def get_course_detail(
     course_id: int,
-    current_user: User = Depends(get_current_user_optional),
+    current_user: Optional[UserPrincipal] = Depends(get_current_principal_optional),
     db: AsyncSession = Depends(get_db)
 ):
     """获取课程详情"""
@@ -107,13 +124,7 @@ async def get_course_detail(
     # 检查是否已收藏
     is_collected = False
     if current_user:
-        collect_result = await db.execute(
-            select(UserCourseCollect).where(
-                UserCourseCollect.user_id == current_user.id,
-                UserCourseCollect.course_id == course_id
-            )
-        )
-        is_collected = collect_result.scalar_one_or_none() is not None
+        is_collected = await course_collects.contains(db, current_user.id, course_id)
     
     data = {
         "id": course.id,
@@ -141,7 +152,7 @@ async def get_course_detail(
 @router.post("/{course_id}/collect")
 async def collect_course(
     course_id: int,
-    current_user: User = Depends(get_current_user),
+    current_user: UserPrincipal = Depends(get_current_principal),
     db: AsyncSession = Depends(get_db)
 ):
     """收藏课程"""
@@ -155,15 +166,7 @@ async def collect_course(
         return error(404, "课程不存在")
     
     # 检查是否已收藏
-    collect_result = await db.execute(
-        select(UserCourseCollect).where(
-            UserCourseCollect.user_id == current_user.id,
-            UserCourseCollect.course_id == course_id
-        )
-    )
-    existing = collect_result.scalar_one_or_none()
-    
-    if existing:
+    if await course_collects.contains(db, current_user.id, course_id):
         return error(400, "已收藏该课程")
     
     # 创建收藏记录
@@ -184,7 +187,7 @@ async def collect_course(
 @router.delete("/{course_id}/collect")
 async def uncollect_course(
     course_id: int,
-    current_user: User = Depends(get_current_user),
+    current_user: UserPrincipal = Depends(get_current_principal),
     db: AsyncSession = Depends(get_db)
 ):
     """取消收藏"""
@@ -218,7 +221,7 @@ async def uncollect_course(
 async def get_my_collects(
     page: int = Query(1, ge=1),
     page_size: int = Query(10, ge=1, le=50),
-    current_user: User = Depends(get_current_user),
+    current_user: UserPrincipal = Depends(get_current_principal),
     db: AsyncSession = Depends(get_db)
 ):
     """我的收藏"""
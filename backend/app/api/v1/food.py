@@ -16,7 +16,10 @@ from app.database import get_db
 from app.models.user import User
 from app.models.food import FoodRecord
 from app.models.points import CoinRecord
-from app.utils.security import get_current_user
+from app.services.leaderboard import leaderboard
+from app.services.user_cache import UserPrincipal, user_cache
+from app.services import rollup_service
+from app.utils.security import get_current_user, get_current_principal
 from app.utils.response import success, error, paginate
 
 router = APIRouter(prefix="/food", tags=["饮食"])
@@ -80,8 +83,21 @@ async def create_food_record(
     )
     db.add(coin_record)
     
+    # 更新统计汇总
+    await rollup_service.incr_daily(db, date.today(), food_count=1)
+    await rollup_service.incr_user_daily(
+        db, current_user.id, data.record_date,
+        food_count=1,
+        food_calories=record.calories,
+        protein=record.protein,
+        carbs=record.carbs,
+        fat=record.fat,
+    )
+    
     await db.commit()
     await db.refresh(record)
+    await leaderboard.sync_points(current_user)
+    await user_cache.invalidate(current_user.id)
     
     return success(
         data={
@@ -98,7 +114,7 @@ async def get_food_records(
     page_size: int = Query(10, ge=1, le=50),
     record_date: Optional[date] = Query(None, description="日期筛选"),
     meal_type: Optional[str] = Query(None, description="餐次筛选"),
-    current_user: User = Depends(get_current_user),
+    current_user: UserPrincipal = Depends(get_current_principal),
     db: AsyncSession = Depends(get_db)
 ):
     """获取饮食记录列表"""
@@ -179,6 +195,8 @@ async def food_checkin(
     db.add(coin_record)
     
     await db.commit()
+    await leaderboard.sync_points(current_user)
+    await user_cache.invalidate(current_user.id)
     
     return success(
         data={
@@ -9,8 +9,11 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, func, distinct
 from typing import Optional
 
+from app.config import settings
 from app.database import get_db
 from app.models.food import FoodLibrary
+from app.services.cache import cache, TAG_FOOD_LIBRARY
+from app.services.food_search import food_search, food_to_dict, BACKEND_FULLTEXT
 from app.utils.response import success, error, paginate
 
 router = APIRouter(prefix="/food-library", tags=["食物库"])
@@ -18,17 +21,32 @@ router = APIRouter(prefix="/food-library", tags=["食物库"])
 
 @router.get("/search")
 async def search_food(
-    keyword: Optional[str] = Query(None, description="搜索关键词"),
+    keyword: Optional[str] = Query(None, description="搜索关键词（支持拼音、首字母）"),
     category: Optional[str] = Query(None, description="分类筛选"),
     page: int = Query(1, ge=1),
     page_size: int = Query(20, ge=1, le=50),
     db: AsyncSession = Depends(get_db)
 ):
     """搜索食物库"""
+    offset = (page - 1) * page_size
+    
+    # 关键词搜索走进程内索引（加载完成前回退到数据库查询）
+    if keyword and food_search.enabled and food_search.index.ready:
+        where = (lambda f: f["category"] == category) if category else None
+        items, total = food_search.index.search(keyword, offset=offset, limit=page_size, where=where)
+        return paginate(items, total, page, page_size)
+    
     conditions = []
+    order_by = [FoodLibrary.name]
     
     if keyword:
-        conditions.append(FoodLibrary.name.contains(keyword))
+        if settings.FOOD_SEARCH_BACKEND == BACKEND_FULLTEXT:
+            # ngram 全文索引，按短语匹配并按相关度排序
+            match = FoodLibrary.name.match('"' + keyword.replace('"', " ") + '"')
+            conditions.append(match)
+            order_by.insert(0, match.desc())
+        else:
+            conditions.append(FoodLibrary.name.contains(keyword))
     
     if category:
         conditions.append(FoodLibrary.category == category)
@@ -43,38 +61,26 @@ async def search_food(
     query = select(FoodLibrary)
     if conditions:
         query = query.where(*conditions)
-    query = query.order_by(FoodLibrary.name).offset((page - 1) * page_size).limit(page_size)
+    query = query.order_by(*order_by).offset(offset).limit(page_size)
     
     result = await db.execute(query)
-    foods = result.scalars().all()
-    
-    items = []
-    for f in foods:
-        items.append({
-            "id": f.id,
-            "name": f.name,
-            "category": f.category,
-            "image": f.image,
-            "calories": f.calories,
-            "protein": float(f.protein),
-            "carbs": float(f.carbs),
-            "fat": float(f.fat),
-            "fiber": float(f.fiber),
-            "serving_size": f.serving_size,
-        })
+    items = [food_to_dict(f) for f in result.scalars().all()]
     
     return paginate(items, total, page, page_size)
 
 
-@router.get("/categories")
-async def get_categories(db: AsyncSession = Depends(get_db)):
-    """获取食物分类列表"""
+@cache.cached("food_library:categories", ttl=3600, tags=[TAG_FOOD_LIBRARY])
+async def _load_categories(db: AsyncSession) -> list:
     result = await db.execute(
         select(distinct(FoodLibrary.category)).where(FoodLibrary.category.isnot(None))
     )
-    categories = [row[0] for row in result.all() if row[0]]
-    
-    return success(data=categories)
+    return [row[0] for row in result.all() if row[0]]
+
+
+@router.get("/categories")
+async def get_categories(db: AsyncSession = Depends(get_db)):
+    """获取食物分类列表"""
+    return success(data=await _load_categories(db))
 
 
 @router.get("/{food_id}")
@@ -91,18 +97,7 @@ async def get_food_detail(
     if not food:
         return error(404, "食物不存在")
     
-    return success(data={
-        "id": food.id,
-        "name": food.name,
-        "category": food.category,
-        "image": food.image,
-        "calories": food.calories,
-        "protein": float(food.protein),
-        "carbs": float(food.carbs),
-        "fat": float(food.fat),
-        "fiber": float(food.fiber),
-        "serving_size": food.serving_size,
-    })
+    return success(data=food_to_dict(food))
 
 
 
@@ -9,11 +9,13 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, func, desc
 from typing import Optional
 from decimal import Decimal
+from datetime import date
 
 from app.database import get_db
-from app.models.user import User
 from app.models.health import HealthScreening
-from app.utils.security import get_current_user
+from app.services import rollup_service
+from app.services.user_cache import UserPrincipal
+from app.utils.security import get_current_principal
 from app.utils.response import success, error, paginate
 from app.utils.helpers import calculate_bmi
 from pydantic import BaseModel, Field
@@ -61,7 +63,7 @@ class ScreeningResponse(BaseModel):
 @router.post("/screening")
 async def create_screening(
     data: ScreeningCreate,
-    current_user: User = Depends(get_current_user),
+    current_user: UserPrincipal = Depends(get_current_principal),
     db: AsyncSession = Depends(get_db)
 ):
     """
@@ -130,6 +132,7 @@ async def create_screening(
     )
     
     db.add(screening)
+    await rollup_service.incr_daily(db, date.today(), screening_count=1)
     await db.commit()
     await db.refresh(screening)
     
@@ -143,7 +146,7 @@ async def create_screening(
 async def get_records(
     page: int = Query(1, ge=1),
     page_size: int = Query(10, ge=1, le=50),
-    current_user: User = Depends(get_current_user),
+    current_user: UserPrincipal = Depends(get_current_principal),
     db: AsyncSession = Depends(get_db)
 ):
     """获取筛查记录列表"""
@@ -178,7 +181,7 @@ async def get_records(
 @router.get("/report/{screening_id}")
 async def get_report(
     screening_id: int,
-    current_user: User = Depends(get_current_user),
+    current_user: UserPrincipal = Depends(get_current_principal),
     db: AsyncSession = Depends(get_db)
 ):
     """获取报告详情"""
@@ -15,7 +15,8 @@ from pydantic import BaseModel, Field
 from app.database import get_db
 from app.models.user import User
 from app.models.member import MemberOrder
-from app.utils.security import get_current_user
+from app.services.user_cache import UserPrincipal, user_cache
+from app.utils.security import get_current_user, get_current_principal
 from app.utils.response import success, error, paginate
 from app.utils.helpers import generate_order_no
 
@@ -148,6 +149,7 @@ async def purchase_member(
     current_user.member_expire_time = end_time
     
     await db.commit()
+    await user_cache.invalidate(current_user.id)
     
     return success(
         data={
@@ -163,7 +165,7 @@ async def purchase_member(
 async def get_member_orders(
     page: int = Query(1, ge=1),
     page_size: int = Query(10, ge=1, le=50),
-    current_user: User = Depends(get_current_user),
+    current_user: UserPrincipal = Depends(get_current_principal),
     db: AsyncSession = Depends(get_db)
 ):
     """会员购买记录"""
@@ -14,7 +14,8 @@ from pydantic import BaseModel, Field
 from app.database import get_db
 from app.models.user import User
 from app.models.message import Conversation, Message
-from app.utils.security import get_current_user
+from app.services.user_cache import UserPrincipal
+from app.utils.security import get_current_principal
 from app.utils.response import success, error, paginate
 
 router = APIRouter(prefix="/message", tags=["私聊"])
@@ -31,7 +32,7 @@ class MessageSend(BaseModel):
 async def get_conversations(
     page: int = Query(1, ge=1),
     page_size: int = Query(20, ge=1, le=50),
-    current_user: User = Depends(get_current_user),
+    current_user: UserPrincipal = Depends(get_current_principal),
     db: AsyncSession = Depends(get_db)
 ):
     """获取会话列表"""
@@ -102,7 +103,7 @@ async def get_chat_history(
     user_id: int,
     page: int = Query(1, ge=1),
     page_size: int = Query(20, ge=1, le=50),
-    current_user: User = Depends(get_current_user),
+    current_user: UserPrincipal = Depends(get_current_principal),
     db: AsyncSession = Depends(get_db)
 ):
     """获取与某用户的聊天记录"""
@@ -157,7 +158,7 @@ async def get_chat_history(
 @router.post("/send")
 async def send_message(
     data: MessageSend,
-    current_user: User = Depends(get_current_user),
+    current_user: UserPrincipal = Depends(get_current_principal),
     db: AsyncSession = Depends(get_db)
 ):
     """发送消息"""
@@ -221,7 +222,7 @@ async def send_message(
 @router.post("/read/{conversation_id}")
 async def mark_read(
     conversation_id: int,
-    current_user: User = Depends(get_current_user),
+    current_user: UserPrincipal = Depends(get_current_principal),
     db: AsyncSession = Depends(get_db)
 ):
     """标记会话已读"""
@@ -13,9 +13,9 @@ from typing import Optional, List
 from pydantic import BaseModel, Field
 
 from app.database import get_db
-from app.models.user import User
 from app.models.system import Notification
-from app.utils.security import get_current_user
+from app.services.user_cache import UserPrincipal
+from app.utils.security import get_current_principal
 from app.utils.response import success, error, paginate
 
 router = APIRouter(prefix="/notification", tags=["通知"])
@@ -32,7 +32,7 @@ async def get_notifications(
     page_size: int = Query(20, ge=1, le=50),
     type: Optional[str] = Query(None, description="通知类型"),
     is_read: Optional[int] = Query(None, description="是否已读"),
-    current_user: User = Depends(get_current_user),
+    current_user: UserPrincipal = Depends(get_current_principal),
     db: AsyncSession = Depends(get_db)
 ):
     """获取通知列表"""
@@ -75,7 +75,7 @@ async def get_notifications(
 @router.post("/read")
 async def mark_read(
     data: ReadRequest,
-    current_user: User = Depends(get_current_user),
+    current_user: UserPrincipal = Depends(get_current_principal),
     db: AsyncSession = Depends(get_db)
 ):
     """标记已读"""
@@ -92,7 +92,7 @@ async def mark_read(
 
 @router.post("/read-all")
 async def mark_all_read(
-    current_user: User = Depends(get_current_user),
+    current_user: UserPrincipal = Depends(get_current_principal),
     db: AsyncSession = Depends(get_db)
 ):
     """全部标记已读"""
@@ -109,7 +109,7 @@ async def mark_all_read(
 
 @router.get("/unread-count")
 async def get_unread_count(
-    current_user: User = Depends(get_current_user),
+    current_user: UserPrincipal = Depends(get_current_principal),
     db: AsyncSession = Depends(get_db)
 ):
     """获取未读数量"""
@@ -126,7 +126,7 @@ async def get_unread_count(
 @router.delete("/{notification_id}")
 async def delete_notification(
     notification_id: int,
-    current_user: User = Depends(get_current_user),
+    current_user: UserPrincipal = Depends(get_current_principal),
     db: AsyncSession = Depends(get_db)
 ):
     """删除通知"""
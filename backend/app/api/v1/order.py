@@ -10,19 +10,21 @@ POST /order/{id}/review - 提交评价
 """
 from fastapi import APIRouter, Depends, Query
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func, desc
+from sqlalchemy import select, func, desc, insert, update, delete
 from typing import Optional, List
-from datetime import datetime
+from datetime import datetime, date
 from decimal import Decimal
 from pydantic import BaseModel, Field
 
 from app.database import get_db
-from app.models.user import User
 from app.models.cart import Cart
 from app.models.shop import Product, ProductReview
 from app.models.order import Order, OrderItem
 from app.models.coupon import UserCoupon, Coupon
-from app.utils.security import get_current_user
+from app.services.order_service import with_items, serialize_item
+from app.services import rollup_service
+from app.services.user_cache import UserPrincipal
+from app.utils.security import get_current_principal
 from app.utils.response import success, error, paginate
 from app.utils.helpers import generate_order_no
 
@@ -52,10 +54,18 @@ class ReviewCreate(BaseModel):
     is_anonymous: int = Field(0, ge=0, le=1, description="是否匿名")
 
 
+def _sum_quantities(items) -> dict:
+    """按商品汇总数量"""
+    quantities = {}
+    for item in items:
+        quantities[item.product_id] = quantities.get(item.product_id, 0) + item.quantity
+    return quantities
+
+
 @router.post("")
 async def create_order(
     data: OrderCreate,
-    current_user: User = Depends(get_current_user),
+    current_user: UserPrincipal = Depends(get_current_principal),
     db: AsyncSession = Depends(get_db)
 ):
     """创建订单"""
@@ -75,21 +85,32 @@ async def create_order(
     # 检查是否会员
     is_member = current_user.member_level > 0
     
-    # 获取商品信息并计算金额
-    total_amount = Decimal("0")
-    order_items = []
+    # 一次查询加载并锁定全部商品，按 ID 顺序加锁避免并发下单互相死锁
+    product_ids = sorted({item.product_id for item in data.items})
+    product_result = await db.execute(
+        select(Product).where(
+            Product.id.in_(product_ids), Product.is_on_sale == 1
+        ).order_by(Product.id).with_for_update()
+    )
+    products = {p.id: p for p in product_result.scalars().all()}
     
+    # 校验商品和库存（同一商品多行时合并数量）
     for item in data.items:
-        product_result = await db.execute(
-            select(Product).where(Product.id == item.product_id, Product.is_on_sale == 1)
-        )
-        product = product_result.scalar_one_or_none()
-        
-        if not product:
+        if item.product_id not in products:
             return error(400, f"商品ID {item.product_id} 不存在或已下架")
-        
-        if product.stock < item.quantity:
+    
+    quantities = _sum_quantities(data.items)
+    for product_id, quantity in quantities.items():
+        product = products[product_id]
+        if product.stock < quantity:
             return error(400, f"商品 {product.name} 库存不足")
+    
+    # 计算金额
+    total_amount = Decimal("0")
+    order_items = []
+    
+    for item in data.items:
+        product = products[item.product_id]
         
         # 计算价格
         price = product.member_price if is_member and product.member_price else product.current_price
@@ -111,7 +132,7 @@ async def create_order(
                 UserCoupon.id == data.coupon_id,
                 UserCoupon.user_id == current_user.id,
                 UserCoupon.status == "unused"
-            )
+            ).with_for_update()
         )
         row = coupon_result.fetchone()
         
@@ -148,22 +169,28 @@ async def create_order(
     db.add(order)
     await db.flush()  # 获取订单ID
     
-    # 创建订单明细
-    for item_data in order_items:
-        product = item_data["product"]
-        order_item = OrderItem(
-            order_id=order.id,
-            product_id=product.id,
-            product_name=product.name,
-            product_image=product.images[0] if product.images else None,
-            spec_name=None,  # 可扩展规格名称
-            price=item_data["price"],
-            quantity=item_data["quantity"],
+    # 批量创建订单明细
+    await db.execute(insert(OrderItem), [{
+        "order_id": order.id,
+        "product_id": item_data["product"].id,
+        "product_name": item_data["product"].name,
+        "product_image": item_data["product"].images[0] if item_data["product"].images else None,
+        "spec_name": None,  # 可扩展规格名称
+        "price": item_data["price"],
+        "quantity": item_data["quantity"],
+    } for item_data in order_items])
+    
+    # 扣减库存：条件更新，库存不足时不扣减（不依赖行锁也不会超卖）
+    for product_id, quantity in quantities.items():
+        stock_result = await db.execute(
+            update(Product).where(
+                Product.id == product_id, Product.stock >= quantity
+            ).values(stock=Product.stock - quantity)
         )
-        db.add(order_item)
-        
-        # 扣减库存
-        product.stock -= item_data["quantity"]
+        if stock_result.rowcount != 1:
+            name = products[product_id].name
+            await db.rollback()
+            return error(400, f"商品 {name} 库存不足")
     
     # 更新优惠券状态
     if data.coupon_id and discount_amount > 0:
@@ -171,16 +198,15 @@ async def create_order(
         user_coupon.used_time = datetime.now()
         user_coupon.order_id = order.id
     
+    await rollup_service.incr_daily(db, date.today(), order_count=1)
+    
     # 清除购物车中的已下单商品
-    product_ids = [item.product_id for item in data.items]
-    cart_result = await db.execute(
-        select(Cart).where(
+    await db.execute(
+        delete(Cart).where(
             Cart.user_id == current_user.id,
             Cart.product_id.in_(product_ids)
         )
     )
-    for cart in cart_result.scalars().all():
-        await db.delete(cart)
     
     await db.commit()
     await db.refresh(order)
@@ -200,7 +226,7 @@ async def get_order_list(
     page: int = Query(1, ge=1),
     page_size: int = Query(10, ge=1, le=50),
     status: Optional[str] = Query(None, description="订单状态"),
-    current_user: User = Depends(get_current_user),
+    current_user: UserPrincipal = Depends(get_current_principal),
     db: AsyncSession = Depends(get_db)
 ):
     """获取订单列表"""
@@ -212,8 +238,8 @@ async def get_order_list(
     count_query = select(func.count()).select_from(Order).where(*conditions)
     total = (await db.execute(count_query)).scalar()
     
-    # 查询订单
-    query = select(Order).where(*conditions).order_by(
+    # 查询订单（订单商品批量加载）
+    query = with_items(select(Order).where(*conditions)).order_by(
         desc(Order.created_at)
     ).offset((page - 1) * page_size).limit(page_size)
     
@@ -222,25 +248,13 @@ async def get_order_list(
     
     items = []
     for o in orders:
-        # 获取订单商品
-        items_result = await db.execute(
-            select(OrderItem).where(OrderItem.order_id == o.id)
-        )
-        order_items = items_result.scalars().all()
-        
         items.append({
             "id": o.id,
             "order_no": o.order_no,
             "status": o.status,
             "total_amount": float(o.total_amount),
             "pay_amount": float(o.pay_amount),
-            "items": [{
-                "product_id": i.product_id,
-                "product_name": i.product_name,
-                "product_image": i.product_image,
-                "price": float(i.price),
-                "quantity": i.quantity,
-            } for i in order_items],
+            "items": [serialize_item(i) for i in o.items],
             "created_at": o.created_at.strftime("%Y-%m-%d %H:%M:%S"),
         })
     
@@ -250,24 +264,18 @@ async def get_order_list(
 @router.get("/{order_id}")
 async def get_order_detail(
     order_id: int,
-    current_user: User = Depends(get_current_user),
+    current_user: UserPrincipal = Depends(get_current_principal),
     db: AsyncSession = Depends(get_db)
 ):
     """获取订单详情"""
     result = await db.execute(
-        select(Order).where(Order.id == order_id, Order.user_id == current_user.id)
+        with_items(select(Order).where(Order.id == order_id, Order.user_id == current_user.id))
     )
     order = result.scalar_one_or_none()
     
     if not order:
         return error(404, "订单不存在")
     
-    # 获取订单商品
-    items_result = await db.execute(
-        select(OrderItem).where(OrderItem.order_id == order.id)
-    )
-    order_items = items_result.scalars().all()
-    
     data = {
         "id": order.id,
         "order_no": order.order_no,
@@ -288,15 +296,7 @@ async def get_order_detail(
         "ship_time": order.ship_time.strftime("%Y-%m-%d %H:%M:%S") if order.ship_time else None,
         "receive_time": order.receive_time.strftime("%Y-%m-%d %H:%M:%S") if order.receive_time else None,
         "created_at": order.created_at.strftime("%Y-%m-%d %H:%M:%S"),
-        "items": [{
-            "id": i.id,
-            "product_id": i.product_id,
-            "product_name": i.product_name,
-            "product_image": i.product_image,
-            "spec_name": i.spec_name,
-            "price": float(i.price),
-            "quantity": i.quantity,
-        } for i in order_items],
+        "items": [serialize_item(i) for i in order.items],
     }
     
     return success(data=data)
@@ -306,7 +306,7 @@ async def get_order_detail(
 async def pay_order(
     order_id: int,
     pay_type: str = Query("wechat", description="支付方式"),
-    current_user: User = Depends(get_current_user),
+    current_user: UserPrincipal = Depends(get_current_principal),
     db: AsyncSession = Depends(get_db)
 ):
     """
@@ -317,7 +317,9 @@ async def pay_order(
     当前: 直接返回模拟支付成功
     """
     result = await db.execute(
-        select(Order).where(Order.id == order_id, Order.user_id == current_user.id)
+        with_items(select(Order).where(
+            Order.id == order_id, Order.user_id == current_user.id
+        )).with_for_update()
     )
     order = result.scalar_one_or_none()
     
@@ -333,14 +335,15 @@ async def pay_order(
     order.pay_time = datetime.now()
     
     # 更新商品销量
-    items_result = await db.execute(
-        select(OrderItem).where(OrderItem.order_id == order.id)
-    )
-    for item in items_result.scalars().all():
-        product_result = await db.execute(select(Product).where(Product.id == item.product_id))
-        product = product_result.scalar_one_or_none()
-        if product:
-            product.sales_count += item.quantity
+    for product_id, quantity in _sum_quantities(order.items).items():
+        await db.execute(
+            update(Product).where(Product.id == product_id).values(
+                sales_count=Product.sales_count + quantity
+            )
+        )
+    
+    # 成交金额计入下单日期
+    await rollup_service.incr_daily(db, order.created_at.date(), order_amount=order.pay_amount)
     
     await db.commit()
     
@@ -357,12 +360,15 @@ async def pay_order(
 @router.post("/{order_id}/cancel")
 async def cancel_order(
     order_id: int,
-    current_user: User = Depends(get_current_user),
+    current_user: UserPrincipal = Depends(get_current_principal),
     db: AsyncSession = Depends(get_db)
 ):
     """取消订单"""
+    # 锁定订单，避免重复取消导致库存多次恢复
     result = await db.execute(
-        select(Order).where(Order.id == order_id, Order.user_id == current_user.id)
+        with_items(select(Order).where(
+            Order.id == order_id, Order.user_id == current_user.id
+        )).with_for_update()
     )
     order = result.scalar_one_or_none()
     
@@ -373,14 +379,12 @@ async def cancel_order(
         return error(400, "订单状态不允许取消")
     
     # 恢复库存
-    items_result = await db.execute(
-        select(OrderItem).where(OrderItem.order_id == order.id)
-    )
-    for item in items_result.scalars().all():
-        product_result = await db.execute(select(Product).where(Product.id == item.product_id))
-        product = product_result.scalar_one_or_none()
-        if product:
-            product.stock += item.quantity
+    for product_id, quantity in _sum_quantities(order.items).items():
+        await db.execute(
+            update(Product).where(Product.id == product_id).values(
+                stock=Product.stock + quantity
+            )
+        )
     
     # 恢复优惠券
     if order.coupon_id:
@@ -402,7 +406,7 @@ async def cancel_order(
 @router.post("/{order_id}/confirm")
 async def confirm_order(
     order_id: int,
-    current_user: User = Depends(get_current_user),
+    current_user: UserPrincipal = Depends(get_current_principal),
     db: AsyncSession = Depends(get_db)
 ):
     """确认收货"""
@@ -428,7 +432,7 @@ async def confirm_order(
 async def review_order(
     order_id: int,
     data: ReviewCreate,
-    current_user: User = Depends(get_current_user),
+    current_user: UserPrincipal = Depends(get_current_principal),
     db: AsyncSession = Depends(get_db)
 ):
     """提交评价"""
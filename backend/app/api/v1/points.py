@@ -15,7 +15,9 @@ from app.database import get_db
 from app.models.user import User
 from app.models.points import CoinRecord
 from app.models.shop import Product
-from app.utils.security import get_current_user
+from app.services.leaderboard import leaderboard
+from app.services.user_cache import UserPrincipal, user_cache
+from app.utils.security import get_current_user, get_current_principal
 from app.utils.response import success, error, paginate
 
 router = APIRouter(prefix="/points", tags=["积分"])
@@ -28,7 +30,7 @@ class ExchangeRequest(BaseModel):
 
 
 @router.get("/balance")
-async def get_balance(current_user: User = Depends(get_current_user)):
+async def get_balance(current_user: UserPrincipal = Depends(get_current_principal)):
     """获取积分余额"""
     return success(data={
         "sport_coins": current_user.sport_coins,
@@ -43,7 +45,7 @@ async def get_records(
     page: int = Query(1, ge=1),
     page_size: int = Query(20, ge=1, le=50),
     coin_type: Optional[str] = Query(None, description="积分类型: sport/food"),
-    current_user: User = Depends(get_current_user),
+    current_user: UserPrincipal = Depends(get_current_principal),
     db: AsyncSession = Depends(get_db)
 ):
     """获取积分记录"""
@@ -181,6 +183,8 @@ async def exchange_gift(
     product.stock -= data.quantity
     
     await db.commit()
+    await leaderboard.sync_points(current_user)
+    await user_cache.invalidate(current_user.id)
     
     return success(
         data={
@@ -13,9 +13,9 @@ from typing import Optional, List
 from pydantic import BaseModel, Field
 
 from app.database import get_db
-from app.models.user import User
 from app.models.health import HealthReminder
-from app.utils.security import get_current_user
+from app.services.user_cache import UserPrincipal
+from app.utils.security import get_current_principal
 from app.utils.response import success, error
 
 router = APIRouter(prefix="/reminder", tags=["提醒"])
@@ -41,7 +41,7 @@ class ReminderUpdate(BaseModel):
 
 @router.get("/list")
 async def get_reminders(
-    current_user: User = Depends(get_current_user),
+    current_user: UserPrincipal = Depends(get_current_principal),
     db: AsyncSession = Depends(get_db)
 ):
     """获取提醒设置列表"""
@@ -69,7 +69,7 @@ async def get_reminders(
 @router.post("")
 async def create_reminder(
     data: ReminderCreate,
-    current_user: User = Depends(get_current_user),
+    current_user: UserPrincipal = Depends(get_current_principal),
     db: AsyncSession = Depends(get_db)
 ):
     """添加提醒"""
@@ -99,7 +99,7 @@ async def create_reminder(
 async def update_reminder(
     reminder_id: int,
     data: ReminderUpdate,
-    current_user: User = Depends(get_current_user),
+    current_user: UserPrincipal = Depends(get_current_principal),
     db: AsyncSession = Depends(get_db)
 ):
     """修改提醒"""
@@ -135,7 +135,7 @@ async def update_reminder(
 @router.delete("/{reminder_id}")
 async def delete_reminder(
     reminder_id: int,
-    current_user: User = Depends(get_current_user),
+    current_user: UserPrincipal = Depends(get_current_principal),
     db: AsyncSession = Depends(get_db)
 ):
     """删除提醒"""
@@ -7,31 +7,28 @@ POST /settings/delete-account - 注销账号
 POST /feedback - 提交反馈
 GET /feedback/list - 获取反馈列表
 """
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Query
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, update
-from datetime import datetime
-import random
 
 from app.database import get_db
 from app.models.user import User, UserSettings, UserFeedback
+from app.services.user_cache import UserPrincipal, user_cache
+from app.services.verify_code import bind_phone_codes
 from app.schemas.user import (
     UserSettingsSchema, UserSettingsUpdate,
     UserFeedbackCreate, UserFeedbackSchema,
     BindPhoneRequest
 )
-from app.utils.security import get_current_user
+from app.utils.security import get_current_user, get_current_principal, revoke_subject_tokens
 from app.utils.response import success, error
 
 router = APIRouter(prefix="/settings", tags=["用户设置"])
 
-# 模拟验证码存储 (生产环境应使用Redis)
-verification_codes = {}
-
 
 @router.get("")
 async def get_settings(
-    current_user: User = Depends(get_current_user),
+    current_user: UserPrincipal = Depends(get_current_principal),
     db: AsyncSession = Depends(get_db)
 ):
     """获取用户设置"""
@@ -53,7 +50,7 @@ async def get_settings(
 @router.put("")
 async def update_settings(
     data: UserSettingsUpdate,
-    current_user: User = Depends(get_current_user),
+    current_user: UserPrincipal = Depends(get_current_principal),
     db: AsyncSession = Depends(get_db)
 ):
     """更新用户设置"""
@@ -81,8 +78,8 @@ async def update_settings(
 
 @router.post("/send-code")
 async def send_verification_code(
-    phone: str,
-    current_user: User = Depends(get_current_user),
+    phone: str = Query(..., pattern=r"^1[3-9]\d{9}$", description="手机号"),
+    current_user: UserPrincipal = Depends(get_current_principal),
     db: AsyncSession = Depends(get_db)
 ):
     """发送验证码"""
@@ -94,13 +91,13 @@ async def send_verification_code(
     if existing_user:
         return error(400, "该手机号已被其他账号绑定")
     
+    # 发送频率限制
+    retry_after = await bind_phone_codes.check_send(phone, current_user.id)
+    if retry_after:
+        return error(429, f"验证码发送过于频繁，请 {retry_after} 秒后再试")
+    
     # 生成验证码 (生产环境应调用短信服务)
-    code = str(random.randint(100000, 999999))
-    verification_codes[phone] = {
-        "code": code,
-        "user_id": current_user.id,
-        "expires": datetime.now().timestamp() + 300  # 5分钟有效
-    }
+    code = await bind_phone_codes.issue(phone, current_user.id)
     
     # 开发环境直接返回验证码
     return success(
@@ -117,19 +114,9 @@ async def bind_phone(
 ):
     """绑定手机号"""
     # 验证验证码
-    stored = verification_codes.get(data.phone)
-    if not stored:
-        return error(400, "请先获取验证码")
-    
-    if stored["user_id"] != current_user.id:
-        return error(400, "验证码无效")
-    
-    if datetime.now().timestamp() > stored["expires"]:
-        del verification_codes[data.phone]
-        return error(400, "验证码已过期")
-    
-    if stored["code"] != data.code:
-        return error(400, "验证码错误")
+    message = await bind_phone_codes.verify(data.phone, current_user.id, data.code)
+    if message:
+        return error(400, message)
     
     # 检查手机号是否已被绑定
     result = await db.execute(
@@ -144,7 +131,7 @@ async def bind_phone(
     await db.commit()
     
     # 清除验证码
-    del verification_codes[data.phone]
+    await bind_phone_codes.consume(data.phone)
     
     return success(message="手机号绑定成功")
 
@@ -177,6 +164,9 @@ async def delete_account(
     current_user.phone = None
     
     await db.commit()
+    await user_cache.invalidate(current_user.id)
+    # 所有设备上的 Token 立即失效
+    await revoke_subject_tokens("user", current_user.id)
     
     return success(message="账号已注销")
 
@@ -188,7 +178,7 @@ feedback_router = APIRouter(prefix="/feedback", tags=["用户反馈"])
 @feedback_router.post("")
 async def create_feedback(
     data: UserFeedbackCreate,
-    current_user: User = Depends(get_current_user),
+    current_user: UserPrincipal = Depends(get_current_principal),
     db: AsyncSession = Depends(get_db)
 ):
     """提交反馈"""
@@ -212,7 +202,7 @@ async def create_feedback(
 async def get_feedback_list(
     page: int = 1,
     page_size: int = 10,
-    current_user: User = Depends(get_current_user),
+    current_user: UserPrincipal = Depends(get_current_principal),
     db: AsyncSession = Depends(get_db)
 ):
     """获取我的反馈列表"""
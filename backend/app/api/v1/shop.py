@@ -5,15 +5,20 @@ GET /shop/product/{id} - 商品详情
 GET /shop/categories - 商品分类
 GET /shop/product/{id}/reviews - 商品评价列表
 """
+import json
 from fastapi import APIRouter, Depends, Query
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func, desc
+from sqlalchemy import select, func, desc, or_
 from typing import Optional
 
 from app.database import get_db
 from app.models.user import User
 from app.models.shop import Product, ProductCategory, ProductReview, ProductCollect
-from app.utils.security import get_current_user_optional, get_current_user
+from app.services.membership import product_collects
+from app.services.cache import cache, TAG_PRODUCT, TAG_PRODUCT_CATEGORY
+from app.services.product_search import product_search
+from app.services.user_cache import UserPrincipal
+from app.utils.security import get_current_principal, get_current_principal_optional
 from app.utils.response import success, error, paginate
 
 router = APIRouter(prefix="/shop", tags=["商城"])
@@ -26,44 +31,81 @@ async def get_products(
     category_id: Optional[int] = Query(None, description="分类ID"),
     is_recommend: Optional[int] = Query(None, description="是否推荐"),
     keyword: Optional[str] = Query(None, description="搜索关键词"),
+    tag: Optional[str] = Query(None, description="健康标签/适用人群标签"),
+    min_price: Optional[float] = Query(None, ge=0, description="最低价"),
+    max_price: Optional[float] = Query(None, ge=0, description="最高价"),
     sort: str = Query("default", description="排序: default/sales/price_asc/price_desc"),
-    current_user: User = Depends(get_current_user_optional),
+    with_facets: bool = Query(False, description="是否返回分面统计（分类、标签、价格区间）"),
+    current_user: Optional[UserPrincipal] = Depends(get_current_principal_optional),
     db: AsyncSession = Depends(get_db)
 ):
     """获取商品列表"""
-    # 构建查询条件
-    conditions = [Product.is_on_sale == 1]
-    if category_id:
-        conditions.append(Product.category_id == category_id)
-    if is_recommend is not None:
-        conditions.append(Product.is_recommend == is_recommend)
-    if keyword:
-        conditions.append(Product.name.contains(keyword))
-    
-    # 查询总数
-    count_query = select(func.count()).select_from(Product).where(*conditions)
-    total = (await db.execute(count_query)).scalar()
-    
-    # 排序
-    order_by = []
-    if sort == "sales":
-        order_by.append(desc(Product.sales_count))
-    elif sort == "price_asc":
-        order_by.append(Product.current_price)
-    elif sort == "price_desc":
-        order_by.append(desc(Product.current_price))
+    facets = None
+    
+    if product_search.index.ready:
+        # 筛选、排序在索引中完成，只按ID读取当前页
+        ids, total, facets = product_search.query(
+            keyword=keyword,
+            category_id=category_id,
+            is_recommend=is_recommend,
+            tag=tag,
+            min_price=min_price,
+            max_price=max_price,
+            sort=sort,
+            offset=(page - 1) * page_size,
+            limit=page_size,
+        )
+        products = []
+        if ids:
+            result = await db.execute(
+                select(Product).where(Product.id.in_(ids), Product.is_on_sale == 1)
+            )
+            by_id = {p.id: p for p in result.scalars().all()}
+            products = [by_id[i] for i in ids if i in by_id]
     else:
-        order_by.append(desc(Product.is_recommend))
-        order_by.append(desc(Product.sort_order))
-    order_by.append(desc(Product.id))
-    
-    # 查询列表
-    query = select(Product).where(*conditions).order_by(
-        *order_by
-    ).offset((page - 1) * page_size).limit(page_size)
-    
-    result = await db.execute(query)
-    products = result.scalars().all()
+        # 索引加载完成前回退到数据库查询
+        conditions = [Product.is_on_sale == 1]
+        if category_id:
+            conditions.append(Product.category_id == category_id)
+        if is_recommend is not None:
+            conditions.append(Product.is_recommend == is_recommend)
+        if keyword:
+            conditions.append(Product.name.contains(keyword))
+        if tag:
+            tag_json = json.dumps(tag, ensure_ascii=False)
+            conditions.append(or_(
+                func.json_contains(Product.health_tags, tag_json),
+                func.json_contains(Product.suitable_tags, tag_json),
+            ))
+        if min_price is not None:
+            conditions.append(Product.current_price >= min_price)
+        if max_price is not None:
+            conditions.append(Product.current_price <= max_price)
+        
+        # 查询总数
+        count_query = select(func.count()).select_from(Product).where(*conditions)
+        total = (await db.execute(count_query)).scalar()
+        
+        # 排序
+        order_by = []
+        if sort == "sales":
+            order_by.append(desc(Product.sales_count))
+        elif sort == "price_asc":
+            order_by.append(Product.current_price)
+        elif sort == "price_desc":
+            order_by.append(desc(Product.current_price))
+        else:
+            order_by.append(desc(Product.is_recommend))
+            order_by.append(desc(Product.sort_order))
+        order_by.append(desc(Product.id))
+        
+        # 查询列表
+        query = select(Product).where(*conditions).order_by(
+            *order_by
+        ).offset((page - 1) * page_size).limit(page_size)
+        
+        result = await db.execute(query)
+        products = result.scalars().all()
     
     # 检查是否会员
     is_member = current_user and current_user.member_level > 0 if current_user else False
@@ -85,26 +127,22 @@ async def get_products(
             "health_tags": p.health_tags,
         })
     
-    return paginate(items, total, page, page_size)
+    response = paginate(items, total, page, page_size)
+    if with_facets:
+        response["data"]["facets"] = facets
+    return response
 
 
-@router.get("/product/{product_id}")
-async def get_product_detail(
-    product_id: int,
-    current_user: User = Depends(get_current_user_optional),
-    db: AsyncSession = Depends(get_db)
-):
-    """获取商品详情"""
+@cache.cached("shop:product:{product_id}", ttl=60, tags=[TAG_PRODUCT, TAG_PRODUCT + ":{product_id}"])
+async def _load_product_detail(db: AsyncSession, product_id: int) -> Optional[dict]:
+    """商品详情（与用户无关的部分，缓存；库存和销量随下单变化，不进缓存）"""
     result = await db.execute(
         select(Product).where(Product.id == product_id, Product.is_on_sale == 1)
     )
     product = result.scalar_one_or_none()
     
     if not product:
-        return error(404, "商品不存在")
-    
-    # 检查是否会员
-    is_member = current_user and current_user.member_level > 0 if current_user else False
+        return None
     
     # 获取评价统计
     review_count = (await db.execute(
@@ -121,7 +159,7 @@ async def get_product_detail(
         )
     )).scalar()
     
-    data = {
+    return {
         "id": product.id,
         "name": product.name,
         "subtitle": product.subtitle,
@@ -130,22 +168,42 @@ async def get_product_detail(
         "original_price": float(product.original_price),
         "current_price": float(product.current_price),
         "member_price": float(product.member_price) if product.member_price else None,
-        "show_price": float(product.member_price) if is_member and product.member_price else float(product.current_price),
-        "stock": product.stock,
-        "sales_count": product.sales_count,
         "suitable_tags": product.suitable_tags,
         "health_tags": product.health_tags,
         "specs": product.specs,
         "review_count": review_count,
         "avg_rating": round(float(avg_rating), 1) if avg_rating else 5.0,
     }
+
+
+@router.get("/product/{product_id}")
+async def get_product_detail(
+    product_id: int,
+    current_user: Optional[UserPrincipal] = Depends(get_current_principal_optional),
+    db: AsyncSession = Depends(get_db)
+):
+    """获取商品详情"""
+    product = await _load_product_detail(db, product_id)
+    
+    if not product:
+        return error(404, "商品不存在")
+    
+    # 检查是否会员
+    is_member = current_user and current_user.member_level > 0 if current_user else False
+    
+    # 库存和销量按主键读取当前值
+    stock_row = (await db.execute(
+        select(Product.stock, Product.sales_count).where(Product.id == product_id)
+    )).first()
+    data = dict(product)
+    data["stock"], data["sales_count"] = stock_row if stock_row else (0, 0)
+    data["show_price"] = product["member_price"] if is_member and product["member_price"] else product["current_price"]
     
     return success(data=data)
 
 
-@router.get("/categories")
-async def get_categories(db: AsyncSession = Depends(get_db)):
-    """获取商品分类"""
+@cache.cached("shop:categories", ttl=600, tags=[TAG_PRODUCT_CATEGORY])
+async def _load_categories(db: AsyncSession) -> list:
     result = await db.execute(
         select(ProductCategory).where(
             ProductCategory.is_active == 1
@@ -161,8 +219,13 @@ async def get_categories(db: AsyncSession = Depends(get_db)):
             "parent_id": c.parent_id,
             "icon": c.icon,
         })
-    
-    return success(data=items)
+    return items
+
+
+@router.get("/categories")
+async def get_categories(db: AsyncSession = Depends(get_db)):
+    """获取商品分类"""
+    return success(data=await _load_categories(db))
 
 
 @router.get("/product/{product_id}/reviews")
@@ -222,7 +285,7 @@ async def get_product_reviews(
 @router.post("/product/{product_id}/collect")
 async def collect_product(
     product_id: int,
-    current_user: User = Depends(get_current_user),
+    current_user: UserPrincipal = Depends(get_current_principal),
     db: AsyncSession = Depends(get_db)
 ):
     """收藏商品"""
@@ -236,15 +299,7 @@ async def collect_product(
         return error(404, "商品不存在")
     
     # 检查是否已收藏
-    collect_result = await db.execute(
-        select(ProductCollect).where(
-            ProductCollect.user_id == current_user.id,
-            ProductCollect.product_id == product_id
-        )
-    )
-    existing = collect_result.scalar_one_or_none()
-    
-    if existing:
+    if await product_collects.contains(db, current_user.id, product_id):
         return error(400, "已收藏该商品")
     
     # 添加收藏
@@ -261,7 +316,7 @@ async def collect_product(
 @router.delete("/product/{product_id}/collect")
 async def uncollect_product(
     product_id: int,
-    current_user: User = Depends(get_current_user),
+    current_user: UserPrincipal = Depends(get_current_principal),
     db: AsyncSession = Depends(get_db)
 ):
     """取消收藏商品"""
@@ -286,7 +341,7 @@ async def uncollect_product(
 async def get_my_collects(
     page: int = Query(1, ge=1),
     page_size: int = Query(10, ge=1, le=50),
-    current_user: User = Depends(get_current_user),
+    current_user: UserPrincipal = Depends(get_current_principal),
     db: AsyncSession = Depends(get_db)
 ):
     """获取我的收藏列表"""
@@ -16,7 +16,10 @@ from app.database import get_db
 from app.models.user import User
 from app.models.sport import SportRecord
 from app.models.points import CheckinRecord, CoinRecord
-from app.utils.security import get_current_user
+from app.services.leaderboard import leaderboard
+from app.services.user_cache import UserPrincipal, user_cache
+from app.services import rollup_service
+from app.utils.security import get_current_user, get_current_principal
 from app.utils.response import success, error, paginate
 from app.utils.helpers import calculate_calories
 
@@ -91,6 +94,16 @@ async def create_sport_record(
     )
     db.add(coin_record)
     
+    # 更新统计汇总
+    await rollup_service.incr_daily(db, date.today(), sport_count=1)
+    await rollup_service.incr_user_daily(
+        db, current_user.id, data.start_time.date(),
+        sport_count=1,
+        sport_duration=data.duration,
+        sport_calories=calories,
+        sport_distance=data.distance or 0,
+    )
+    
     await db.commit()
     await db.refresh(record)
     
@@ -98,6 +111,11 @@ async def create_sport_record(
     coin_record.source_id = record.id
     await db.commit()
     
+    # 更新排行榜
+    await leaderboard.add_sport_duration(current_user.id, data.duration, data.start_time)
+    await leaderboard.sync_points(current_user)
+    await user_cache.invalidate(current_user.id)
+    
     return success(
         data={
             "id": record.id,
@@ -113,7 +131,7 @@ async def get_sport_records(
     page: int = Query(1, ge=1),
     page_size: int = Query(10, ge=1, le=50),
     sport_type: Optional[str] = Query(None, description="运动类型筛选"),
-    current_user: User = Depends(get_current_user),
+    current_user: UserPrincipal = Depends(get_current_principal),
     db: AsyncSession = Depends(get_db)
 ):
     """获取运动记录列表"""
@@ -212,7 +230,12 @@ async def sport_checkin(
     )
     db.add(coin_record)
     
+    await rollup_service.incr_daily(db, today, checkin_count=1)
+    await rollup_service.incr_user_daily(db, current_user.id, today, checkin_count=1)
+    
     await db.commit()
+    await leaderboard.sync_points(current_user)
+    await user_cache.invalidate(current_user.id)
     
     return success(
         data={
@@ -14,9 +14,9 @@ from typing import Optional
 from pydantic import BaseModel, Field
 
 from app.database import get_db
-from app.models.user import User
 from app.models.sport import SportGoal, SportRecord
-from app.utils.security import get_current_user
+from app.services.user_cache import UserPrincipal
+from app.utils.security import get_current_principal
 from app.utils.response import success, error, paginate
 
 router = APIRouter(prefix="/sport-goal", tags=["运动目标"])
@@ -39,7 +39,7 @@ class GoalUpdate(BaseModel):
 async def get_goals(
     period: Optional[str] = Query(None, description="周期筛选"),
     is_active: int = Query(1, description="是否进行中"),
-    current_user: User = Depends(get_current_user),
+    current_user: UserPrincipal = Depends(get_current_principal),
     db: AsyncSession = Depends(get_db)
 ):
     """获取运动目标列表"""
@@ -80,7 +80,7 @@ async def get_goals(
 @router.post("")
 async def create_goal(
     data: GoalCreate,
-    current_user: User = Depends(get_current_user),
+    current_user: UserPrincipal = Depends(get_current_principal),
     db: AsyncSession = Depends(get_db)
 ):
     """创建运动目标"""
@@ -143,7 +143,7 @@ async def create_goal(
 async def update_goal(
     goal_id: int,
     data: GoalUpdate,
-    current_user: User = Depends(get_current_user),
+    current_user: UserPrincipal = Depends(get_current_principal),
     db: AsyncSession = Depends(get_db)
 ):
     """更新运动目标"""
@@ -171,7 +171,7 @@ async def update_goal(
 @router.delete("/{goal_id}")
 async def delete_goal(
     goal_id: int,
-    current_user: User = Depends(get_current_user),
+    current_user: UserPrincipal = Depends(get_current_principal),
     db: AsyncSession = Depends(get_db)
 ):
     """删除运动目标"""
@@ -194,7 +194,7 @@ async def delete_goal(
 
 @router.get("/stats")
 async def get_goal_stats(
-    current_user: User = Depends(get_current_user),
+    current_user: UserPrincipal = Depends(get_current_principal),
     db: AsyncSession = Depends(get_db)
 ):
     """获取目标统计"""
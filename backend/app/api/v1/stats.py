@@ -12,12 +12,12 @@ from datetime import datetime, date, timedelta
 from typing import Optional
 
 from app.database import get_db
-from app.models.user import User
 from app.models.health import HealthScreening
 from app.models.sport import SportRecord
 from app.models.food import FoodRecord
-from app.models.points import CheckinRecord
-from app.utils.security import get_current_user
+from app.services import rollup_service
+from app.services.user_cache import UserPrincipal
+from app.utils.security import get_current_principal
 from app.utils.response import success
 
 router = APIRouter(prefix="/stats", tags=["数据统计"])
@@ -25,7 +25,7 @@ router = APIRouter(prefix="/stats", tags=["数据统计"])
 
 @router.get("/overview")
 async def get_overview(
-    current_user: User = Depends(get_current_user),
+    current_user: UserPrincipal = Depends(get_current_principal),
     db: AsyncSession = Depends(get_db)
 ):
     """获取个人数据概览"""
@@ -33,34 +33,15 @@ async def get_overview(
     week_start = today - timedelta(days=today.weekday())
     month_start = date(today.year, today.month, 1)
     
-    # 本周运动统计
-    week_sport = await db.execute(
-        select(
-            func.sum(SportRecord.duration),
-            func.sum(SportRecord.calories),
-            func.count()
-        ).where(
-            SportRecord.user_id == current_user.id,
-            SportRecord.start_time >= datetime.combine(week_start, datetime.min.time())
-        )
+    # 本周运动统计（读取用户每日汇总）
+    week_sport = await rollup_service.sum_user_stats(
+        db, current_user.id, week_start, ["sport_duration", "sport_calories", "sport_count"]
     )
-    week_sport_data = week_sport.first()
     
-    # 本月饮食记录数
-    month_food_count = (await db.execute(
-        select(func.count()).select_from(FoodRecord).where(
-            FoodRecord.user_id == current_user.id,
-            FoodRecord.record_date >= month_start
-        )
-    )).scalar()
-    
-    # 本月签到天数
-    month_checkin = (await db.execute(
-        select(func.count()).select_from(CheckinRecord).where(
-            CheckinRecord.user_id == current_user.id,
-            CheckinRecord.checkin_date >= month_start
-        )
-    )).scalar()
+    # 本月饮食记录数、签到天数
+    month_stats = await rollup_service.sum_user_stats(
+        db, current_user.id, month_start, ["food_count", "checkin_count"]
+    )
     
     # 最近一次健康筛查
     latest_screening = (await db.execute(
@@ -71,12 +52,12 @@ async def get_overview(
     
     return success(data={
         "week_sport": {
-            "total_duration": week_sport_data[0] or 0,
-            "total_calories": week_sport_data[1] or 0,
-            "workout_count": week_sport_data[2] or 0,
+            "total_duration": int(week_sport["sport_duration"]),
+            "total_calories": int(week_sport["sport_calories"]),
+            "workout_count": int(week_sport["sport_count"]),
         },
-        "month_food_records": month_food_count,
-        "month_checkin_days": month_checkin,
+        "month_food_records": int(month_stats["food_count"]),
+        "month_checkin_days": int(month_stats["checkin_count"]),
         "continuous_checkin_days": current_user.continuous_checkin_days or 0,
         "latest_bmi": float(latest_screening.bmi) if latest_screening and latest_screening.bmi else None,
         "risk_level": latest_screening.risk_level if latest_screening else None,
@@ -89,7 +70,7 @@ async def get_overview(
 @router.get("/health")
 async def get_health_trend(
     days: int = Query(30, ge=7, le=90, description="天数范围"),
-    current_user: User = Depends(get_current_user),
+    current_user: UserPrincipal = Depends(get_current_principal),
     db: AsyncSession = Depends(get_db)
 ):
     """获取健康数据趋势"""
@@ -139,48 +120,58 @@ async def get_health_trend(
 @router.get("/sport")
 async def get_sport_stats(
     days: int = Query(30, ge=7, le=90, description="天数范围"),
-    current_user: User = Depends(get_current_user),
+    current_user: UserPrincipal = Depends(get_current_principal),
     db: AsyncSession = Depends(get_db)
 ):
     """获取运动数据统计"""
     start_date = datetime.now() - timedelta(days=days)
     
-    # 按日期统计
+    # 按日期和运动类型分组聚合，只取统计列
+    day = func.date(SportRecord.start_time).label("day")
     result = await db.execute(
-        select(SportRecord).where(
+        select(
+            day,
+            SportRecord.sport_type,
+            func.count(),
+            func.sum(SportRecord.duration),
+            func.sum(SportRecord.calories),
+            func.sum(SportRecord.distance),
+        ).where(
             SportRecord.user_id == current_user.id,
             SportRecord.start_time >= start_date
-        ).order_by(SportRecord.start_time)
+        ).group_by(day, SportRecord.sport_type)
     )
-    records = result.scalars().all()
+    rows = result.fetchall()
     
-    # 按日期分组
     daily_stats = {}
     sport_type_stats = {}
     total_duration = 0
     total_calories = 0
     total_distance = 0
+    workout_count = 0
     
-    for r in records:
-        date_str = r.start_time.strftime("%Y-%m-%d")
+    for day_value, sport_type, count, duration, calories, distance in rows:
+        date_str = str(day_value)
+        duration = int(duration or 0)
+        calories = int(calories or 0)
         
         # 日统计
         if date_str not in daily_stats:
             daily_stats[date_str] = {"duration": 0, "calories": 0}
-        daily_stats[date_str]["duration"] += r.duration
-        daily_stats[date_str]["calories"] += r.calories
+        daily_stats[date_str]["duration"] += duration
+        daily_stats[date_str]["calories"] += calories
         
         # 运动类型统计
-        if r.sport_type not in sport_type_stats:
-            sport_type_stats[r.sport_type] = {"count": 0, "duration": 0}
-        sport_type_stats[r.sport_type]["count"] += 1
-        sport_type_stats[r.sport_type]["duration"] += r.duration
+        if sport_type not in sport_type_stats:
+            sport_type_stats[sport_type] = {"count": 0, "duration": 0}
+        sport_type_stats[sport_type]["count"] += count
+        sport_type_stats[sport_type]["duration"] += duration
         
         # 总计
-        total_duration += r.duration
-        total_calories += r.calories
-        if r.distance:
-            total_distance += float(r.distance)
+        total_duration += duration
+        total_calories += calories
+        total_distance += float(distance or 0)
+        workout_count += count
     
     # 转换为列表
     daily_trend = [{"date": k, **v} for k, v in sorted(daily_stats.items())]
@@ -192,29 +183,37 @@ async def get_sport_stats(
         "total_duration": total_duration,
         "total_calories": total_calories,
         "total_distance": round(total_distance, 2),
-        "workout_count": len(records),
-        "avg_duration": round(total_duration / len(records), 1) if records else 0,
+        "workout_count": workout_count,
+        "avg_duration": round(total_duration / workout_count, 1) if workout_count else 0,
     })
 
 
 @router.get("/food")
 async def get_food_stats(
     days: int = Query(30, ge=7, le=90, description="天数范围"),
-    current_user: User = Depends(get_current_user),
+    current_user: UserPrincipal = Depends(get_current_principal),
     db: AsyncSession = Depends(get_db)
 ):
     """获取饮食数据统计"""
     start_date = date.today() - timedelta(days=days)
     
+    # 按日期和餐次分组聚合，只取统计列
     result = await db.execute(
-        select(FoodRecord).where(
+        select(
+            FoodRecord.record_date,
+            FoodRecord.meal_type,
+            func.count(),
+            func.sum(FoodRecord.calories),
+            func.sum(FoodRecord.protein),
+            func.sum(FoodRecord.carbs),
+            func.sum(FoodRecord.fat),
+        ).where(
             FoodRecord.user_id == current_user.id,
             FoodRecord.record_date >= start_date
-        ).order_by(FoodRecord.record_date)
+        ).group_by(FoodRecord.record_date, FoodRecord.meal_type)
     )
-    records = result.scalars().all()
+    rows = result.fetchall()
     
-    # 按日期分组
     daily_stats = {}
     meal_type_stats = {
         "breakfast": {"count": 0, "calories": 0},
@@ -226,28 +225,34 @@ async def get_food_stats(
     total_protein = 0
     total_carbs = 0
     total_fat = 0
+    record_count = 0
     
-    for r in records:
-        date_str = r.record_date.strftime("%Y-%m-%d")
+    for record_date, meal_type, count, calories, protein, carbs, fat in rows:
+        date_str = record_date.strftime("%Y-%m-%d")
+        calories = int(calories or 0)
+        protein = float(protein or 0)
+        carbs = float(carbs or 0)
+        fat = float(fat or 0)
         
         # 日统计
         if date_str not in daily_stats:
             daily_stats[date_str] = {"calories": 0, "protein": 0, "carbs": 0, "fat": 0}
-        daily_stats[date_str]["calories"] += r.calories
-        daily_stats[date_str]["protein"] += float(r.protein)
-        daily_stats[date_str]["carbs"] += float(r.carbs)
-        daily_stats[date_str]["fat"] += float(r.fat)
+        daily_stats[date_str]["calories"] += calories
+        daily_stats[date_str]["protein"] += protein
+        daily_stats[date_str]["carbs"] += carbs
+        daily_stats[date_str]["fat"] += fat
         
         # 餐次统计
-        if r.meal_type in meal_type_stats:
-            meal_type_stats[r.meal_type]["count"] += 1
-            meal_type_stats[r.meal_type]["calories"] += r.calories
+        if meal_type in meal_type_stats:
+            meal_type_stats[meal_type]["count"] += count
+            meal_type_stats[meal_type]["calories"] += calories
         
         # 总计
-        total_calories += r.calories
-        total_protein += float(r.protein)
-        total_carbs += float(r.carbs)
-        total_fat += float(r.fat)
+        total_calories += calories
+        total_protein += protein
+        total_carbs += carbs
+        total_fat += fat
+        record_count += count
     
     # 转换为列表
     daily_trend = [{"date": k, **v} for k, v in sorted(daily_stats.items())]
@@ -259,29 +264,6 @@ async def get_food_stats(
         "total_protein": round(total_protein, 1),
         "total_carbs": round(total_carbs, 1),
         "total_fat": round(total_fat, 1),
-        "record_count": len(records),
+        "record_count": record_count,
         "avg_daily_calories": round(total_calories / days, 1) if days > 0 else 0,
     })
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
@@ -12,7 +12,9 @@ from datetime import date, datetime
 from app.database import get_db
 from app.models.user import User
 from app.models.points import DailyTask, UserTaskRecord, CoinRecord
-from app.utils.security import get_current_user
+from app.services.leaderboard import leaderboard
+from app.services.user_cache import UserPrincipal, user_cache
+from app.utils.security import get_current_user, get_current_principal
 from app.utils.response import success, error
 
 router = APIRouter(prefix="/task", tags=["任务"])
@@ -20,7 +22,7 @@ router = APIRouter(prefix="/task", tags=["任务"])
 
 @router.get("/daily")
 async def get_daily_tasks(
-    current_user: User = Depends(get_current_user),
+    current_user: UserPrincipal = Depends(get_current_principal),
     db: AsyncSession = Depends(get_db)
 ):
     """获取今日任务列表"""
@@ -62,7 +64,7 @@ async def get_daily_tasks(
 
 @router.get("/progress")
 async def get_task_progress(
-    current_user: User = Depends(get_current_user),
+    current_user: UserPrincipal = Depends(get_current_principal),
     db: AsyncSession = Depends(get_db)
 ):
     """获取任务进度"""
@@ -165,6 +167,8 @@ async def claim_task_reward(
     record.claimed_at = datetime.now()
     
     await db.commit()
+    await leaderboard.sync_points(current_user)
+    await user_cache.invalidate(current_user.id)
     
     return success(
         data={
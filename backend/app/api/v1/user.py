@@ -9,9 +9,9 @@ GET /user/{user_id}/profile - 获取其他用户公开信息
 """
 from fastapi import APIRouter, Depends, UploadFile, File
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func
+from sqlalchemy import select
+from typing import Optional
 import os
-import uuid
 from datetime import datetime
 
 from app.database import get_db
@@ -22,16 +22,27 @@ from app.schemas.user import (
     UserProfile, UserProfileUpdate, 
     UserHealthProfileSchema, UserHealthProfileUpdate
 )
-from app.utils.security import get_current_user, get_current_user_optional
+from app.services.user_cache import UserPrincipal, user_cache
+from app.services.counters import counters, POST_LIKES, USER_FOLLOWERS, USER_FOLLOWING
+from app.utils.security import get_current_user, get_current_principal, get_current_principal_optional
 from app.utils.response import success, error
+from app.utils.upload import UploadError, save_image
 
 router = APIRouter(prefix="/user", tags=["用户"])
 
 
+async def _profile_data(user: User) -> dict:
+    """个人信息，粉丝数、关注数合并尚未写入数据库的计数"""
+    data = UserProfile.model_validate(user).model_dump()
+    data["follower_count"] = (await counters.merge(USER_FOLLOWERS, [user], "follower_count"))[user.id]
+    data["following_count"] = (await counters.merge(USER_FOLLOWING, [user], "following_count"))[user.id]
+    return data
+
+
 @router.get("/profile")
 async def get_profile(current_user: User = Depends(get_current_user)):
     """获取当前用户信息"""
-    return success(data=UserProfile.model_validate(current_user).model_dump())
+    return success(data=await _profile_data(current_user))
 
 
 @router.put("/profile")
@@ -48,9 +59,10 @@ async def update_profile(
     
     await db.commit()
     await db.refresh(current_user)
+    await user_cache.invalidate(current_user.id)
     
     return success(
-        data=UserProfile.model_validate(current_user).model_dump(),
+        data=await _profile_data(current_user),
         message="更新成功"
     )
 
@@ -66,25 +78,17 @@ async def upload_avatar(
     if file.content_type not in settings.ALLOWED_IMAGE_TYPES:
         return error(400, "不支持的图片格式")
     
-    # 验证文件大小
-    content = await file.read()
-    if len(content) > settings.MAX_FILE_SIZE:
-        return error(400, "文件大小超过限制")
-    
-    # 生成文件名
-    ext = file.filename.split(".")[-1] if "." in file.filename else "jpg"
-    filename = f"{uuid.uuid4().hex}.{ext}"
-    filepath = os.path.join(settings.UPLOAD_DIR, "avatars", filename)
-    
-    # 保存文件
-    os.makedirs(os.path.dirname(filepath), exist_ok=True)
-    with open(filepath, "wb") as f:
-        f.write(content)
+    # 流式保存（超过大小限制时立即停止）
+    try:
+        saved = await save_image(file, os.path.join(settings.UPLOAD_DIR, "avatars"))
+    except UploadError as e:
+        return error(400, e.message)
     
     # 更新用户头像
-    avatar_url = f"/uploads/avatars/{filename}"
+    avatar_url = f"/uploads/avatars/{saved.filename}"
     current_user.avatar = avatar_url
     await db.commit()
+    await user_cache.invalidate(current_user.id)
     
     return success(
         data={"avatar": avatar_url},
@@ -94,7 +98,7 @@ async def upload_avatar(
 
 @router.get("/health-profile")
 async def get_health_profile(
-    current_user: User = Depends(get_current_user),
+    current_user: UserPrincipal = Depends(get_current_principal),
     db: AsyncSession = Depends(get_db)
 ):
     """获取健康档案"""
@@ -116,7 +120,7 @@ async def get_health_profile(
 @router.put("/health-profile")
 async def update_health_profile(
     data: UserHealthProfileUpdate,
-    current_user: User = Depends(get_current_user),
+    current_user: UserPrincipal = Depends(get_current_principal),
     db: AsyncSession = Depends(get_db)
 ):
     """更新健康档案"""
@@ -145,7 +149,7 @@ async def update_health_profile(
 @router.get("/{user_id}/profile")
 async def get_user_public_profile(
     user_id: int,
-    current_user: User = Depends(get_current_user_optional),
+    current_user: Optional[UserPrincipal] = Depends(get_current_principal_optional),
     db: AsyncSession = Depends(get_db)
 ):
     """获取其他用户公开信息"""
@@ -156,11 +160,11 @@ async def get_user_public_profile(
     if not user:
         return error(404, "用户不存在")
     
-    # 统计获赞数
-    like_count_result = await db.execute(
-        select(func.sum(Post.like_count)).where(Post.user_id == user_id)
-    )
-    like_count = like_count_result.scalar() or 0
+    # 统计获赞数（各动态合并尚未写入数据库的点赞增量）
+    posts = (await db.execute(
+        select(Post.id, Post.like_count).where(Post.user_id == user_id)
+    )).all()
+    like_count = sum((await counters.merge(POST_LIKES, posts, "like_count")).values())
     
     # 检查是否关注
     is_followed = False
@@ -173,6 +177,10 @@ async def get_user_public_profile(
         )
         is_followed = follow_result.scalar_one_or_none() is not None
     
+    # 合并尚未写入数据库的计数
+    follower_count = (await counters.merge(USER_FOLLOWERS, [user], "follower_count"))[user.id]
+    following_count = (await counters.merge(USER_FOLLOWING, [user], "following_count"))[user.id]
+    
     return success(data={
         "id": user.id,
         "nickname": user.nickname,
@@ -180,9 +188,9 @@ async def get_user_public_profile(
         "bio": None,  # 可以添加个人简介字段
         "gender": user.gender,
         "user_level": user.user_level,
-        "follower_count": user.follower_count,
-        "following_count": user.following_count,
-        "like_count": int(like_count),
+        "follower_count": follower_count,
+        "following_count": following_count,
+        "like_count": like_count,
         "is_followed": is_followed
     })
 
@@ -38,9 +38,60 @@ class Settings(BaseSettings):
     JWT_SECRET_KEY: str = "change-this-secret-key-in-production"
     JWT_ALGORITHM: str = "HS256"
     JWT_EXPIRE_MINUTES: int = 60 * 24 * 7  # 7 天
+    # 已验证 Token 的缓存有效期（秒）
+    TOKEN_CACHE_TTL: int = 60
+    # HS256 使用标准库快速校验（不经过 jose）
+    JWT_FAST_PATH: bool = False
+    # Token 吊销：布隆过滤器预计容量、多进程同步间隔（秒，即其他进程吊销生效的最长延迟）
+    TOKEN_REVOCATION_CAPACITY: int = 100000
+    TOKEN_REVOCATION_SYNC_INTERVAL: float = 2.0
+    
+    # 密码哈希线程池大小（同时进行的 bcrypt 计算上限）
+    PASSWORD_HASH_WORKERS: int = 4
+    # 登录限流：窗口（分钟）内每个用户名、每个 IP 的最大尝试次数
+    LOGIN_LOCK_MINUTES: int = 15
+    LOGIN_MAX_ATTEMPTS_PER_USER: int = 5
+    LOGIN_MAX_ATTEMPTS_PER_IP: int = 20
+    
+    # Redis 配置（可选，未配置时排行榜等功能使用进程内实现）
+    REDIS_URL: Optional[str] = None
+    
+    # 登录用户缓存有效期（秒）
+    USER_CACHE_TTL: int = 60
+    # 临时键值存储（验证码、限流计数等）未配置 Redis 时的进程内条目上限、过期清理间隔（秒）
+    EPHEMERAL_STORE_MAXSIZE: int = 100000
+    # 临时计数（限流、验证码发送次数等）未配置 Redis 时的进程内条目上限，与上面的数据分开存放
+    EPHEMERAL_COUNTER_MAXSIZE: int = 100000
+    EPHEMERAL_STORE_SWEEP_INTERVAL: int = 60
+    
+    # 短信验证码：有效期（秒）、同一手机号重发间隔（秒）、每个手机号/用户每天发送上限、最多校验次数
+    VERIFY_CODE_TTL: int = 300
+    VERIFY_CODE_RESEND_SECONDS: int = 60
+    VERIFY_CODE_DAILY_LIMIT: int = 10
+    VERIFY_CODE_MAX_ATTEMPTS: int = 5
+    
+    # 计数（浏览量、点赞数等）缓冲写入数据库的间隔（秒）
+    COUNTER_FLUSH_INTERVAL: int = 5
+    # 动态浏览事件队列：memory（进程内）/ stream（Redis Stream，需配置 REDIS_URL），汇总间隔（秒）
+    VIEW_EVENT_BACKEND: str = "memory"
+    VIEW_EVENT_FLUSH_INTERVAL: float = 1.0
+    
+    # 出站 HTTP 客户端（每个上游服务一个连接池）
+    HTTP_TIMEOUT: float = 10.0
+    HTTP_CONNECT_TIMEOUT: float = 5.0
+    HTTP_MAX_CONNECTIONS: int = 100
+    HTTP_MAX_KEEPALIVE: int = 20
+    
+    # 搜索：食物库后端 memory（进程内 n-gram 索引）/ fulltext（MySQL ngram 全文索引），
+    # 进程内索引（食物库、商品）检查数据变化的间隔（秒）
+    FOOD_SEARCH_BACKEND: str = "memory"
+    SEARCH_REFRESH_INTERVAL: int = 300
     
     # 上传目录
     UPLOAD_DIR: str = "uploads"
+    # 上传文件大小上限（字节）、允许的图片类型
+    MAX_FILE_SIZE: int = 10 * 1024 * 1024
+    ALLOWED_IMAGE_TYPES: list = ["image/jpeg", "image/png", "image/gif", "image/webp"]
     
     # 微信小程序配置 - 必须在 .env 中配置
     WECHAT_APPID: str = ""
@@ -49,6 +100,14 @@ class Settings(BaseSettings):
     # 阿里云百炼 AI 服务配置（可选）
     DASHSCOPE_API_KEY: Optional[str] = None
     DASHSCOPE_MODEL: str = "qwen-turbo"
+    DASHSCOPE_BASE_URL: str = "https://dashscope.aliyuncs.com/compatible-mode/v1"
+    AI_TIMEOUT: float = 60.0
+    # 首轮问答回复缓存
+    AI_CACHE_TTL: int = 3600
+    AI_CACHE_SIZE: int = 1000
+    # 对话上下文：历史消息 token 预算、会话窗口缓存有效期（秒）
+    AI_CONTEXT_TOKENS: int = 2000
+    AI_CONTEXT_TTL: int = 1800
 
 
 # 全局配置实例
@@ -0,0 +1,78 @@
+"""
+出站 HTTP 客户端模块
+
+应用级共享 httpx.AsyncClient，按上游服务分别维护连接池：
+- keep-alive 复用连接，避免每次请求重新建立 TCP/TLS
+- 每个上游一个客户端，连接数上限即为单主机上限
+- 安装 h2 时启用 HTTP/2
+- 应用启动时创建（init_http_clients），关闭时释放（close_http_clients）
+"""
+import logging
+from typing import Dict
+
+import httpx
+
+from app.config import settings
+
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:  # pragma: no cover
+    HTTP2_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+# 上游服务配置：名称 -> AsyncClient 参数
+HTTP_CLIENTS: Dict[str, dict] = {
+    "default": {},
+    "wechat": {"base_url": "https://api.weixin.qq.com"},
+    # 大模型响应较慢，读超时单独放宽
+    "dashscope": {
+        "base_url": settings.DASHSCOPE_BASE_URL,
+        "timeout": httpx.Timeout(settings.AI_TIMEOUT, connect=settings.HTTP_CONNECT_TIMEOUT),
+    },
+}
+
+_clients: Dict[str, httpx.AsyncClient] = {}
+
+
+def _create_client(name: str) -> httpx.AsyncClient:
+    options = {
+        "http2": HTTP2_AVAILABLE,
+        "timeout": httpx.Timeout(settings.HTTP_TIMEOUT, connect=settings.HTTP_CONNECT_TIMEOUT),
+        "limits": httpx.Limits(
+            max_connections=settings.HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.HTTP_MAX_KEEPALIVE,
+            keepalive_expiry=30,
+        ),
+        **HTTP_CLIENTS.get(name, {}),
+    }
+    return httpx.AsyncClient(**options)
+
+
+def init_http_clients():
+    """创建全部已配置的客户端（应用启动时调用）"""
+    for name in HTTP_CLIENTS:
+        get_http_client(name)
+    logger.info(f"HTTP 客户端已创建: {', '.join(_clients)} (http2={HTTP2_AVAILABLE})")
+
+
+def get_http_client(name: str = "default") -> httpx.AsyncClient:
+    """
+    获取共享 HTTP 客户端（未创建时惰性创建，便于脚本中使用）
+
+    Args:
+        name: 上游服务名称，见 HTTP_CLIENTS
+    """
+    client = _clients.get(name)
+    if client is None or client.is_closed:
+        client = _clients[name] = _create_client(name)
+    return client
+
+
+async def close_http_clients():
+    """关闭全部客户端"""
+    clients = list(_clients.values())
+    _clients.clear()
+    for client in clients:
+        await client.aclose()
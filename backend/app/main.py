@@ -10,6 +10,15 @@ from pathlib import Path
 
 from app.config import settings
 from app.database import close_db
+from app.redis_client import close_redis
+from app.http_client import init_http_clients, close_http_clients
+from app.services.food_search import food_search
+from app.services.product_search import product_search
+from app.services.counters import counters
+from app.services.view_events import view_events
+from app.services.token_revocation import revocation_registry
+from app.services.ephemeral_store import local_store
+from app.utils.upload import UploadSizeLimitMiddleware
 
 # 确保上传目录存在（在应用启动前创建）
 UPLOAD_PATH = Path(__file__).parent.parent / settings.UPLOAD_DIR
@@ -62,10 +71,27 @@ from app.api.admin import (
 async def lifespan(app: FastAPI):
     """应用生命周期管理"""
     # 启动时（目录已在模块加载时创建）
+    init_http_clients()
+    # 后台加载搜索索引，不阻塞启动
+    food_search.start()
+    product_search.start()
+    counters.start()
+    view_events.start()
+    revocation_registry.start()
+    local_store.start()
     yield
     
     # 关闭时
+    await local_store.stop()
+    await revocation_registry.stop()
+    await food_search.stop()
+    await product_search.stop()
+    # 处理剩余浏览事件并写入剩余计数增量（需在关闭数据库前）
+    await view_events.stop()
+    await counters.stop()
+    await close_http_clients()
     await close_db()
+    await close_redis()
 
 
 # 创建 FastAPI 应用
@@ -76,6 +102,9 @@ app = FastAPI(
     lifespan=lifespan,
 )
 
+# 上传请求体大小限制（在接收请求体之前检查，需在 CORS 之内）
+app.add_middleware(UploadSizeLimitMiddleware)
+
 # CORS 配置
 app.add_middleware(
     CORSMiddleware,
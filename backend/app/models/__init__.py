@@ -15,6 +15,7 @@ from app.models.message import Conversation, Message
 from app.models.points import CoinRecord, CheckinRecord, DailyTask, UserTaskRecord
 from app.models.member import MemberOrder
 from app.models.system import Admin, AdminLog, Notification, Banner, SystemConfig, File
+from app.models.stats import DailyStats, UserDailyStats
 
 __all__ = [
     # 用户
@@ -45,6 +46,8 @@ __all__ = [
     "MemberOrder",
     # 系统
     "Admin", "AdminLog", "Notification", "Banner", "SystemConfig", "File",
+    # 统计汇总
+    "DailyStats", "UserDailyStats",
 ]
 
 
@@ -3,7 +3,7 @@
 """
 from datetime import datetime
 from typing import Optional
-from sqlalchemy import String, Integer, BigInteger, DateTime, Text, JSON
+from sqlalchemy import String, Integer, BigInteger, DateTime, Text, JSON, Index, UniqueConstraint
 from sqlalchemy.orm import Mapped, mapped_column
 
 from app.database import Base
@@ -12,6 +12,10 @@ from app.database import Base
 class Post(Base):
     """社区动态表"""
     __tablename__ = "posts"
+    __table_args__ = (
+        # 动态流排序索引，与游标 (is_top, created_at, id) 对应
+        Index("idx_posts_feed", "status", "is_top", "created_at", "id"),
+    )
     
     id: Mapped[int] = mapped_column(BigInteger, primary_key=True, autoincrement=True)
     user_id: Mapped[int] = mapped_column(BigInteger, nullable=False, index=True, comment="用户ID")
@@ -54,6 +58,9 @@ class PostComment(Base):
 class PostLike(Base):
     """动态点赞表"""
     __tablename__ = "post_likes"
+    __table_args__ = (
+        UniqueConstraint("user_id", "post_id", name="uk_user_post"),
+    )
     
     id: Mapped[int] = mapped_column(BigInteger, primary_key=True, autoincrement=True)
     post_id: Mapped[int] = mapped_column(BigInteger, nullable=False, index=True, comment="动态ID")
@@ -79,6 +86,9 @@ class Topic(Base):
 class UserFollow(Base):
     """用户关注关系表"""
     __tablename__ = "user_follows"
+    __table_args__ = (
+        UniqueConstraint("user_id", "follow_user_id", name="uk_user_follow"),
+    )
     
     id: Mapped[int] = mapped_column(BigInteger, primary_key=True, autoincrement=True)
     user_id: Mapped[int] = mapped_column(BigInteger, nullable=False, index=True, comment="用户ID")
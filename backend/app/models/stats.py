@@ -0,0 +1,57 @@
+"""
+统计汇总相关模型
+"""
+from datetime import datetime, date
+from decimal import Decimal
+from sqlalchemy import Integer, BigInteger, DateTime, Date, Numeric, UniqueConstraint
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.database import Base
+
+
+class DailyStats(Base):
+    """全站每日汇总表"""
+    __tablename__ = "daily_stats"
+
+    id: Mapped[int] = mapped_column(BigInteger, primary_key=True, autoincrement=True)
+    stat_date: Mapped[date] = mapped_column(Date, nullable=False, unique=True, comment="统计日期")
+
+    new_users: Mapped[int] = mapped_column(Integer, default=0, comment="新增用户数")
+    order_count: Mapped[int] = mapped_column(Integer, default=0, comment="下单数")
+    order_amount: Mapped[Decimal] = mapped_column(Numeric(12, 2), default=Decimal("0.00"), comment="成交金额(按下单日期)")
+    screening_count: Mapped[int] = mapped_column(Integer, default=0, comment="健康筛查数")
+    sport_count: Mapped[int] = mapped_column(Integer, default=0, comment="运动记录数")
+    food_count: Mapped[int] = mapped_column(Integer, default=0, comment="饮食记录数")
+    checkin_count: Mapped[int] = mapped_column(Integer, default=0, comment="打卡数")
+
+    updated_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.now, onupdate=datetime.now, comment="更新时间")
+
+
+class UserDailyStats(Base):
+    """用户每日汇总表"""
+    __tablename__ = "user_daily_stats"
+    __table_args__ = (
+        UniqueConstraint("user_id", "stat_date", name="uk_user_date"),
+    )
+
+    id: Mapped[int] = mapped_column(BigInteger, primary_key=True, autoincrement=True)
+    user_id: Mapped[int] = mapped_column(BigInteger, nullable=False, comment="用户ID")
+    stat_date: Mapped[date] = mapped_column(Date, nullable=False, index=True, comment="统计日期")
+
+    # 运动（按开始时间归日）
+    sport_count: Mapped[int] = mapped_column(Integer, default=0, comment="运动次数")
+    sport_duration: Mapped[int] = mapped_column(Integer, default=0, comment="运动时长(分钟)")
+    sport_calories: Mapped[int] = mapped_column(Integer, default=0, comment="运动消耗(大卡)")
+    sport_distance: Mapped[Decimal] = mapped_column(Numeric(12, 2), default=Decimal("0.00"), comment="运动距离(米)")
+
+    # 饮食（按记录日期归日）
+    food_count: Mapped[int] = mapped_column(Integer, default=0, comment="饮食记录数")
+    food_calories: Mapped[int] = mapped_column(Integer, default=0, comment="摄入热量(大卡)")
+    protein: Mapped[Decimal] = mapped_column(Numeric(10, 2), default=Decimal("0.00"), comment="蛋白质(克)")
+    carbs: Mapped[Decimal] = mapped_column(Numeric(10, 2), default=Decimal("0.00"), comment="碳水(克)")
+    fat: Mapped[Decimal] = mapped_column(Numeric(10, 2), default=Decimal("0.00"), comment="脂肪(克)")
+
+    # 打卡
+    checkin_count: Mapped[int] = mapped_column(Integer, default=0, comment="打卡数")
+
+    updated_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.now, onupdate=datetime.now, comment="更新时间")
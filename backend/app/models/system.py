@@ -3,7 +3,7 @@
 """
 from datetime import datetime
 from typing import Optional
-from sqlalchemy import String, Integer, BigInteger, DateTime, Text, JSON
+from sqlalchemy import String, Integer, BigInteger, DateTime, Text, JSON, Index, UniqueConstraint
 from sqlalchemy.orm import Mapped, mapped_column
 
 from app.database import Base
@@ -102,6 +102,9 @@ class File(Base):
 class AIChatRecord(Base):
     """AI对话记录表"""
     __tablename__ = "ai_chat_records"
+    __table_args__ = (
+        Index("idx_user_session_time", "user_id", "session_id", "created_at"),
+    )
     
     id: Mapped[int] = mapped_column(BigInteger, primary_key=True, autoincrement=True)
     user_id: Mapped[int] = mapped_column(BigInteger, nullable=False, index=True, comment="用户ID")
@@ -111,3 +114,23 @@ class AIChatRecord(Base):
     tokens_used: Mapped[int] = mapped_column(Integer, default=0, comment="消耗token数")
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.now, index=True, comment="创建时间")
 
+
+
+class AIChatSession(Base):
+    """AI会话表（写入对话记录时同步维护，用于会话列表）"""
+    __tablename__ = "ai_chat_sessions"
+    __table_args__ = (
+        UniqueConstraint("user_id", "session_id", name="uk_user_session"),
+        Index("idx_user_last_message", "user_id", "last_message_at"),
+    )
+    
+    id: Mapped[int] = mapped_column(BigInteger, primary_key=True, autoincrement=True)
+    user_id: Mapped[int] = mapped_column(BigInteger, nullable=False, comment="用户ID")
+    session_id: Mapped[str] = mapped_column(String(50), nullable=False, comment="会话ID")
+    title: Mapped[str] = mapped_column(String(100), default="", comment="标题(第一条用户消息)")
+    last_message: Mapped[str] = mapped_column(String(255), default="", comment="最后一条消息")
+    message_count: Mapped[int] = mapped_column(Integer, default=0, comment="消息数")
+    summary: Mapped[Optional[str]] = mapped_column(Text, nullable=True, comment="较早对话的滚动摘要")
+    summary_until_id: Mapped[int] = mapped_column(BigInteger, default=0, comment="已并入摘要的最后一条记录ID")
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.now, comment="创建时间")
+    last_message_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.now, comment="最后消息时间")
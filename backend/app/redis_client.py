@@ -0,0 +1,39 @@
+"""
+Redis 连接模块
+
+REDIS_URL 未配置或 redis 库不可用时 get_redis() 返回 None，
+调用方应回退到进程内实现。
+"""
+import logging
+from typing import Optional
+
+from app.config import settings
+
+try:
+    from redis import asyncio as aioredis
+except ImportError:  # pragma: no cover
+    aioredis = None
+
+logger = logging.getLogger(__name__)
+
+_client = None
+
+
+def get_redis() -> Optional["aioredis.Redis"]:
+    """获取全局 Redis 客户端（惰性创建）"""
+    global _client
+    if not settings.REDIS_URL or aioredis is None:
+        return None
+
+    if _client is None:
+        _client = aioredis.from_url(settings.REDIS_URL, decode_responses=True)
+        logger.info("Redis 客户端已创建")
+    return _client
+
+
+async def close_redis():
+    """关闭 Redis 连接"""
+    global _client
+    if _client is not None:
+        await _client.close()
+        _client = None
@@ -174,7 +174,7 @@ class UserFeedbackSchema(BaseModel):
 class BindPhoneRequest(BaseModel):
     """绑定手机号请求"""
     phone: str = Field(..., pattern=r"^1[3-9]\d{9}$", description="手机号")
-    code: str = Field(..., min_length=4, max_length=6, description="验证码")
+    code: str = Field(..., pattern=r"^[0-9]{6}$", description="验证码")
 
 
 
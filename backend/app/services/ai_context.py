@@ -0,0 +1,215 @@
+"""
+AI 对话上下文管理
+
+每个会话维护一个对话窗口（摘要 + 摘要之后的消息），缓存在 Redis（未配置时在进程内），
+每轮对话不再从数据库重新读取历史记录：
+- 发送给模型的历史按 token 预算（AI_CONTEXT_TOKENS）从最近的消息往前截取
+- 超出预算（或超过 MAX_WINDOW_MESSAGES 条）的较早消息在后台压缩进滚动摘要，摘要保存在
+  ai_chat_sessions.summary；消息只在并入摘要后才移出窗口
+- 缓存失效时从 ai_chat_sessions 和摘要之后的对话记录重建窗口
+
+未配置 Redis 时窗口仅在本进程有效，多进程部署请配置 Redis。
+"""
+import asyncio
+import json
+import logging
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.database import async_session_maker
+from app.models.system import AIChatRecord, AIChatSession
+from app.redis_client import get_redis
+from app.services.ai_service import ai_assistant
+from app.utils.lru import TTLCache
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = "ai:ctx:"
+
+# 发送给模型的历史最多包含的消息数，更早的消息与超出 token 预算的消息一样压缩进摘要
+MAX_WINDOW_MESSAGES = 40
+
+
+def estimate_tokens(text: str) -> int:
+    """粗略估算 token 数：中文约 1 字 1 token，其他字符约 4 个 1 token"""
+    cjk = sum(1 for ch in text if "一" <= ch <= "鿿")
+    return cjk + (len(text) - cjk + 3) // 4
+
+
+class ConversationContext:
+    """会话上下文窗口管理"""
+
+    def __init__(self, maxsize: int = 5000):
+        self._local = TTLCache(maxsize=maxsize, ttl=settings.AI_CONTEXT_TTL)
+        # 正在压缩摘要的会话
+        self._compressing: set = set()
+        self._tasks: set = set()
+
+    @staticmethod
+    def _key(user_id: int, session_id: str) -> str:
+        return f"{KEY_PREFIX}{user_id}:{session_id}"
+
+    async def _get_cached(self, key: str) -> Optional[dict]:
+        redis = get_redis()
+        if redis is None:
+            return self._local.get(key)
+        try:
+            raw = await redis.get(key)
+            return json.loads(raw) if raw else None
+        except Exception as e:
+            logger.warning(f"读取对话窗口失败: {e}")
+            return None
+
+    async def _set_cached(self, key: str, window: dict):
+        redis = get_redis()
+        if redis is None:
+            self._local.set(key, window)
+            return
+        try:
+            await redis.set(key, json.dumps(window, ensure_ascii=False), ex=settings.AI_CONTEXT_TTL)
+        except Exception as e:
+            logger.warning(f"写入对话窗口失败: {e}")
+
+    async def load(self, db: AsyncSession, user_id: int, session_id: str) -> dict:
+        """
+        获取会话窗口
+
+        Returns:
+            {"summary": 摘要, "summary_until_id": 摘要截止记录ID,
+             "messages": [{"id", "role", "content", "tokens"}, ...]}（按时间正序）
+        """
+        key = self._key(user_id, session_id)
+        window = await self._get_cached(key)
+        if window is not None:
+            return window
+
+        session_result = await db.execute(
+            select(AIChatSession.summary, AIChatSession.summary_until_id).where(
+                AIChatSession.user_id == user_id,
+                AIChatSession.session_id == session_id,
+            )
+        )
+        row = session_result.first()
+        summary, summary_until_id = (row[0], row[1] or 0) if row else (None, 0)
+
+        records_result = await db.execute(
+            select(AIChatRecord.id, AIChatRecord.role, AIChatRecord.content).where(
+                AIChatRecord.user_id == user_id,
+                AIChatRecord.session_id == session_id,
+                AIChatRecord.id > summary_until_id,
+            ).order_by(AIChatRecord.id)
+        )
+        # 读取摘要之后的全部消息：尚未并入摘要的消息不能丢弃，多出的部分由下一轮对话压缩
+        messages = [
+            {"id": r.id, "role": r.role, "content": r.content, "tokens": estimate_tokens(r.content)}
+            for r in records_result.fetchall()
+        ]
+
+        window = {"summary": summary, "summary_until_id": summary_until_id, "messages": messages}
+        await self._set_cached(key, window)
+        return window
+
+    async def append(self, user_id: int, session_id: str, record: AIChatRecord):
+        """
+        将新保存的对话记录追加到缓存的窗口
+
+        重新读取缓存中的窗口后追加：调用方加载窗口之后，后台压缩可能已更新摘要并移除了消息，
+        用调用方持有的旧窗口写回会覆盖压缩结果。窗口未缓存时不处理，下次 load 从数据库重建。
+        """
+        key = self._key(user_id, session_id)
+        window = await self._get_cached(key)
+        if window is None:
+            return
+        if any(m["id"] == record.id for m in window["messages"]):
+            return
+        window["messages"].append({
+            "id": record.id,
+            "role": record.role,
+            "content": record.content,
+            "tokens": estimate_tokens(record.content),
+        })
+        await self._set_cached(key, window)
+
+    def select_history(self, window: dict, reserve: int = 0) -> Tuple[List[Dict[str, str]], List[dict]]:
+        """
+        按 token 预算从最近的消息往前截取历史（最多 MAX_WINDOW_MESSAGES 条）
+
+        Args:
+            window: 会话窗口
+            reserve: 为当前用户消息预留的 token 数
+
+        Returns:
+            (发送给模型的历史消息, 超出预算的较早消息)
+        """
+        budget = settings.AI_CONTEXT_TOKENS - reserve
+        messages = window["messages"]
+        start = len(messages)
+        limit = max(start - MAX_WINDOW_MESSAGES, 0)
+        used = 0
+        while start > limit and used + messages[start - 1]["tokens"] <= budget:
+            start -= 1
+            used += messages[start]["tokens"]
+
+        history = [{"role": m["role"], "content": m["content"]} for m in messages[start:]]
+        return history, messages[:start]
+
+    async def forget(self, user_id: int, session_ids: List[str]):
+        """删除会话后清除窗口缓存"""
+        keys = [self._key(user_id, sid) for sid in session_ids]
+        for key in keys:
+            self._local.pop(key)
+        redis = get_redis()
+        if redis is not None and keys:
+            try:
+                await redis.delete(*keys)
+            except Exception as e:
+                logger.warning(f"清除对话窗口失败: {e}")
+
+    def compress_later(self, user_id: int, session_id: str, overflow: List[dict]):
+        """在后台将超出预算的消息压缩进摘要（同一会话同时只压缩一次）"""
+        key = self._key(user_id, session_id)
+        if not overflow or key in self._compressing:
+            return
+        self._compressing.add(key)
+
+        task = asyncio.create_task(self._compress(user_id, session_id, list(overflow)))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        task.add_done_callback(lambda _: self._compressing.discard(key))
+
+    async def _compress(self, user_id: int, session_id: str, overflow: List[dict]):
+        key = self._key(user_id, session_id)
+        try:
+            window = await self._get_cached(key)
+            previous = window["summary"] if window else None
+            summary = await ai_assistant.summarize(previous, overflow)
+            until_id = overflow[-1]["id"]
+
+            async with async_session_maker() as session:
+                await session.execute(
+                    update(AIChatSession).where(
+                        AIChatSession.user_id == user_id,
+                        AIChatSession.session_id == session_id,
+                        AIChatSession.summary_until_id < until_id,
+                    ).values(summary=summary, summary_until_id=until_id)
+                )
+                await session.commit()
+
+            # 压缩期间可能有新消息写入，重新读取后再更新
+            window = await self._get_cached(key)
+            if window is not None:
+                window["summary"] = summary
+                window["summary_until_id"] = until_id
+                window["messages"] = [m for m in window["messages"] if m["id"] > until_id]
+                await self._set_cached(key, window)
+
+            logger.info(f"会话 {session_id} 已压缩 {len(overflow)} 条消息到摘要")
+        except Exception as e:
+            logger.error(f"压缩会话摘要失败: {e}")
+
+
+# 全局实例
+conversation_context = ConversationContext()
@@ -1,18 +1,26 @@
 """
 AI 健康助手服务 - 基于阿里云百炼平台（通义千问）
 
+通过 OpenAI 兼容接口异步调用，不阻塞事件循环，支持流式输出。
+
 功能特性:
 1. 基于用户健康档案的个性化回答
 2. 上下文对话记忆管理
 3. 专业健康领域知识
 4. 营养不良筛查与健康管理专业助手
 """
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, AsyncIterator
 from datetime import date
 from decimal import Decimal
+import asyncio
+import hashlib
+import json
 import logging
+import unicodedata
 
 from app.config import settings
+from app.http_client import get_http_client
+from app.utils.lru import TTLCache
 
 logger = logging.getLogger(__name__)
 
@@ -37,21 +45,39 @@ class AIHealthAssistant:
         (float('inf'), "肥胖", "建议在专业指导下制定减重计划"),
     ]
     
+    # 回复缓存指纹使用的上下文字段（分档后的信息，不含身高体重等精确数值），
+    # 可缓存的首轮问答只用这些字段构建提示词，缓存的回复不会包含某个用户的精确数据
+    CACHE_CONTEXT_FIELDS = ["BMI分类", "BMI建议", "健康目标", "过敏食物", "慢性病史", "伤病情况"]
+    
     def __init__(self):
         self.api_key = settings.DASHSCOPE_API_KEY
         self.model = settings.DASHSCOPE_MODEL
-        self._dashscope_initialized = False
+        # 首轮问答回复缓存：指纹 -> 回复
+        self._reply_cache = TTLCache(maxsize=settings.AI_CACHE_SIZE, ttl=settings.AI_CACHE_TTL)
+        # 进行中的模型调用：指纹 -> Task，相同问题并发时只调用一次
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self._cache_stats = {"hits": 0, "misses": 0, "coalesced": 0, "provider_calls": 0}
+        # 渲染后的系统提示词：用户上下文指纹 -> 提示词，档案变更后指纹随之变化
+        self._prompt_cache = TTLCache(maxsize=1000, ttl=3600)
+    
+    def _request_body(
+        self,
+        messages: List[Dict[str, str]],
+        stream: bool = False,
+        max_tokens: int = 1500,
+    ) -> dict:
+        """构建 OpenAI 兼容接口请求体"""
+        return {
+            "model": self.model,
+            "messages": messages,
+            "max_tokens": max_tokens,
+            "temperature": 0.7,
+            "top_p": 0.8,
+            "stream": stream,
+        }
     
-    def _init_dashscope(self):
-        """延迟初始化 dashscope"""
-        if not self._dashscope_initialized and self.api_key:
-            try:
-                import dashscope
-                dashscope.api_key = self.api_key
-                self._dashscope_initialized = True
-                logger.info("DashScope API 初始化成功")
-            except Exception as e:
-                logger.error(f"DashScope 初始化失败: {e}")
+    def _headers(self) -> dict:
+        return {"Authorization": f"Bearer {self.api_key}"}
     
     def _calculate_bmi(self, height: Optional[Decimal], weight: Optional[Decimal]) -> tuple:
         """计算BMI及分类"""
@@ -128,11 +154,14 @@ class AIHealthAssistant:
             if basic_info:
                 user_profile += "### 基本信息\n" + "\n".join(f"- {info}" for info in basic_info) + "\n"
             
-            # BMI 信息
+            # BMI 信息（可缓存的问答只有分类，没有具体数值）
             if context.get("BMI"):
                 user_profile += f"\n### 体重评估\n- BMI: {context['BMI']}"
                 if context.get("BMI分类"):
                     user_profile += f" ({context['BMI分类']})"
+            elif context.get("BMI分类"):
+                user_profile += f"\n### 体重评估\n- BMI分类: {context['BMI分类']}"
+            if context.get("BMI") or context.get("BMI分类"):
                 if context.get("BMI建议"):
                     user_profile += f"\n- 建议: {context['BMI建议']}"
                 user_profile += "\n"
@@ -172,19 +201,146 @@ class AIHealthAssistant:
         
         return base_prompt
     
+    def _system_prompt(self, context: Optional[Dict[str, Any]]) -> str:
+        """获取系统提示词（按用户上下文缓存渲染结果）"""
+        key = json.dumps(context or {}, ensure_ascii=False, sort_keys=True, default=str)
+        prompt = self._prompt_cache.get(key)
+        if prompt is None:
+            prompt = self._build_system_prompt(context)
+            self._prompt_cache.set(key, prompt)
+        return prompt
+    
+    def _build_messages(
+        self,
+        user_message: str,
+        context: Optional[Dict[str, Any]],
+        history: Optional[List[Dict[str, str]]],
+        summary: Optional[str] = None,
+    ) -> List[Dict[str, str]]:
+        """
+        构建发送给模型的消息列表
+        
+        history 由调用方按 token 预算截取（见 app/services/ai_context.py），
+        更早的对话以 summary 形式提供。
+        """
+        messages = [{"role": "system", "content": self._system_prompt(context)}]
+        
+        # 更早对话的摘要（单独一条，不影响系统提示词）
+        if summary:
+            messages.append({"role": "system", "content": f"## 之前的对话摘要\n{summary}"})
+        
+        # 添加历史对话
+        if history:
+            for msg in history:
+                if msg.get("role") in ["user", "assistant"] and msg.get("content"):
+                    messages.append({
+                        "role": msg["role"],
+                        "content": msg["content"]
+                    })
+        
+        # 添加当前用户消息
+        messages.append({"role": "user", "content": user_message})
+        return messages
+    
+    def _cache_key(self, user_message: str, context: Optional[Dict[str, Any]]) -> Optional[str]:
+        """
+        首轮问答的缓存指纹：归一化后的问题 + 分档后的用户上下文
+        
+        忽略大小写、全半角、空白和标点；问题为空时不缓存。
+        """
+        text = unicodedata.normalize("NFKC", user_message).lower()
+        text = "".join(ch for ch in text if ch.isalnum())
+        if not text:
+            return None
+        
+        context = context or {}
+        fingerprint = [text] + [context.get(field) for field in self.CACHE_CONTEXT_FIELDS]
+        raw = json.dumps(fingerprint, ensure_ascii=False, default=str)
+        return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+    
+    def _cacheable_context(self, context: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        """可缓存问答使用的上下文：只保留缓存指纹中的字段"""
+        context = context or {}
+        return {field: context[field] for field in self.CACHE_CONTEXT_FIELDS if field in context}
+    
+    def cache_stats(self) -> dict:
+        """回复缓存命中统计"""
+        lookups = self._cache_stats["hits"] + self._cache_stats["misses"]
+        return {
+            **self._cache_stats,
+            "hit_rate": round(self._cache_stats["hits"] / lookups, 4) if lookups else 0.0,
+            "size": len(self._reply_cache),
+            "inflight": len(self._inflight),
+        }
+    
+    def _get_cached_reply(self, key: Optional[str]) -> Optional[str]:
+        if key is None:
+            return None
+        reply = self._reply_cache.get(key)
+        self._cache_stats["hits" if reply is not None else "misses"] += 1
+        return reply
+    
+    async def _complete(self, messages: List[Dict[str, str]], max_tokens: int = 1500) -> Optional[str]:
+        """调用模型，失败返回 None"""
+        self._cache_stats["provider_calls"] += 1
+        logger.info(f"调用千问API，消息数: {len(messages)}, 模型: {self.model}")
+        
+        try:
+            response = await get_http_client("dashscope").post(
+                "/chat/completions",
+                json=self._request_body(messages, max_tokens=max_tokens),
+                headers=self._headers(),
+            )
+            
+            if response.status_code == 200:
+                reply = response.json()["choices"][0]["message"]["content"]
+                logger.info(f"AI响应成功，长度: {len(reply)}")
+                return reply
+            
+            logger.error(f"AI服务异常 (code: {response.status_code}): {response.text[:200]}")
+        except Exception as e:
+            logger.error(f"AI服务调用失败: {str(e)}")
+        return None
+    
+    async def _complete_once(self, key: str, messages: List[Dict[str, str]]) -> Optional[str]:
+        """
+        合并相同指纹的并发调用，成功的回复写入缓存
+        
+        模型调用在独立 Task 中执行，发起请求的客户端断开不影响其他等待者。
+        """
+        task = self._inflight.get(key)
+        if task is not None:
+            self._cache_stats["coalesced"] += 1
+        else:
+            task = asyncio.ensure_future(self._complete(messages))
+            self._inflight[key] = task
+            
+            def _done(t: asyncio.Task):
+                self._inflight.pop(key, None)
+                if not t.cancelled() and t.result():
+                    self._reply_cache.set(key, t.result())
+            
+            task.add_done_callback(_done)
+        
+        return await asyncio.shield(task)
+    
     async def chat(
         self, 
         user_message: str, 
         context: Optional[Dict[str, Any]] = None,
-        history: Optional[List[Dict[str, str]]] = None
+        history: Optional[List[Dict[str, str]]] = None,
+        summary: Optional[str] = None,
     ) -> str:
         """
         与 AI 健康助手对话
         
+        首轮问答（无历史对话和摘要）使用回复缓存，相同问题并发时只调用一次模型。
+        
         Args:
             user_message: 用户消息
             context: 用户健康档案等上下文
             history: 历史对话记录
+            summary: 更早对话的摘要
             
         Returns:
             AI 回复内容
@@ -193,60 +349,116 @@ class AIHealthAssistant:
             logger.warning("AI API Key 未配置，使用模拟响应")
             return self._get_mock_response(user_message, context)
         
-        self._init_dashscope()
+        key = None if history or summary else self._cache_key(user_message, context)
+        cached = self._get_cached_reply(key)
+        if cached is not None:
+            return cached
+        
+        if key is not None:
+            # 回复会被同一指纹的其他用户复用，提示词中不能有指纹之外的个人数据
+            context = self._cacheable_context(context)
+        
+        messages = self._build_messages(user_message, context, history, summary)
+        if key is not None:
+            reply = await self._complete_once(key, messages)
+        else:
+            reply = await self._complete(messages)
+        
+        # 调用失败时降级到模拟响应
+        return reply if reply is not None else self._get_mock_response(user_message, context)
+    
+    async def chat_stream(
+        self,
+        user_message: str,
+        context: Optional[Dict[str, Any]] = None,
+        history: Optional[List[Dict[str, str]]] = None,
+        summary: Optional[str] = None,
+    ) -> AsyncIterator[str]:
+        """
+        流式对话，逐段返回模型输出
         
+        未开始输出前调用失败时降级为模拟响应；输出过程中断开则直接结束。
+        """
+        if not self.api_key:
+            logger.warning("AI API Key 未配置，使用模拟响应")
+            yield self._get_mock_response(user_message, context)
+            return
+        
+        key = None if history or summary else self._cache_key(user_message, context)
+        cached = self._get_cached_reply(key)
+        if cached is not None:
+            yield cached
+            return
+        
+        if key is not None:
+            # 回复会被同一指纹的其他用户复用，提示词中不能有指纹之外的个人数据
+            context = self._cacheable_context(context)
+        
+        messages = self._build_messages(user_message, context, history, summary)
+        self._cache_stats["provider_calls"] += 1
+        logger.info(f"调用千问API(流式)，消息数: {len(messages)}, 模型: {self.model}")
+        
+        parts = []
         try:
-            from dashscope import Generation
-            
-            # 构建系统提示词
-            system_prompt = self._build_system_prompt(context)
-            
-            # 构建消息列表
-            messages = [{"role": "system", "content": system_prompt}]
-            
-            # 添加历史对话（最多保留最近10轮）
-            if history:
-                # 过滤并限制历史记录
-                recent_history = history[-20:]  # 最多20条消息（10轮对话）
-                for msg in recent_history:
-                    if msg.get("role") in ["user", "assistant"] and msg.get("content"):
-                        messages.append({
-                            "role": msg["role"],
-                            "content": msg["content"]
-                        })
-            
-            # 添加当前用户消息
-            messages.append({"role": "user", "content": user_message})
-            
-            logger.info(f"调用千问API，消息数: {len(messages)}, 模型: {self.model}")
-            
-            # 调用千问 API
-            response = Generation.call(
-                model=self.model,
-                messages=messages,
-                result_format='message',
-                max_tokens=1500,
-                temperature=0.7,
-                top_p=0.8,
-            )
-            
-            if response.status_code == 200:
-                reply = response.output.choices[0].message.content
-                logger.info(f"AI响应成功，长度: {len(reply)}")
-                return reply
-            else:
-                error_msg = f"AI服务异常 (code: {response.status_code}): {response.message}"
-                logger.error(error_msg)
-                # 降级到模拟响应
-                return self._get_mock_response(user_message, context)
+            async with get_http_client("dashscope").stream(
+                "POST",
+                "/chat/completions",
+                json=self._request_body(messages, stream=True),
+                headers=self._headers(),
+            ) as response:
+                if response.status_code != 200:
+                    body = await response.aread()
+                    raise RuntimeError(f"code: {response.status_code}, {body[:200]!r}")
                 
-        except ImportError:
-            logger.error("dashscope 模块未安装")
-            return "AI服务暂不可用，请联系管理员。"
+                async for line in response.aiter_lines():
+                    if not line.startswith("data:"):
+                        continue
+                    payload = line[5:].strip()
+                    if payload == "[DONE]":
+                        break
+                    choices = json.loads(payload).get("choices") or []
+                    delta = choices[0].get("delta", {}).get("content") if choices else None
+                    if delta:
+                        parts.append(delta)
+                        yield delta
         except Exception as e:
-            logger.error(f"AI服务调用失败: {str(e)}")
-            # 降级到模拟响应
-            return self._get_mock_response(user_message, context)
+            logger.error(f"AI流式调用失败: {str(e)}")
+            if not parts:
+                yield self._get_mock_response(user_message, context)
+            return
+        
+        # 完整输出后写入缓存
+        if key is not None and parts:
+            self._reply_cache.set(key, "".join(parts))
+    
+    async def summarize(self, previous_summary: Optional[str], messages: List[Dict[str, str]]) -> str:
+        """
+        将较早的对话压缩为摘要（与已有摘要合并）
+        
+        未配置 API Key 或调用失败时，退化为保留用户提问要点的摘要。
+        """
+        dialogue = "\n".join(
+            f"{'用户' if m['role'] == 'user' else '助手'}: {m['content']}" for m in messages
+        )
+        
+        if self.api_key:
+            prompt = [
+                {"role": "system", "content": (
+                    "你负责压缩健康咨询对话。请将已有摘要和新增对话合并为一段不超过300字的中文摘要，"
+                    "保留用户的问题、身体状况、饮食运动习惯以及已给出的关键建议，不要编造内容。"
+                )},
+                {"role": "user", "content": f"已有摘要：\n{previous_summary or '无'}\n\n新增对话：\n{dialogue}"},
+            ]
+            reply = await self._complete(prompt, max_tokens=500)
+            if reply:
+                return reply.strip()
+        
+        lines = previous_summary.splitlines() if previous_summary else []
+        lines += [f"- 用户询问: {m['content'][:60]}" for m in messages if m["role"] == "user"]
+        # 只保留最近的要点，避免摘要无限增长
+        while len(lines) > 1 and sum(len(line) for line in lines) > 600:
+            lines.pop(0)
+        return "\n".join(lines)
     
     def _get_mock_response(self, message: str, context: Optional[Dict[str, Any]] = None) -> str:
         """获取模拟响应（API不可用时的降级方案）"""
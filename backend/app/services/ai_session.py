@@ -0,0 +1,73 @@
+"""
+AI 会话服务
+
+对话记录写入 ai_chat_records 的同时维护 ai_chat_sessions（标题、最后消息、消息数），
+会话列表只需按 (user_id, last_message_at) 索引读取一页。
+"""
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import delete, func
+from sqlalchemy.dialects.mysql import insert as mysql_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.system import AIChatRecord, AIChatSession
+
+
+async def add_message(
+    db: AsyncSession,
+    user_id: int,
+    session_id: str,
+    role: str,
+    content: str,
+) -> AIChatRecord:
+    """
+    保存一条对话记录并更新会话汇总（不提交事务）
+    """
+    now = datetime.now()
+    record = AIChatRecord(
+        user_id=user_id,
+        session_id=session_id,
+        role=role,
+        content=content,
+        created_at=now,
+    )
+    db.add(record)
+    # 写入记录以获得ID（供对话窗口使用）
+    await db.flush()
+
+    stmt = mysql_insert(AIChatSession).values(
+        user_id=user_id,
+        session_id=session_id,
+        title=content[:100] if role == "user" else "",
+        last_message=content[:255],
+        message_count=1,
+        created_at=now,
+        last_message_at=now,
+    )
+    await db.execute(stmt.on_duplicate_key_update(
+        # 标题取第一条用户消息
+        title=func.if_(AIChatSession.title == "", stmt.inserted.title, AIChatSession.title),
+        last_message=stmt.inserted.last_message,
+        message_count=AIChatSession.message_count + 1,
+        last_message_at=stmt.inserted.last_message_at,
+    ))
+    return record
+
+
+async def delete_sessions(db: AsyncSession, user_id: int, session_id: Optional[str] = None) -> int:
+    """
+    删除用户的会话及对话记录（不传 session_id 删除全部，不提交事务）
+
+    Returns:
+        删除的消息数
+    """
+    record_conditions = [AIChatRecord.user_id == user_id]
+    session_conditions = [AIChatSession.user_id == user_id]
+    if session_id is not None:
+        record_conditions.append(AIChatRecord.session_id == session_id)
+        session_conditions.append(AIChatSession.session_id == session_id)
+
+    result = await db.execute(delete(AIChatRecord).where(*record_conditions))
+    await db.execute(delete(AIChatSession).where(*session_conditions))
+    return result.rowcount
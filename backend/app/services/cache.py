@@ -0,0 +1,290 @@
+"""
+通用缓存服务
+
+两级缓存，用于读多写少的目录类接口（商品分类、商品详情、轮播图、话题等）：
+- 一级缓存：进程内 LRU（启用 Redis 时有效期很短，其他进程最多在该时间内读到旧数据）
+- 二级缓存：Redis（配置 REDIS_URL 时启用，多进程共享）
+
+按标签失效：写入时登记条目所属标签，invalidate_tags() 删除标签下的全部条目。
+防击穿：同一进程内相同 key 只加载一次；启用 Redis 时通过短期锁让其他进程等待结果。
+过期时间带随机抖动，避免大量条目同时过期。
+
+缓存值需可 JSON 序列化。本地测试可传入 FakeRedis 模拟二级缓存：
+
+    cache = Cache(redis=FakeRedis())
+"""
+import asyncio
+import functools
+import inspect
+import json
+import logging
+import random
+import time
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Set
+
+from app.redis_client import get_redis
+from app.utils.lru import TTLCache
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = "cache:"
+TAG_PREFIX = "cache:tag:"
+
+# 启用 Redis 时一级缓存的最长有效期（秒）
+LOCAL_TTL_WITH_REDIS = 5
+
+# 跨进程加载锁：有效期（毫秒）与等待间隔（秒）
+LOCK_TTL_MS = 5000
+LOCK_POLL_INTERVAL = 0.05
+
+_MISSING = object()
+
+# 常用标签
+TAG_PRODUCT = "shop:product"            # 全部商品详情
+TAG_PRODUCT_CATEGORY = "shop:category"  # 商品分类
+TAG_COURSE = "course"
+TAG_TOPIC = "community:topic"
+TAG_POST = "community:post"
+TAG_BANNER = "banner"
+TAG_FOOD_LIBRARY = "food_library"
+
+
+def product_tag(product_id: int) -> str:
+    """单个商品详情的标签"""
+    return f"{TAG_PRODUCT}:{product_id}"
+
+
+def post_tag(post_id: int) -> str:
+    """单条动态详情的标签"""
+    return f"{TAG_POST}:{post_id}"
+
+
+class FakeRedis:
+    """进程内模拟的 Redis（仅实现缓存用到的命令，用于本地测试）"""
+
+    def __init__(self):
+        self._data: Dict[str, tuple] = {}
+
+    def _alive(self, key: str):
+        item = self._data.get(key)
+        if item is None:
+            return None
+        value, expires_at = item
+        if expires_at is not None and expires_at < time.monotonic():
+            del self._data[key]
+            return None
+        return value
+
+    async def get(self, key: str):
+        return self._alive(key)
+
+    async def set(self, key: str, value, ex: Optional[int] = None, px: Optional[int] = None, nx: bool = False):
+        if nx and self._alive(key) is not None:
+            return None
+        ttl = ex if ex is not None else (px / 1000 if px is not None else None)
+        self._data[key] = (value, time.monotonic() + ttl if ttl is not None else None)
+        return True
+
+    async def delete(self, *keys: str):
+        return sum(1 for key in keys if self._data.pop(key, None) is not None)
+
+    async def sadd(self, key: str, *members):
+        members_set = self._alive(key) or set()
+        members_set.update(members)
+        expires_at = self._data.get(key, (None, None))[1]
+        self._data[key] = (members_set, expires_at)
+        return len(members)
+
+    async def smembers(self, key: str):
+        return set(self._alive(key) or set())
+
+    async def expire(self, key: str, seconds: int):
+        value = self._alive(key)
+        if value is None:
+            return False
+        self._data[key] = (value, time.monotonic() + seconds)
+        return True
+
+
+class Cache:
+    """两级缓存"""
+
+    def __init__(self, redis: Any = _MISSING, maxsize: int = 5000):
+        """
+        Args:
+            redis: 二级缓存客户端，默认使用全局 Redis（未配置时仅使用一级缓存）
+            maxsize: 一级缓存最大条目数
+        """
+        self._redis = redis
+        self._local = TTLCache(maxsize=maxsize)
+        # 一级缓存的标签登记：标签 -> key 集合
+        self._local_tags: Dict[str, Set[str]] = {}
+        # 进行中的加载：key -> Task
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self.stats = {"hits": 0, "misses": 0, "loads": 0}
+
+    @property
+    def redis(self):
+        return get_redis() if self._redis is _MISSING else self._redis
+
+    @staticmethod
+    def _jitter(ttl: int) -> int:
+        return max(1, int(ttl * random.uniform(0.9, 1.1)))
+
+    def _local_ttl(self, ttl: int) -> float:
+        return ttl if self.redis is None else min(ttl, LOCAL_TTL_WITH_REDIS)
+
+    async def get(self, key: str, default: Any = None) -> Any:
+        """读取缓存，未命中返回 default"""
+        value = self._local.get(key, _MISSING)
+        if value is not _MISSING:
+            return value
+
+        redis = self.redis
+        if redis is not None:
+            try:
+                raw = await redis.get(KEY_PREFIX + key)
+                if raw is not None:
+                    value = json.loads(raw)
+                    self._local.set(key, value, ttl=LOCAL_TTL_WITH_REDIS)
+                    return value
+            except Exception as e:
+                logger.warning(f"读取缓存失败 {key}: {e}")
+        return default
+
+    async def set(self, key: str, value: Any, ttl: int = 300, tags: Iterable[str] = ()):
+        """写入缓存并登记标签"""
+        ttl = self._jitter(ttl)
+        tags = list(tags)
+        self._local.set(key, value, ttl=self._local_ttl(ttl))
+        for tag in tags:
+            self._local_tags.setdefault(tag, set()).add(key)
+
+        redis = self.redis
+        if redis is not None:
+            try:
+                await redis.set(KEY_PREFIX + key, json.dumps(value, ensure_ascii=False, default=str), ex=ttl)
+                for tag in tags:
+                    await redis.sadd(TAG_PREFIX + tag, key)
+                    await redis.expire(TAG_PREFIX + tag, ttl * 2)
+            except Exception as e:
+                logger.warning(f"写入缓存失败 {key}: {e}")
+
+    async def delete(self, *keys: str):
+        """删除缓存条目"""
+        for key in keys:
+            self._local.pop(key)
+        redis = self.redis
+        if redis is not None and keys:
+            try:
+                await redis.delete(*[KEY_PREFIX + key for key in keys])
+            except Exception as e:
+                logger.warning(f"删除缓存失败: {e}")
+
+    async def invalidate_tags(self, *tags: str):
+        """删除标签下的全部缓存条目"""
+        keys: Set[str] = set()
+        for tag in tags:
+            keys |= self._local_tags.pop(tag, set())
+
+        redis = self.redis
+        if redis is not None:
+            try:
+                for tag in tags:
+                    members = await redis.smembers(TAG_PREFIX + tag)
+                    keys |= {m.decode() if isinstance(m, bytes) else m for m in members}
+                await redis.delete(*[TAG_PREFIX + tag for tag in tags])
+            except Exception as e:
+                logger.warning(f"读取缓存标签失败: {e}")
+
+        if keys:
+            await self.delete(*keys)
+
+    async def get_or_load(
+        self,
+        key: str,
+        loader: Callable[[], Awaitable[Any]],
+        ttl: int = 300,
+        tags: Iterable[str] = (),
+    ) -> Any:
+        """
+        读取缓存，未命中时调用 loader 加载并写入（loader 返回 None 时不缓存）
+        """
+        value = await self.get(key, _MISSING)
+        if value is not _MISSING:
+            self.stats["hits"] += 1
+            return value
+        self.stats["misses"] += 1
+
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._load(key, loader, ttl, list(tags)))
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        return await asyncio.shield(task)
+
+    async def _load(self, key: str, loader, ttl: int, tags: List[str]) -> Any:
+        redis = self.redis
+        lock_key = f"{KEY_PREFIX}{key}:lock"
+        locked = False
+        if redis is not None:
+            try:
+                locked = bool(await redis.set(lock_key, "1", px=LOCK_TTL_MS, nx=True))
+                if not locked:
+                    # 其他进程正在加载，等待其结果
+                    deadline = time.monotonic() + LOCK_TTL_MS / 1000
+                    while time.monotonic() < deadline:
+                        await asyncio.sleep(LOCK_POLL_INTERVAL)
+                        value = await self.get(key, _MISSING)
+                        if value is not _MISSING:
+                            return value
+                        # 锁已释放但未写入缓存（如结果为空），自行加载
+                        if await redis.get(lock_key) is None:
+                            break
+            except Exception as e:
+                logger.warning(f"缓存加载锁失败 {key}: {e}")
+
+        try:
+            self.stats["loads"] += 1
+            value = await loader()
+            if value is not None:
+                await self.set(key, value, ttl=ttl, tags=tags)
+            return value
+        finally:
+            if locked:
+                try:
+                    await redis.delete(lock_key)
+                except Exception:
+                    pass
+
+    def cached(self, key: str, ttl: int = 300, tags: Iterable[str] = ()):
+        """
+        缓存装饰器，key 和 tags 为格式化模板，按被装饰函数的参数填充：
+
+            @cache.cached("shop:product:{product_id}", ttl=60, tags=["shop:product:{product_id}"])
+            async def load_product(db, product_id): ...
+
+        数据库会话等参数不参与 key，模板中未引用的参数不影响缓存。
+        """
+        def decorator(func):
+            signature = inspect.signature(func)
+
+            @functools.wraps(func)
+            async def wrapper(*args, **kwargs):
+                bound = signature.bind(*args, **kwargs)
+                bound.apply_defaults()
+                params = bound.arguments
+                return await self.get_or_load(
+                    key.format(**params),
+                    lambda: func(*args, **kwargs),
+                    ttl=ttl,
+                    tags=[tag.format(**params) for tag in tags],
+                )
+
+            return wrapper
+
+        return decorator
+
+
+# 全局实例
+cache = Cache()
@@ -0,0 +1,210 @@
+"""
+计数器服务
+
+浏览量、点赞数、评论数、粉丝数等计数不再在请求中读-改-写数据库行，
+而是先累加到缓冲区（配置 REDIS_URL 时为 Redis 哈希，否则在进程内），
+后台每 COUNTER_FLUSH_INTERVAL 秒批量执行一次：
+
+    UPDATE posts SET view_count = GREATEST(view_count + CASE id WHEN ... END, 0) WHERE id IN (...)
+
+热点动态的大量浏览只在刷新时更新一次行，不会在行锁上排队。
+读取计数时调用 merge() 把尚未刷新的增量合并到数据库值上（数据库计数不要缓存，
+否则增量落库后缓存的旧值与清空的缓冲合并会回退）。
+
+多进程部署请配置 Redis：进程内缓冲只对本进程的读取可见，进程异常退出时未刷新的增量会丢失。
+"""
+import asyncio
+import logging
+from collections import defaultdict
+from typing import Dict, Iterable
+
+from sqlalchemy import update, case, func
+
+from app.config import settings
+from app.database import async_session_maker
+from app.models.community import Post
+from app.models.user import User
+from app.redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+
+PENDING_PREFIX = "counter:pending:"
+FLUSHING_PREFIX = "counter:flushing:"
+FLUSH_LOCK_KEY = "counter:flush:lock"
+FLUSH_LOCK_TTL = 60
+
+# 单条 UPDATE 最多更新的行数
+FLUSH_BATCH_SIZE = 500
+
+# 计数器名称 -> 数据库列
+COUNTERS = {
+    "post.view_count": Post.view_count,
+    "post.like_count": Post.like_count,
+    "post.comment_count": Post.comment_count,
+    "user.follower_count": User.follower_count,
+    "user.following_count": User.following_count,
+}
+
+POST_VIEWS = "post.view_count"
+POST_LIKES = "post.like_count"
+POST_COMMENTS = "post.comment_count"
+USER_FOLLOWERS = "user.follower_count"
+USER_FOLLOWING = "user.following_count"
+
+
+class CounterService:
+    """缓冲计数器"""
+
+    def __init__(self):
+        # 进程内缓冲：计数器名称 -> {ID: 增量}（事件循环单线程，无需加锁）
+        self._pending: Dict[str, Dict[int, int]] = defaultdict(lambda: defaultdict(int))
+        # 正在写入数据库的增量（读取时同样需要合并）
+        self._flushing: Dict[str, Dict[int, int]] = {}
+        self._task = None
+
+    async def incr(self, name: str, obj_id: int, delta: int = 1):
+        """累加计数（写入缓冲区）"""
+        if name not in COUNTERS:
+            raise KeyError(f"未知计数器: {name}")
+        redis = get_redis()
+        if redis is not None:
+            try:
+                await redis.hincrby(PENDING_PREFIX + name, str(obj_id), delta)
+                return
+            except Exception as e:
+                logger.warning(f"写入计数缓冲失败，改用进程内缓冲: {e}")
+        self._pending[name][obj_id] += delta
+
+    async def pending(self, name: str, ids: Iterable[int]) -> Dict[int, int]:
+        """尚未写入数据库的增量"""
+        ids = [i for i in set(ids) if i is not None]
+        result: Dict[int, int] = defaultdict(int)
+        if not ids:
+            return result
+
+        for buffer in (self._pending.get(name, {}), self._flushing.get(name, {})):
+            for i in ids:
+                if i in buffer:
+                    result[i] += buffer[i]
+
+        redis = get_redis()
+        if redis is not None:
+            try:
+                keys = [str(i) for i in ids]
+                for prefix in (PENDING_PREFIX, FLUSHING_PREFIX):
+                    values = await redis.hmget(prefix + name, keys)
+                    for i, value in zip(ids, values):
+                        if value:
+                            result[i] += int(value)
+            except Exception as e:
+                logger.warning(f"读取计数缓冲失败: {e}")
+        return result
+
+    async def merge(self, name: str, objs: Iterable, attr: str) -> Dict[int, int]:
+        """
+        合并未刷新的增量
+
+        Args:
+            name: 计数器名称
+            objs: 带 id 属性的对象，如 Post、User
+            attr: 数据库中的计数属性名，如 "view_count"
+
+        Returns:
+            {ID: 当前计数}
+        """
+        objs = list(objs)
+        deltas = await self.pending(name, [o.id for o in objs])
+        return {o.id: max((getattr(o, attr) or 0) + deltas.get(o.id, 0), 0) for o in objs}
+
+    async def _apply(self, name: str, deltas: Dict[int, int]):
+        """批量写入数据库"""
+        column = COUNTERS[name]
+        table = column.class_
+        items = [(i, d) for i, d in deltas.items() if d]
+        async with async_session_maker() as session:
+            for start in range(0, len(items), FLUSH_BATCH_SIZE):
+                batch = dict(items[start:start + FLUSH_BATCH_SIZE])
+                await session.execute(
+                    update(table)
+                    .where(table.id.in_(batch.keys()))
+                    .values({column.key: func.greatest(column + case(batch, value=table.id), 0)})
+                    .execution_options(synchronize_session=False)
+                )
+            await session.commit()
+
+    async def _flush_local(self):
+        self._flushing, pending = dict(self._pending), self._pending
+        self._pending = defaultdict(lambda: defaultdict(int))
+        applied = set()
+        try:
+            for name, deltas in pending.items():
+                if deltas:
+                    await self._apply(name, deltas)
+                applied.add(name)
+        except Exception:
+            # 未写入的增量放回缓冲区，下次重试
+            for name, deltas in pending.items():
+                if name in applied:
+                    continue
+                for i, d in deltas.items():
+                    self._pending[name][i] += d
+            raise
+        finally:
+            self._flushing = {}
+
+    async def _flush_redis(self, redis):
+        # 多进程只需一个进程执行刷新
+        if not await redis.set(FLUSH_LOCK_KEY, "1", ex=FLUSH_LOCK_TTL, nx=True):
+            return
+        try:
+            for name in COUNTERS:
+                flushing_key = FLUSHING_PREFIX + name
+                # 上次刷新中断时先处理残留的增量
+                if not await redis.exists(flushing_key):
+                    if not await redis.exists(PENDING_PREFIX + name):
+                        continue
+                    await redis.rename(PENDING_PREFIX + name, flushing_key)
+                raw = await redis.hgetall(flushing_key)
+                deltas = {int(k): int(v) for k, v in raw.items()}
+                await self._apply(name, deltas)
+                await redis.delete(flushing_key)
+        finally:
+            await redis.delete(FLUSH_LOCK_KEY)
+
+    async def flush(self):
+        """把缓冲区的增量写入数据库"""
+        await self._flush_local()
+        redis = get_redis()
+        if redis is not None:
+            await self._flush_redis(redis)
+
+    async def _flush_loop(self):
+        while True:
+            await asyncio.sleep(settings.COUNTER_FLUSH_INTERVAL)
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error(f"计数写入数据库失败: {e}")
+
+    def start(self):
+        """启动后台定期刷新"""
+        if self._task is None:
+            self._task = asyncio.create_task(self._flush_loop())
+
+    async def stop(self):
+        """停止后台刷新并写入剩余增量"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        try:
+            await self.flush()
+        except Exception as e:
+            logger.error(f"计数写入数据库失败: {e}")
+
+
+# 全局实例
+counters = CounterService()
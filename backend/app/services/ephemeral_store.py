@@ -0,0 +1,173 @@
+"""
+临时键值存储
+
+保存验证码、限流计数、幂等键、短时锁等带有效期的数据：
+- 配置 REDIS_URL 时写入 Redis（SET EX），多进程共享
+- 否则（或 Redis 不可用时）写入进程内 TTL 表：条目数不超过 EPHEMERAL_STORE_MAXSIZE
+  （超出时淘汰最久未使用的条目），后台每 EPHEMERAL_STORE_SWEEP_INTERVAL 秒清除已过期的条目。
+  计数（incr）单独保存在上限为 EPHEMERAL_COUNTER_MAXSIZE 的表中，大量写入的验证码等数据
+  不会把限流计数挤出去
+
+值以 JSON 保存，各用途通过命名空间区分，Redis 键为 "<命名空间>:<键>"。
+"""
+import asyncio
+import json
+import logging
+from typing import Any, Optional, Tuple
+
+from app.config import settings
+from app.redis_client import get_redis
+from app.utils.lru import TTLCache
+
+logger = logging.getLogger(__name__)
+
+
+class LocalStore:
+    """进程内 TTL 表（所有命名空间共用，总条目数有上限）"""
+
+    def __init__(self):
+        self.data = TTLCache(maxsize=settings.EPHEMERAL_STORE_MAXSIZE)
+        # 计数单独存放，与数据互不淘汰
+        self.counters = TTLCache(maxsize=settings.EPHEMERAL_COUNTER_MAXSIZE)
+        self._task: Optional[asyncio.Task] = None
+
+    async def _sweep_loop(self):
+        while True:
+            await asyncio.sleep(settings.EPHEMERAL_STORE_SWEEP_INTERVAL)
+            purged = self.data.purge_expired() + self.counters.purge_expired()
+            if purged:
+                logger.debug(f"清除过期临时数据 {purged} 条")
+
+    def start(self):
+        """启动后台清理"""
+        if self._task is None:
+            self._task = asyncio.create_task(self._sweep_loop())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+# 全局实例
+local_store = LocalStore()
+
+
+class EphemeralStore:
+    """带有效期的键值存储"""
+
+    def __init__(self, namespace: str):
+        """
+        Args:
+            namespace: 命名空间，如 "verify_code"
+        """
+        self.namespace = namespace
+
+    def _key(self, key: str) -> str:
+        return f"{self.namespace}:{key}"
+
+    async def get(self, key: str) -> Any:
+        """获取值，不存在或已过期返回 None"""
+        full_key = self._key(key)
+        redis = get_redis()
+        if redis is not None:
+            try:
+                raw = await redis.get(full_key)
+                return json.loads(raw) if raw is not None else None
+            except Exception as e:
+                logger.warning(f"读取临时数据失败，改用进程内存储: {e}")
+        raw = local_store.data.get(full_key)
+        return json.loads(raw) if raw is not None else None
+
+    async def set(self, key: str, value: Any, ttl: int, nx: bool = False) -> bool:
+        """
+        写入值
+
+        Args:
+            ttl: 有效期（秒）
+            nx: 仅在键不存在时写入（可用作锁）
+
+        Returns:
+            是否写入
+        """
+        full_key = self._key(key)
+        raw = json.dumps(value, ensure_ascii=False)
+        redis = get_redis()
+        if redis is not None:
+            try:
+                return bool(await redis.set(full_key, raw, ex=ttl, nx=nx))
+            except Exception as e:
+                logger.warning(f"写入临时数据失败，改用进程内存储: {e}")
+        if nx and full_key in local_store.data:
+            return False
+        local_store.data.set(full_key, raw, ttl=ttl)
+        return True
+
+    async def delete(self, key: str):
+        """删除值"""
+        full_key = self._key(key)
+        local_store.data.pop(full_key)
+        local_store.counters.pop(full_key)
+        redis = get_redis()
+        if redis is not None:
+            try:
+                await redis.delete(full_key)
+            except Exception as e:
+                logger.warning(f"删除临时数据失败: {e}")
+
+    async def count(self, key: str) -> Tuple[int, int]:
+        """
+        读取计数（不累加）
+
+        Returns:
+            (当前次数, 剩余秒数)，计数不存在时为 (0, 0)
+        """
+        full_key = self._key(key)
+        redis = get_redis()
+        if redis is not None:
+            try:
+                raw = await redis.get(full_key)
+                if raw is None:
+                    return 0, 0
+                return int(raw), max(await redis.ttl(full_key), 1)
+            except Exception as e:
+                logger.warning(f"读取临时计数失败，改用进程内存储: {e}")
+
+        raw = local_store.counters.get(full_key)
+        remaining = local_store.counters.remaining(full_key)
+        if raw is None or remaining is None:
+            return 0, 0
+        return json.loads(raw), max(int(remaining), 1)
+
+    async def incr(self, key: str, ttl: int) -> Tuple[int, int]:
+        """
+        计数加一，首次计数时设置有效期（固定窗口）
+
+        Returns:
+            (当前次数, 剩余秒数)
+        """
+        full_key = self._key(key)
+        redis = get_redis()
+        if redis is not None:
+            try:
+                count = await redis.incr(full_key)
+                remaining = await redis.ttl(full_key)
+                if count == 1 or remaining < 0:
+                    await redis.expire(full_key, ttl)
+                    remaining = ttl
+                return count, remaining
+            except Exception as e:
+                logger.warning(f"临时计数失败，改用进程内存储: {e}")
+
+        raw = local_store.counters.get(full_key)
+        remaining = local_store.counters.remaining(full_key)
+        if raw is None or remaining is None:
+            count, remaining = 1, ttl
+        else:
+            count = json.loads(raw) + 1
+        local_store.counters.set(full_key, json.dumps(count), ttl=remaining)
+        return count, max(int(remaining), 1)
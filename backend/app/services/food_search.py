@@ -0,0 +1,63 @@
+"""
+食物库搜索
+
+两种后端（FOOD_SEARCH_BACKEND）：
+- memory：启动后在后台加载进程内 n-gram 索引，按 SEARCH_REFRESH_INTERVAL 检查
+  食物库是否变化（行数、最大ID、内容校验和），变化时重建；索引加载完成前回退到数据库查询
+- fulltext：使用 MySQL ngram 全文索引（需执行 migrate_add_food_library_fulltext.sql），
+  适合多进程部署或食物库很大、不宜每个进程都加载索引的场景
+"""
+from typing import Any
+
+from sqlalchemy import select, func
+
+from app.config import settings
+from app.models.food import FoodLibrary
+from app.services.search_index import IndexLoader
+
+BACKEND_MEMORY = "memory"
+BACKEND_FULLTEXT = "fulltext"
+
+
+def food_to_dict(f: Any) -> dict:
+    """食物库条目的返回格式"""
+    return {
+        "id": f.id,
+        "name": f.name,
+        "category": f.category,
+        "image": f.image,
+        "calories": f.calories,
+        "protein": float(f.protein),
+        "carbs": float(f.carbs),
+        "fat": float(f.fat),
+        "fiber": float(f.fiber),
+        "serving_size": f.serving_size,
+    }
+
+
+class FoodSearch(IndexLoader):
+    """食物库搜索索引"""
+
+    name = "食物搜索"
+
+    @property
+    def enabled(self) -> bool:
+        return settings.FOOD_SEARCH_BACKEND == BACKEND_MEMORY
+
+    async def load_signature(self, db) -> tuple:
+        """行数、最大ID和内容校验和（食物库没有更新时间字段）"""
+        checksum = func.sum(func.crc32(func.concat_ws(
+            "|", FoodLibrary.name, FoodLibrary.category, FoodLibrary.image, FoodLibrary.calories,
+            FoodLibrary.protein, FoodLibrary.carbs, FoodLibrary.fat, FoodLibrary.fiber,
+            FoodLibrary.serving_size,
+        )))
+        result = await db.execute(select(func.count(), func.max(FoodLibrary.id), checksum))
+        return tuple(result.one())
+
+    async def load_rows(self, db) -> list:
+        result = await db.execute(select(FoodLibrary))
+        return [(f.id, f.name, food_to_dict(f)) for f in result.scalars()]
+
+
+# 全局实例
+food_search = FoodSearch()
@@ -0,0 +1,283 @@
+"""
+排行榜服务
+
+维护以下排行榜（有序集合，分数越高排名越靠前）：
+- 积分榜：用户运动币 + 膳食币
+- 运动榜：本周运动时长（分钟），按周一日期分榜
+
+配置 REDIS_URL 时使用 Redis ZSET，多进程共享；否则使用进程内有序集合，
+仅适合单进程部署。榜单在写入接口中增量更新，丢失或不一致时可通过
+rebuild() / rebuild_leaderboard.py 从数据库重建。
+"""
+import logging
+from bisect import bisect_left, insort
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import select, func
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.user import User
+from app.models.sport import SportRecord
+from app.redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = "leaderboard:"
+POINTS_BOARD = "points"
+SPORT_BOARD = "sport"
+
+# 周榜保留时间（秒），覆盖本周与上一周
+WEEKLY_BOARD_TTL = 14 * 24 * 3600
+
+
+class MemorySortedSet:
+    """进程内有序集合，排名查询 O(log n)"""
+
+    def __init__(self):
+        self._scores: Dict[str, float] = {}
+        self._order: List[Tuple[float, str]] = []
+
+    def _remove(self, member: str):
+        score = self._scores.pop(member, None)
+        if score is not None:
+            idx = bisect_left(self._order, (-score, member))
+            del self._order[idx]
+
+    def set(self, member: str, score: float):
+        self._remove(member)
+        self._scores[member] = score
+        insort(self._order, (-score, member))
+
+    def incr(self, member: str, delta: float) -> float:
+        score = self._scores.get(member, 0) + delta
+        self.set(member, score)
+        return score
+
+    def remove(self, member: str):
+        self._remove(member)
+
+    def rank(self, member: str) -> Optional[Tuple[int, float]]:
+        score = self._scores.get(member)
+        if score is None:
+            return None
+        return bisect_left(self._order, (-score, member)), score
+
+    def range(self, start: int, stop: int) -> List[Tuple[str, float]]:
+        return [(m, -s) for s, m in self._order[start:stop]]
+
+    def __len__(self) -> int:
+        return len(self._order)
+
+
+class MemoryRankingStore:
+    """进程内榜单存储"""
+
+    def __init__(self):
+        self._sets: Dict[str, MemorySortedSet] = {}
+        self._built: set = set()
+
+    def _get(self, key: str) -> MemorySortedSet:
+        if key not in self._sets:
+            self._sets[key] = MemorySortedSet()
+        return self._sets[key]
+
+    async def incr(self, key: str, member: str, delta: float, ttl: Optional[int] = None):
+        self._get(key).incr(member, delta)
+
+    async def set(self, key: str, member: str, score: float):
+        self._get(key).set(member, score)
+
+    async def remove(self, key: str, member: str):
+        self._get(key).remove(member)
+
+    async def top(self, key: str, offset: int, limit: int) -> List[Tuple[str, float]]:
+        return self._get(key).range(offset, offset + limit)
+
+    async def rank(self, key: str, member: str) -> Optional[Tuple[int, float]]:
+        return self._get(key).rank(member)
+
+    async def count(self, key: str) -> int:
+        return len(self._get(key))
+
+    async def replace(self, key: str, mapping: Dict[str, float], ttl: Optional[int] = None):
+        board = MemorySortedSet()
+        for member, score in mapping.items():
+            board.set(member, score)
+        self._sets[key] = board
+        self._built.add(key)
+
+    async def is_built(self, key: str) -> bool:
+        return key in self._built
+
+
+class RedisRankingStore:
+    """Redis ZSET 榜单存储"""
+
+    def __init__(self, redis):
+        self.redis = redis
+
+    async def incr(self, key: str, member: str, delta: float, ttl: Optional[int] = None):
+        async with self.redis.pipeline(transaction=False) as pipe:
+            pipe.zincrby(key, delta, member)
+            if ttl:
+                pipe.expire(key, ttl)
+            await pipe.execute()
+
+    async def set(self, key: str, member: str, score: float):
+        await self.redis.zadd(key, {member: score})
+
+    async def remove(self, key: str, member: str):
+        await self.redis.zrem(key, member)
+
+    async def top(self, key: str, offset: int, limit: int) -> List[Tuple[str, float]]:
+        return await self.redis.zrevrange(key, offset, offset + limit - 1, withscores=True)
+
+    async def rank(self, key: str, member: str) -> Optional[Tuple[int, float]]:
+        async with self.redis.pipeline(transaction=False) as pipe:
+            pipe.zrevrank(key, member)
+            pipe.zscore(key, member)
+            rank, score = await pipe.execute()
+        if rank is None:
+            return None
+        return rank, score
+
+    async def count(self, key: str) -> int:
+        return await self.redis.zcard(key)
+
+    async def replace(self, key: str, mapping: Dict[str, float], ttl: Optional[int] = None):
+        # 先写临时键再原子替换，重建过程中读请求不受影响
+        tmp_key = f"{key}:rebuild"
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.delete(tmp_key)
+            if mapping:
+                pipe.zadd(tmp_key, mapping)
+                pipe.rename(tmp_key, key)
+            else:
+                pipe.delete(key)
+            pipe.set(f"{key}:built", 1)
+            if ttl:
+                pipe.expire(key, ttl)
+                pipe.expire(f"{key}:built", ttl)
+            await pipe.execute()
+
+    async def is_built(self, key: str) -> bool:
+        return bool(await self.redis.exists(f"{key}:built"))
+
+
+def get_week_start(day: Optional[date] = None) -> date:
+    """获取所在周的周一"""
+    day = day or date.today()
+    return day - timedelta(days=day.weekday())
+
+
+class LeaderboardService:
+    """排行榜服务"""
+
+    def __init__(self):
+        self._memory = MemoryRankingStore()
+
+    def _store(self):
+        redis = get_redis()
+        return RedisRankingStore(redis) if redis is not None else self._memory
+
+    def board_key(self, board: str, week_start: Optional[date] = None) -> str:
+        """获取榜单键名，周榜按周一日期区分"""
+        if board == SPORT_BOARD:
+            week_start = week_start or get_week_start()
+            return f"{KEY_PREFIX}{board}:{week_start.isoformat()}"
+        return f"{KEY_PREFIX}{board}"
+
+    # ---------- 增量更新 ----------
+
+    async def sync_points(self, user: User):
+        """同步用户积分（运动币 + 膳食币），禁用用户移出榜单"""
+        try:
+            store = self._store()
+            key = self.board_key(POINTS_BOARD)
+            if user.status == 1:
+                await store.set(key, str(user.id), user.sport_coins + user.food_coins)
+            else:
+                await store.remove(key, str(user.id))
+        except Exception as e:
+            logger.warning(f"更新积分榜失败: {e}")
+
+    async def add_sport_duration(self, user_id: int, duration: int, start_time: datetime):
+        """累加运动时长，只计入本周记录"""
+        week_start = get_week_start()
+        if not duration or start_time.date() < week_start or start_time.date() >= week_start + timedelta(days=7):
+            return
+        try:
+            await self._store().incr(
+                self.board_key(SPORT_BOARD, week_start), str(user_id), duration, ttl=WEEKLY_BOARD_TTL
+            )
+        except Exception as e:
+            logger.warning(f"更新运动榜失败: {e}")
+
+    # ---------- 查询 ----------
+
+    async def top(self, db: AsyncSession, board: str, offset: int, limit: int) -> List[Tuple[int, float]]:
+        """获取排行（用户ID, 分数）"""
+        key = self.board_key(board)
+        store = self._store()
+        await self._ensure_built(db, store, board, key)
+        rows = await store.top(key, offset, limit)
+        return [(int(member), score) for member, score in rows]
+
+    async def rank(self, db: AsyncSession, board: str, user_id: int) -> Optional[Tuple[int, float]]:
+        """获取用户名次（从 1 开始）和分数，不在榜单中返回 None"""
+        key = self.board_key(board)
+        store = self._store()
+        await self._ensure_built(db, store, board, key)
+        result = await store.rank(key, str(user_id))
+        if result is None:
+            return None
+        return result[0] + 1, result[1]
+
+    async def count(self, db: AsyncSession, board: str) -> int:
+        """获取榜单人数"""
+        key = self.board_key(board)
+        store = self._store()
+        await self._ensure_built(db, store, board, key)
+        return await store.count(key)
+
+    # ---------- 重建 ----------
+
+    async def _ensure_built(self, db: AsyncSession, store, board: str, key: str):
+        """榜单未初始化（进程重启、Redis 数据丢失、新的一周）时从数据库重建"""
+        if not await store.is_built(key):
+            await self.rebuild_board(db, board, store)
+
+    async def rebuild_board(self, db: AsyncSession, board: str, store=None):
+        """从数据库重建单个榜单"""
+        store = store or self._store()
+
+        if board == POINTS_BOARD:
+            result = await db.execute(
+                select(User.id, User.sport_coins + User.food_coins).where(User.status == 1)
+            )
+            mapping = {str(row[0]): row[1] or 0 for row in result.fetchall()}
+            await store.replace(self.board_key(POINTS_BOARD), mapping)
+
+        elif board == SPORT_BOARD:
+            week_start = get_week_start()
+            week_start_time = datetime.combine(week_start, datetime.min.time())
+            result = await db.execute(
+                select(SportRecord.user_id, func.sum(SportRecord.duration)).where(
+                    SportRecord.start_time >= week_start_time,
+                    SportRecord.start_time < week_start_time + timedelta(days=7),
+                ).group_by(SportRecord.user_id)
+            )
+            mapping = {str(row[0]): int(row[1] or 0) for row in result.fetchall()}
+            await store.replace(self.board_key(SPORT_BOARD, week_start), mapping, ttl=WEEKLY_BOARD_TTL)
+
+        logger.info(f"排行榜已重建: {board}")
+
+    async def rebuild(self, db: AsyncSession):
+        """重建全部榜单"""
+        for board in (POINTS_BOARD, SPORT_BOARD):
+            await self.rebuild_board(db, board)
+
+
+# 全局实例
+leaderboard = LeaderboardService()
@@ -0,0 +1,65 @@
+"""
+登录限流
+
+按用户名和来源 IP 分别统计 LOGIN_LOCK_MINUTES 内的登录尝试次数，超过上限后拒绝登录，
+在验证密码之前计数，同一时刻涌入的大量尝试也只有前几次会进入密码校验；
+来源 IP 已达上限时直接拒绝，不再为请求中的用户名创建计数。
+登录成功后清除该用户名的计数（IP 计数不清除，避免用一个有效账号反复重置）。
+
+计数保存在临时键值存储中（配置 REDIS_URL 时在多进程间共享）。
+"""
+from typing import Optional, Tuple
+
+from app.config import settings
+from app.services.ephemeral_store import EphemeralStore
+
+
+class LoginThrottle:
+    """登录尝试计数"""
+
+    def __init__(self, scope: str):
+        """
+        Args:
+            scope: 区分不同登录入口，如 "admin"
+        """
+        self.scope = scope
+        self._store = EphemeralStore(f"login:attempts:{scope}")
+
+    @property
+    def _window(self) -> int:
+        return settings.LOGIN_LOCK_MINUTES * 60
+
+    def _keys(self, username: str, ip: Optional[str]) -> Tuple[Tuple[str, int], ...]:
+        keys = ((f"user:{username.lower()}", settings.LOGIN_MAX_ATTEMPTS_PER_USER),)
+        if ip:
+            keys += ((f"ip:{ip}", settings.LOGIN_MAX_ATTEMPTS_PER_IP),)
+        return keys
+
+    async def hit(self, username: str, ip: Optional[str]) -> int:
+        """
+        记录一次登录尝试
+
+        Returns:
+            需等待的秒数，0 表示允许尝试
+        """
+        keys = self._keys(username, ip)
+        # 来源 IP 已达上限时直接拒绝，不再为请求中的用户名创建计数
+        for key, limit in keys[1:]:
+            count, ttl = await self._store.count(key)
+            if count >= limit:
+                return ttl
+
+        retry_after = 0
+        for key, limit in keys:
+            count, ttl = await self._store.incr(key, self._window)
+            if count > limit:
+                retry_after = max(retry_after, ttl, 1)
+        return retry_after
+
+    async def reset(self, username: str):
+        """登录成功后清除用户名计数"""
+        await self._store.delete(self._keys(username, None)[0][0])
+
+
+# 后台管理员登录
+admin_login_throttle = LoginThrottle("admin")
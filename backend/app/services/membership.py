@@ -0,0 +1,73 @@
+"""
+关系批量检查服务
+
+回答"这批目标中，用户关联了哪些"这类问题，例如：
+- 当前用户点赞了哪些动态
+- 当前用户收藏了哪些课程/商品
+- 当前用户关注了哪些用户
+
+查询条件同时带上 user_id 和目标 ID 列表，结果集大小不超过本次传入的 ID 数量，
+与用户历史关系的总量无关。
+"""
+from typing import Iterable, Set
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.community import PostLike, UserFollow
+from app.models.course import UserCourseCollect
+from app.models.shop import ProductCollect
+
+
+class MembershipChecker:
+    """(user_id, target_id) 关系检查器"""
+
+    def __init__(self, user_column, target_column):
+        """
+        Args:
+            user_column: 用户ID列，如 PostLike.user_id
+            target_column: 目标ID列，如 PostLike.post_id
+        """
+        self.user_column = user_column
+        self.target_column = target_column
+
+    async def check(self, db: AsyncSession, user_id: int, target_ids: Iterable[int]) -> Set[int]:
+        """
+        批量检查
+
+        Args:
+            db: 数据库会话
+            user_id: 用户ID
+            target_ids: 待检查的目标ID
+
+        Returns:
+            用户已关联的目标ID集合
+        """
+        ids = {i for i in target_ids if i is not None}
+        if not user_id or not ids:
+            return set()
+
+        result = await db.execute(
+            select(self.target_column).where(
+                self.user_column == user_id,
+                self.target_column.in_(ids)
+            )
+        )
+        return {row[0] for row in result.fetchall()}
+
+    async def contains(self, db: AsyncSession, user_id: int, target_id: int) -> bool:
+        """检查单个目标"""
+        return target_id in await self.check(db, user_id, [target_id])
+
+
+# 动态点赞
+post_likes = MembershipChecker(PostLike.user_id, PostLike.post_id)
+
+# 用户关注
+user_follows = MembershipChecker(UserFollow.user_id, UserFollow.follow_user_id)
+
+# 课程收藏
+course_collects = MembershipChecker(UserCourseCollect.user_id, UserCourseCollect.course_id)
+
+# 商品收藏
+product_collects = MembershipChecker(ProductCollect.user_id, ProductCollect.product_id)
@@ -0,0 +1,32 @@
+"""
+订单服务
+
+小程序端与管理端共用的订单查询工具
+"""
+from sqlalchemy import Select
+from sqlalchemy.orm import selectinload
+
+from app.models.order import Order, OrderItem
+
+
+def with_items(query: Select) -> Select:
+    """
+    为订单查询附加明细批量加载
+
+    使用 selectin 策略：主查询返回后，按本批订单 ID 发起一次 IN 查询取回全部明细，
+    查询次数与订单数量无关，明细通过 order.items 访问。
+    """
+    return query.options(selectinload(Order.items))
+
+
+def serialize_item(item: OrderItem) -> dict:
+    """订单明细数据"""
+    return {
+        "id": item.id,
+        "product_id": item.product_id,
+        "product_name": item.product_name,
+        "product_image": item.product_image,
+        "spec_name": item.spec_name,
+        "price": float(item.price),
+        "quantity": item.quantity,
+    }
@@ -0,0 +1,144 @@
+"""
+商品搜索
+
+对上架商品的名称、副标题、健康标签、适用人群标签建立进程内 n-gram 索引（见 search_index），
+一次遍历完成筛选（分类、推荐、标签、价格）、分面统计（分类、标签、价格区间）和排序，
+商品列表只需按 ID 读取当前页。
+
+后台管理增删改商品时调用 upsert/remove 增量更新本进程索引，
+其他进程按 SEARCH_REFRESH_INTERVAL 检查 (上架数, 最大更新时间) 变化后重建。
+"""
+from collections import Counter
+from typing import Any, List, Optional, Tuple
+
+from sqlalchemy import select, func
+
+from app.models.shop import Product
+from app.services.search_index import IndexLoader
+
+# 价格区间（左闭右开，None 表示无上限）
+PRICE_BANDS = [(0, 50), (50, 100), (100, 200), (200, 500), (500, None)]
+
+
+def price_band(price: float) -> str:
+    """价格所属区间的名称，如 "50-100"、"500+" """
+    for low, high in PRICE_BANDS:
+        if high is None or price < high:
+            return f"{low}+" if high is None else f"{low}-{high}"
+    return ""
+
+
+def _tags(value: Any) -> List[str]:
+    return [str(t) for t in value] if isinstance(value, list) else []
+
+
+class ProductSearch(IndexLoader):
+    """商品搜索索引"""
+
+    name = "商品搜索"
+
+    @staticmethod
+    def _row(p: Product) -> tuple:
+        health_tags = _tags(p.health_tags)
+        suitable_tags = _tags(p.suitable_tags)
+        payload = {
+            "id": p.id,
+            "category_id": p.category_id,
+            "current_price": float(p.current_price),
+            "sales_count": p.sales_count or 0,
+            "is_recommend": p.is_recommend or 0,
+            "sort_order": p.sort_order or 0,
+            "tags": health_tags + suitable_tags,
+        }
+        return p.id, p.name, payload, [p.subtitle or ""] + health_tags + suitable_tags
+
+    async def load_signature(self, db) -> tuple:
+        result = await db.execute(
+            select(func.count(), func.max(Product.updated_at)).where(Product.is_on_sale == 1)
+        )
+        return tuple(result.one())
+
+    async def load_rows(self, db) -> list:
+        result = await db.execute(select(Product).where(Product.is_on_sale == 1))
+        return [self._row(p) for p in result.scalars()]
+
+    def upsert(self, product: Product):
+        """商品新增或修改后更新索引（下架则移除）"""
+        if product.is_on_sale:
+            self.index.add(*self._row(product))
+        else:
+            self.index.remove(product.id)
+
+    def remove(self, product_id: int):
+        self.index.remove(product_id)
+
+    def query(
+        self,
+        keyword: Optional[str] = None,
+        category_id: Optional[int] = None,
+        is_recommend: Optional[int] = None,
+        tag: Optional[str] = None,
+        min_price: Optional[float] = None,
+        max_price: Optional[float] = None,
+        sort: str = "default",
+        offset: int = 0,
+        limit: int = 10,
+    ) -> Tuple[List[int], int, dict]:
+        """
+        搜索商品
+
+        有关键词且默认排序时按相关度排序，否则与数据库查询的排序规则一致。
+
+        Returns:
+            (当前页商品ID, 总数, 分面统计 {"category", "tag", "price_band"})
+        """
+        if keyword:
+            docs, _ = self.index.search(keyword, limit=None)
+        else:
+            docs = self.index.all()
+
+        categories: Counter = Counter()
+        tags: Counter = Counter()
+        bands: Counter = Counter()
+        matched = []
+        for d in docs:
+            if category_id and d["category_id"] != category_id:
+                continue
+            if is_recommend is not None and d["is_recommend"] != is_recommend:
+                continue
+            if tag and tag not in d["tags"]:
+                continue
+            price = d["current_price"]
+            if min_price is not None and price < min_price:
+                continue
+            if max_price is not None and price > max_price:
+                continue
+
+            matched.append(d)
+            categories[d["category_id"]] += 1
+            tags.update(set(d["tags"]))
+            bands[price_band(price)] += 1
+
+        if sort == "sales":
+            matched.sort(key=lambda d: (-d["sales_count"], -d["id"]))
+        elif sort == "price_asc":
+            matched.sort(key=lambda d: (d["current_price"], -d["id"]))
+        elif sort == "price_desc":
+            matched.sort(key=lambda d: (-d["current_price"], -d["id"]))
+        elif not keyword:
+            matched.sort(key=lambda d: (-d["is_recommend"], -d["sort_order"], -d["id"]))
+
+        facets = {
+            "category": [{"id": k, "count": v} for k, v in categories.most_common()],
+            "tag": [{"name": k, "count": v} for k, v in tags.most_common()],
+            "price_band": [
+                {"name": name, "count": bands[name]}
+                for name in (price_band(low) for low, _ in PRICE_BANDS) if bands[name]
+            ],
+        }
+        page = [d["id"] for d in matched[offset:offset + limit]]
+        return page, len(matched), facets
+
+
+# 全局实例
+product_search = ProductSearch()
@@ -0,0 +1,200 @@
+"""
+统计汇总服务
+
+维护 daily_stats（全站每日）和 user_daily_stats（用户每日）两张汇总表：
+- 写接口在同一事务内调用 incr_daily / incr_user_daily 做增量累加
+- rebuild_day 从原始记录重新计算某一天，用于每日对账和历史回填（见 rebuild_stats.py）
+
+统计接口读取汇总表，查询量只与统计天数相关，与原始记录数量无关。
+"""
+import logging
+from datetime import date, datetime, timedelta
+from typing import Dict, List
+
+from sqlalchemy import select, func, delete, insert, case
+from sqlalchemy.dialects.mysql import insert as mysql_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.user import User
+from app.models.order import Order
+from app.models.health import HealthScreening
+from app.models.sport import SportRecord
+from app.models.food import FoodRecord
+from app.models.points import CheckinRecord
+from app.models.stats import DailyStats, UserDailyStats
+
+logger = logging.getLogger(__name__)
+
+# 计入成交金额的订单状态
+PAID_STATUSES = ["paid", "shipped", "received", "completed"]
+
+DAILY_FIELDS = [
+    "new_users", "order_count", "order_amount", "screening_count",
+    "sport_count", "food_count", "checkin_count",
+]
+
+USER_DAILY_FIELDS = [
+    "sport_count", "sport_duration", "sport_calories", "sport_distance",
+    "food_count", "food_calories", "protein", "carbs", "fat", "checkin_count",
+]
+
+
+async def _upsert_incr(db: AsyncSession, model, keys: dict, deltas: dict):
+    """INSERT ... ON DUPLICATE KEY UPDATE 累加"""
+    deltas = {k: v for k, v in deltas.items() if v}
+    if not deltas:
+        return
+
+    stmt = mysql_insert(model).values(**keys, **deltas)
+    updates = {k: getattr(model, k) + stmt.inserted[k] for k in deltas}
+    updates["updated_at"] = datetime.now()
+    await db.execute(stmt.on_duplicate_key_update(**updates))
+
+
+async def incr_daily(db: AsyncSession, stat_date: date, **deltas):
+    """
+    累加全站每日汇总（不提交事务，随业务数据一起提交）
+
+    Args:
+        db: 数据库会话
+        stat_date: 统计日期
+        **deltas: 字段增量，如 new_users=1
+    """
+    await _upsert_incr(db, DailyStats, {"stat_date": stat_date}, deltas)
+
+
+async def incr_user_daily(db: AsyncSession, user_id: int, stat_date: date, **deltas):
+    """累加用户每日汇总（不提交事务，随业务数据一起提交）"""
+    await _upsert_incr(db, UserDailyStats, {"user_id": user_id, "stat_date": stat_date}, deltas)
+
+
+async def rebuild_day(db: AsyncSession, day: date):
+    """
+    从原始记录重新计算某一天的汇总数据（覆盖已有数据，不提交事务）
+    """
+    start = datetime.combine(day, datetime.min.time())
+    end = start + timedelta(days=1)
+
+    # ---------- 全站每日 ----------
+    new_users = (await db.execute(
+        select(func.count()).select_from(User).where(User.created_at >= start, User.created_at < end)
+    )).scalar() or 0
+
+    order_count, order_amount = (await db.execute(
+        select(
+            func.count(),
+            func.sum(case((Order.status.in_(PAID_STATUSES), Order.pay_amount), else_=0)),
+        ).where(Order.created_at >= start, Order.created_at < end)
+    )).first()
+
+    screening_count = (await db.execute(
+        select(func.count()).select_from(HealthScreening).where(
+            HealthScreening.created_at >= start, HealthScreening.created_at < end
+        )
+    )).scalar() or 0
+
+    sport_count = (await db.execute(
+        select(func.count()).select_from(SportRecord).where(
+            SportRecord.created_at >= start, SportRecord.created_at < end
+        )
+    )).scalar() or 0
+
+    food_count = (await db.execute(
+        select(func.count()).select_from(FoodRecord).where(
+            FoodRecord.created_at >= start, FoodRecord.created_at < end
+        )
+    )).scalar() or 0
+
+    checkin_count = (await db.execute(
+        select(func.count()).select_from(CheckinRecord).where(CheckinRecord.checkin_date == day)
+    )).scalar() or 0
+
+    await db.execute(delete(DailyStats).where(DailyStats.stat_date == day))
+    db.add(DailyStats(
+        stat_date=day,
+        new_users=new_users,
+        order_count=order_count or 0,
+        order_amount=order_amount or 0,
+        screening_count=screening_count,
+        sport_count=sport_count,
+        food_count=food_count,
+        checkin_count=checkin_count,
+    ))
+
+    # ---------- 用户每日 ----------
+    user_rows: Dict[int, dict] = {}
+
+    def row(user_id: int) -> dict:
+        if user_id not in user_rows:
+            user_rows[user_id] = {"user_id": user_id, "stat_date": day, **{f: 0 for f in USER_DAILY_FIELDS}}
+        return user_rows[user_id]
+
+    sport_result = await db.execute(
+        select(
+            SportRecord.user_id,
+            func.count(),
+            func.sum(SportRecord.duration),
+            func.sum(SportRecord.calories),
+            func.sum(SportRecord.distance),
+        ).where(
+            SportRecord.start_time >= start, SportRecord.start_time < end
+        ).group_by(SportRecord.user_id)
+    )
+    for user_id, count, duration, calories, distance in sport_result.fetchall():
+        r = row(user_id)
+        r["sport_count"] = count
+        r["sport_duration"] = duration or 0
+        r["sport_calories"] = calories or 0
+        r["sport_distance"] = distance or 0
+
+    food_result = await db.execute(
+        select(
+            FoodRecord.user_id,
+            func.count(),
+            func.sum(FoodRecord.calories),
+            func.sum(FoodRecord.protein),
+            func.sum(FoodRecord.carbs),
+            func.sum(FoodRecord.fat),
+        ).where(FoodRecord.record_date == day).group_by(FoodRecord.user_id)
+    )
+    for user_id, count, calories, protein, carbs, fat in food_result.fetchall():
+        r = row(user_id)
+        r["food_count"] = count
+        r["food_calories"] = calories or 0
+        r["protein"] = protein or 0
+        r["carbs"] = carbs or 0
+        r["fat"] = fat or 0
+
+    checkin_result = await db.execute(
+        select(CheckinRecord.user_id, func.count()).where(
+            CheckinRecord.checkin_date == day
+        ).group_by(CheckinRecord.user_id)
+    )
+    for user_id, count in checkin_result.fetchall():
+        row(user_id)["checkin_count"] = count
+
+    await db.execute(delete(UserDailyStats).where(UserDailyStats.stat_date == day))
+    if user_rows:
+        await db.execute(insert(UserDailyStats), list(user_rows.values()))
+
+    logger.info(f"统计汇总已重建: {day}")
+
+
+async def get_daily_stats(db: AsyncSession, start: date, end: date) -> Dict[date, DailyStats]:
+    """读取全站每日汇总 [start, end]"""
+    result = await db.execute(
+        select(DailyStats).where(DailyStats.stat_date >= start, DailyStats.stat_date <= end)
+    )
+    return {r.stat_date: r for r in result.scalars().all()}
+
+
+async def sum_user_stats(db: AsyncSession, user_id: int, start: date, fields: List[str]) -> dict:
+    """汇总用户自 start 起的各项指标"""
+    result = await db.execute(
+        select(*[func.sum(getattr(UserDailyStats, f)) for f in fields]).where(
+            UserDailyStats.user_id == user_id,
+            UserDailyStats.stat_date >= start,
+        )
+    )
+    values = result.first()
+    return {f: values[i] or 0 for i, f in enumerate(fields)}
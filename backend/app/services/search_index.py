@@ -0,0 +1,303 @@
+"""
+进程内 n-gram 搜索索引
+
+对名称建立单字 + 二元组（bigram）倒排索引，查询时取各二元组倒排表的交集再做子串校验，
+不依赖 LIKE '%kw%' 全表扫描。安装 pypinyin 时同时索引全拼和首字母，
+支持 "xihongshi"、"xhs" 这类输入；副标题、标签等附加文本单独索引，匹配等级最低。
+
+结果按匹配程度排序：完全匹配 > 前缀 > 包含 > 拼音前缀 > 拼音包含 > 首字母 > 附加文本，
+同级按名称长度、名称排序。相同查询的排序结果会缓存，索引变化时清空。
+
+IndexLoader 负责在后台加载索引并定期检查数据变化后重建。
+"""
+import asyncio
+import logging
+import unicodedata
+from abc import ABC, abstractmethod
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from app.config import settings
+from app.database import async_session_maker
+from app.utils.lru import TTLCache
+
+logger = logging.getLogger(__name__)
+
+try:
+    from pypinyin import lazy_pinyin, Style
+except ImportError:  # 未安装时不支持拼音搜索
+    lazy_pinyin = None
+
+# 匹配等级（越小越靠前）
+RANK_EXACT = 0
+RANK_PREFIX = 1
+RANK_CONTAINS = 2
+RANK_PINYIN_PREFIX = 3
+RANK_PINYIN_CONTAINS = 4
+RANK_INITIALS = 5
+RANK_TEXT = 6
+
+_EMPTY: frozenset = frozenset()
+
+
+def normalize(text: str) -> str:
+    """统一全半角、大小写，只保留文字和数字"""
+    text = unicodedata.normalize("NFKC", text or "").lower()
+    return "".join(ch for ch in text if ch.isalnum())
+
+
+def to_pinyin(text: str) -> Tuple[str, str]:
+    """返回 (全拼, 首字母)，未安装 pypinyin 时返回空串"""
+    if lazy_pinyin is None or not text:
+        return "", ""
+    full = normalize("".join(lazy_pinyin(text)))
+    initials = normalize("".join(lazy_pinyin(text, style=Style.FIRST_LETTER)))
+    return full, initials
+
+
+def _grams(text: str) -> Set[str]:
+    """单字和二元组"""
+    grams = set(text)
+    grams.update(text[i:i + 2] for i in range(len(text) - 1))
+    return grams
+
+
+class _IndexState:
+    """一次构建的索引数据（整体替换，查询时无需加锁）"""
+
+    def __init__(self):
+        self.docs: Dict[int, Any] = {}
+        # 文档ID -> (名称, 全拼, 首字母, 附加文本)
+        self.keys: Dict[int, Tuple[str, str, str, Tuple[str, ...]]] = {}
+        self.name_grams: Dict[str, Set[int]] = {}
+        self.pinyin_grams: Dict[str, Set[int]] = {}
+        self.text_grams: Dict[str, Set[int]] = {}
+
+    def _indexes(self, keys: tuple):
+        key, full, initials, texts = keys
+        text_grams: Set[str] = set()
+        for text in texts:
+            text_grams |= _grams(text)
+        return (
+            (self.name_grams, _grams(key)),
+            (self.pinyin_grams, _grams(full) | _grams(initials)),
+            (self.text_grams, text_grams),
+        )
+
+    def add(self, doc_id: int, name: str, payload: Any, texts: Iterable[str] = ()):
+        keys = (normalize(name), *to_pinyin(name), tuple(t for t in map(normalize, texts) if t))
+        self.docs[doc_id] = payload
+        self.keys[doc_id] = keys
+        for index, grams in self._indexes(keys):
+            for gram in grams:
+                index.setdefault(gram, set()).add(doc_id)
+
+    def remove(self, doc_id: int):
+        keys = self.keys.pop(doc_id, None)
+        self.docs.pop(doc_id, None)
+        if keys is None:
+            return
+        for index, grams in self._indexes(keys):
+            for gram in grams:
+                postings = index.get(gram)
+                if postings is not None:
+                    postings.discard(doc_id)
+                    if not postings:
+                        del index[gram]
+
+
+def _candidates(index: Dict[str, Set[int]], query: str) -> Set[int]:
+    """取查询各二元组倒排表的交集（从最短的开始）"""
+    grams = {query} if len(query) == 1 else {query[i:i + 2] for i in range(len(query) - 1)}
+    postings = [index.get(gram, _EMPTY) for gram in grams]
+    postings.sort(key=len)
+    if not postings or not postings[0]:
+        return set()
+    result = set(postings[0])
+    for p in postings[1:]:
+        result &= p
+        if not result:
+            break
+    return result
+
+
+class SearchIndex:
+    """名称搜索索引"""
+
+    def __init__(self, query_cache_size: int = 1000):
+        self._state = _IndexState()
+        self._ranked = TTLCache(maxsize=query_cache_size, ttl=3600)
+        self.ready = False
+
+    def __len__(self) -> int:
+        return len(self._state.docs)
+
+    def build(self, rows: Iterable[Tuple[int, str, Any]]):
+        """
+        全量构建索引（可在线程中执行，完成后整体替换）
+
+        Args:
+            rows: (文档ID, 名称, 返回数据[, 附加文本])
+        """
+        state = _IndexState()
+        for row in rows:
+            state.add(*row)
+        self._state = state
+        self._ranked.clear()
+        self.ready = True
+
+    def add(self, doc_id: int, name: str, payload: Any, texts: Iterable[str] = ()):
+        """新增或更新单个文档"""
+        self._state.remove(doc_id)
+        self._state.add(doc_id, name, payload, texts)
+        self._ranked.clear()
+
+    def remove(self, doc_id: int):
+        """删除单个文档"""
+        self._state.remove(doc_id)
+        self._ranked.clear()
+
+    def get(self, doc_id: int) -> Optional[Any]:
+        return self._state.docs.get(doc_id)
+
+    def all(self) -> List[Any]:
+        """全部文档的返回数据"""
+        return list(self._state.docs.values())
+
+    def _rank(self, state: _IndexState, query: str) -> List[int]:
+        ranks: Dict[int, int] = {}
+        for doc_id in _candidates(state.name_grams, query):
+            name = state.keys[doc_id][0]
+            if name == query:
+                ranks[doc_id] = RANK_EXACT
+            elif name.startswith(query):
+                ranks[doc_id] = RANK_PREFIX
+            elif query in name:
+                ranks[doc_id] = RANK_CONTAINS
+
+        # 拼音只匹配字母数字输入
+        if query.isascii():
+            for doc_id in _candidates(state.pinyin_grams, query):
+                if doc_id in ranks:
+                    continue
+                _, full, initials, _ = state.keys[doc_id]
+                if full.startswith(query):
+                    ranks[doc_id] = RANK_PINYIN_PREFIX
+                elif query in full:
+                    ranks[doc_id] = RANK_PINYIN_CONTAINS
+                elif query in initials:
+                    ranks[doc_id] = RANK_INITIALS
+
+        for doc_id in _candidates(state.text_grams, query):
+            if doc_id not in ranks and any(query in text for text in state.keys[doc_id][3]):
+                ranks[doc_id] = RANK_TEXT
+
+        return sorted(ranks, key=lambda i: (ranks[i], len(state.keys[i][0]), state.keys[i][0]))
+
+    def search(
+        self,
+        keyword: str,
+        offset: int = 0,
+        limit: Optional[int] = 20,
+        where: Optional[Callable[[Any], bool]] = None,
+    ) -> Tuple[List[Any], int]:
+        """
+        搜索
+
+        Args:
+            keyword: 关键词
+            offset/limit: 分页（limit 为 None 时返回全部）
+            where: 对返回数据的额外过滤条件
+
+        Returns:
+            (当前页返回数据, 总数)
+        """
+        state = self._state
+        query = normalize(keyword)
+        if not query:
+            return [], 0
+
+        # 缓存的排序结果记录所属的索引数据，后台重建替换索引后不再使用
+        cached = self._ranked.get(query)
+        if cached is not None and cached[0] is state:
+            ranked = cached[1]
+        else:
+            ranked = self._rank(state, query)
+            self._ranked.set(query, (state, ranked))
+
+        end = None if limit is None else offset + limit
+        if where is None:
+            # 只取当前页的返回数据，命中很多的查询不必逐条构造列表
+            return [state.docs[i] for i in ranked[offset:end]], len(ranked)
+        docs = [d for d in map(state.docs.__getitem__, ranked) if where(d)]
+        return docs[offset:end], len(docs)
+
+
+class IndexLoader(ABC):
+    """
+    搜索索引的后台加载与定期刷新
+
+    子类实现 load_signature（数据签名，变化时重建）和 load_rows（构建索引的数据）。
+    """
+
+    # 日志中的索引名称
+    name = "搜索"
+
+    def __init__(self):
+        self.index = SearchIndex()
+        self._signature: Optional[tuple] = None
+        self._task: Optional[asyncio.Task] = None
+        self._lock = asyncio.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return True
+
+    @abstractmethod
+    async def load_signature(self, db) -> tuple:
+        """数据签名，变化时重建索引"""
+
+    @abstractmethod
+    async def load_rows(self, db) -> list:
+        """构建索引的数据"""
+
+    async def refresh(self, force: bool = False) -> bool:
+        """
+        检查数据变化并重建索引
+
+        Returns:
+            是否重建
+        """
+        async with self._lock:
+            async with async_session_maker() as db:
+                signature = await self.load_signature(db)
+                if not force and self.index.ready and signature == self._signature:
+                    return False
+                rows = await self.load_rows(db)
+
+            # 构建索引是 CPU 密集操作，放到线程中避免阻塞事件循环
+            await asyncio.to_thread(self.index.build, rows)
+            self._signature = signature
+            logger.info(f"{self.name}索引已重建，共 {len(rows)} 条")
+            return True
+
+    async def _refresh_loop(self):
+        while True:
+            try:
+                await self.refresh()
+            except Exception as e:
+                logger.error(f"刷新{self.name}索引失败: {e}")
+            await asyncio.sleep(settings.SEARCH_REFRESH_INTERVAL)
+
+    def start(self):
+        """启动后台加载与定期刷新"""
+        if self.enabled and self._task is None:
+            self._task = asyncio.create_task(self._refresh_loop())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
@@ -0,0 +1,52 @@
+"""
+Token 校验缓存
+
+小程序客户端会用同一个 Token 发起大量请求，已验证过的 Token 按摘要缓存其载荷，
+重复请求不再做签名校验和 JSON 解析。缓存条目有效期为 TOKEN_CACHE_TTL 与 Token
+剩余有效期中的较小值。
+
+吊销检查不缓存，每次请求都经过 token_revocation（进程内完成），吊销后立即生效。
+"""
+import hashlib
+import time
+from typing import Optional
+
+from app.config import settings
+from app.utils.lru import TTLCache
+
+
+def token_digest(token: str) -> str:
+    return hashlib.blake2b(token.encode(), digest_size=16).hexdigest()
+
+
+def token_id(token: str, payload: dict) -> str:
+    """Token 的吊销标识：jti，旧 Token 没有 jti 时使用摘要"""
+    return payload.get("jti") or token_digest(token)
+
+
+class TokenCache:
+    """已验证 Token 的载荷缓存"""
+
+    def __init__(self, maxsize: int = 10000):
+        # 摘要 -> 载荷
+        self._verified = TTLCache(maxsize=maxsize)
+
+    def get(self, token: str) -> Optional[dict]:
+        """获取已验证的载荷，未缓存返回 None"""
+        return self._verified.get(token_digest(token))
+
+    def put(self, token: str, payload: dict):
+        """缓存已验证的载荷"""
+        ttl = settings.TOKEN_CACHE_TTL
+        exp = payload.get("exp")
+        if exp is not None:
+            ttl = min(ttl, exp - time.time())
+        if ttl > 0:
+            self._verified.set(token_digest(token), payload, ttl=ttl)
+
+    def pop(self, token: str):
+        self._verified.pop(token_digest(token))
+
+
+# 全局实例
+token_cache = TokenCache()
@@ -0,0 +1,191 @@
+"""
+Token 吊销登记
+
+每个 Token 带唯一的 jti，吊销分两种：
+- 单个 Token（退出登录）：记录 jti，直到 Token 过期
+- 账号下全部 Token（退出所有设备、禁用、注销）：记录时间点，此前签发（iat 更早）的 Token 均无效
+
+每个请求的检查都在进程内完成，不查询 MySQL：
+- 账号级吊销数量很少，完整保存在进程内
+- 单个 Token 的吊销先查进程内布隆过滤器，未命中（绝大多数请求）即可放行；
+  命中时再查精确集合（配置 Redis 时为 Redis 键，否则为进程内字典）
+
+配置 Redis 时吊销同时追加到 Redis 有序集合 auth:revocation_log，各进程每
+TOKEN_REVOCATION_SYNC_INTERVAL 秒拉取新增记录更新本地过滤器，并定期全量重建以剔除已过期的记录。
+"""
+import asyncio
+import logging
+import time
+from typing import Dict, Optional
+
+from app.config import settings
+from app.redis_client import get_redis
+from app.utils.bloom import BloomFilter
+
+logger = logging.getLogger(__name__)
+
+REVOKED_PREFIX = "auth:revoked:"
+LOG_KEY = "auth:revocation_log"
+
+# 全量重建本地过滤器的间隔（秒）
+FULL_SYNC_INTERVAL = 3600
+
+
+def subject_key(token_type: str, subject) -> str:
+    return f"{token_type}:{subject}"
+
+
+class RevocationRegistry:
+    """Token 吊销登记"""
+
+    def __init__(self):
+        self._bloom = BloomFilter(settings.TOKEN_REVOCATION_CAPACITY)
+        # 未配置 Redis 时的精确集合：jti -> 过期时间
+        self._revoked: Dict[str, float] = {}
+        # 账号 -> 时间戳，早于该时间签发的 Token 无效
+        self._not_before: Dict[str, int] = {}
+        self._synced_at = 0.0
+        self._full_synced_at = 0.0
+        self._task: Optional[asyncio.Task] = None
+        self.stats = {"bloom_hits": 0, "exact_lookups": 0}
+
+    @property
+    def _expire_seconds(self) -> int:
+        return settings.JWT_EXPIRE_MINUTES * 60
+
+    def _apply(self, member: str):
+        """应用一条吊销记录：jti:<jti>:<exp> 或 sub:<type>:<id>:<时间戳>"""
+        kind, rest = member.split(":", 1)
+        if kind == "jti":
+            jti, exp = rest.rsplit(":", 1)
+            self._bloom.add(jti)
+            if get_redis() is None:
+                self._revoked[jti] = float(exp)
+        elif kind == "sub":
+            key, ts = rest.rsplit(":", 1)
+            self._not_before[key] = max(self._not_before.get(key, 0), int(ts))
+
+    async def _record(self, member: str, redis_ops=None):
+        self._apply(member)
+        redis = get_redis()
+        if redis is None:
+            return
+        now = time.time()
+        try:
+            pipe = redis.pipeline()
+            if redis_ops:
+                redis_ops(pipe)
+            pipe.zadd(LOG_KEY, {member: now})
+            pipe.zremrangebyscore(LOG_KEY, "-inf", now - self._expire_seconds)
+            await pipe.execute()
+        except Exception as e:
+            logger.warning(f"写入 Token 吊销记录失败: {e}")
+
+    async def revoke(self, jti: str, exp: Optional[float]):
+        """吊销单个 Token"""
+        exp = exp or time.time() + self._expire_seconds
+        ttl = max(int(exp - time.time()), 1)
+        await self._record(
+            f"jti:{jti}:{int(exp)}",
+            lambda pipe: pipe.set(REVOKED_PREFIX + jti, 1, ex=ttl),
+        )
+
+    async def revoke_subject(self, token_type: str, subject_id: int):
+        """吊销账号当前已签发的全部 Token"""
+        # iat 精度为秒，与吊销同一秒内签发的 Token 不受影响（重新登录立即可用）
+        await self._record(f"sub:{subject_key(token_type, subject_id)}:{int(time.time())}")
+
+    async def is_revoked(self, payload: dict, jti: str) -> bool:
+        """
+        检查 Token 是否已吊销
+
+        Args:
+            payload: Token 载荷
+            jti: Token ID（旧 Token 没有 jti 时由调用方传入 Token 摘要）
+        """
+        not_before = self._not_before.get(subject_key(payload.get("type"), payload.get("sub")))
+        if not_before is not None and payload.get("iat", 0) < not_before:
+            return True
+
+        if jti not in self._bloom:
+            return False
+        self.stats["bloom_hits"] += 1
+
+        redis = get_redis()
+        if redis is None:
+            exp = self._revoked.get(jti)
+            return exp is not None and exp > time.time()
+
+        self.stats["exact_lookups"] += 1
+        try:
+            return bool(await redis.exists(REVOKED_PREFIX + jti))
+        except Exception as e:
+            # 无法确认时按已吊销处理（布隆过滤器已命中）
+            logger.warning(f"读取 Token 吊销记录失败: {e}")
+            return True
+
+    def runtime_stats(self) -> dict:
+        return {
+            **self.stats,
+            "bloom_size": len(self._bloom),
+            "revoked_subjects": len(self._not_before),
+        }
+
+    def _prune_local(self):
+        """未配置 Redis 时清理已过期的记录并重建过滤器"""
+        now = time.time()
+        self._revoked = {jti: exp for jti, exp in self._revoked.items() if exp > now}
+        self._bloom = BloomFilter(max(settings.TOKEN_REVOCATION_CAPACITY, len(self._revoked) * 2))
+        for jti in self._revoked:
+            self._bloom.add(jti)
+        cutoff = now - self._expire_seconds
+        self._not_before = {k: ts for k, ts in self._not_before.items() if ts > cutoff}
+
+    async def sync(self, full: bool = False):
+        """从 Redis 拉取其他进程新增的吊销记录（full 时重建本地过滤器）"""
+        redis = get_redis()
+        now = time.time()
+        if redis is None:
+            if full:
+                self._prune_local()
+            return
+
+        start = now - self._expire_seconds if full else self._synced_at
+        # 包含等于上次同步时间的记录（重复应用无副作用），避免同一时刻写入的记录被漏掉
+        members = await redis.zrangebyscore(LOG_KEY, start, "+inf", withscores=True)
+        if full:
+            self._bloom = BloomFilter(max(settings.TOKEN_REVOCATION_CAPACITY, len(members) * 2))
+            self._not_before = {}
+            self._full_synced_at = now
+        for member, score in members:
+            if full and member.startswith("jti:") and float(member.rsplit(":", 1)[1]) < now:
+                continue
+            self._apply(member)
+            self._synced_at = max(self._synced_at, score)
+
+    async def _sync_loop(self):
+        while True:
+            try:
+                full = time.time() - self._full_synced_at >= FULL_SYNC_INTERVAL
+                await self.sync(full=full)
+            except Exception as e:
+                logger.error(f"同步 Token 吊销记录失败: {e}")
+            await asyncio.sleep(settings.TOKEN_REVOCATION_SYNC_INTERVAL)
+
+    def start(self):
+        """启动后台同步（启动时先全量加载）"""
+        if self._task is None:
+            self._task = asyncio.create_task(self._sync_loop())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+# 全局实例
+revocation_registry = RevocationRegistry()
@@ -0,0 +1,125 @@
+"""
+登录用户缓存服务
+
+缓存鉴权和常用接口所需的用户字段（UserPrincipal），避免每个请求都查询 users 表：
+- 一级缓存：进程内 LRU
+- 二级缓存：Redis（配置 REDIS_URL 时启用，多进程共享）
+
+用户状态、资料、积分、会员等级变更后须调用 invalidate()。
+启用 Redis 时一级缓存有效期很短，其他进程最多在该时间内读到旧数据；
+未启用 Redis 时缓存仅在本进程有效，多进程部署请配置 Redis。
+"""
+import json
+import logging
+from dataclasses import dataclass, asdict, fields
+from typing import Optional
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.models.user import User
+from app.redis_client import get_redis
+from app.utils.lru import TTLCache
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = "user:principal:"
+
+# 启用 Redis 时一级缓存的有效期（秒）
+LOCAL_TTL_WITH_REDIS = 5
+
+
+@dataclass
+class UserPrincipal:
+    """登录用户信息（只读，修改用户数据请使用 get_current_user 获取 User）"""
+    id: int
+    status: int
+    nickname: Optional[str]
+    avatar: Optional[str]
+    member_level: int
+    user_level: int
+    sport_coins: int
+    food_coins: int
+    continuous_checkin_days: int
+    total_checkin_days: int
+
+    @classmethod
+    def from_user(cls, user: User) -> "UserPrincipal":
+        return cls(**{f.name: getattr(user, f.name) for f in fields(cls)})
+
+
+_COLUMNS = [getattr(User, f.name) for f in fields(UserPrincipal)]
+
+
+class UserCache:
+    """用户信息两级缓存"""
+
+    def __init__(self, maxsize: int = 10000):
+        self._local = TTLCache(maxsize=maxsize, ttl=settings.USER_CACHE_TTL)
+
+    def _local_ttl(self, redis) -> float:
+        if redis is None:
+            return settings.USER_CACHE_TTL
+        return min(LOCAL_TTL_WITH_REDIS, settings.USER_CACHE_TTL)
+
+    async def get(self, db: AsyncSession, user_id: int) -> Optional[UserPrincipal]:
+        """
+        获取用户信息，依次查询进程内缓存、Redis、数据库
+
+        Returns:
+            用户信息，用户不存在返回 None
+        """
+        principal = self._local.get(user_id)
+        if principal is not None:
+            return principal
+
+        redis = get_redis()
+        if redis is not None:
+            try:
+                raw = await redis.get(f"{KEY_PREFIX}{user_id}")
+                if raw:
+                    principal = UserPrincipal(**json.loads(raw))
+                    self._local.set(user_id, principal, ttl=self._local_ttl(redis))
+                    return principal
+            except Exception as e:
+                logger.warning(f"读取用户缓存失败: {e}")
+
+        result = await db.execute(select(*_COLUMNS).where(User.id == user_id))
+        row = result.first()
+        if row is None:
+            return None
+
+        principal = UserPrincipal(*row)
+        await self._store(principal, redis)
+        return principal
+
+    async def put(self, user: User):
+        """用已加载的 User 刷新缓存"""
+        await self._store(UserPrincipal.from_user(user), get_redis())
+
+    async def _store(self, principal: UserPrincipal, redis):
+        self._local.set(principal.id, principal, ttl=self._local_ttl(redis))
+        if redis is not None:
+            try:
+                await redis.set(
+                    f"{KEY_PREFIX}{principal.id}",
+                    json.dumps(asdict(principal)),
+                    ex=settings.USER_CACHE_TTL,
+                )
+            except Exception as e:
+                logger.warning(f"写入用户缓存失败: {e}")
+
+    async def invalidate(self, user_id: int):
+        """用户数据变更后清除缓存"""
+        self._local.pop(user_id)
+        redis = get_redis()
+        if redis is not None:
+            try:
+                await redis.delete(f"{KEY_PREFIX}{user_id}")
+            except Exception as e:
+                logger.warning(f"清除用户缓存失败: {e}")
+
+
+# 全局实例
+user_cache = UserCache()
@@ -0,0 +1,92 @@
+"""
+短信验证码
+
+验证码与发送频率计数保存在临时键值存储中（配置 REDIS_URL 时多进程共享）：
+- 同一手机号 VERIFY_CODE_RESEND_SECONDS 内只能发送一次
+- 同一手机号、同一用户每天最多发送 VERIFY_CODE_DAILY_LIMIT 次；已达上限的请求在计数前拒绝，
+  不会再创建新的计数（避免大量请求占满未配置 Redis 时的进程内存储）
+- 验证码 VERIFY_CODE_TTL 秒内有效，错误 VERIFY_CODE_MAX_ATTEMPTS 次后作废
+"""
+import hmac
+import secrets
+from typing import Optional
+
+from app.config import settings
+from app.services.ephemeral_store import EphemeralStore
+
+DAY_SECONDS = 24 * 3600
+
+
+class VerifyCodeService:
+    """验证码发送与校验"""
+
+    def __init__(self, purpose: str):
+        """
+        Args:
+            purpose: 验证码用途，如 "bind_phone"，不同用途的验证码互不通用
+        """
+        self._store = EphemeralStore(f"verify_code:{purpose}")
+
+    async def check_send(self, phone: str, user_id: int) -> int:
+        """
+        记录一次发送请求
+
+        Returns:
+            需等待的秒数，0 表示允许发送
+        """
+        daily_keys = (f"daily:user:{user_id}", f"daily:phone:{phone}")
+        # 先检查用户、手机号是否已达当天上限，已达上限时不再累加任何计数
+        for key in daily_keys:
+            count, ttl = await self._store.count(key)
+            if count >= settings.VERIFY_CODE_DAILY_LIMIT:
+                return ttl
+
+        count, ttl = await self._store.incr(f"resend:{phone}", settings.VERIFY_CODE_RESEND_SECONDS)
+        if count > 1:
+            return ttl
+
+        retry_after = 0
+        for key in daily_keys:
+            count, ttl = await self._store.incr(key, DAY_SECONDS)
+            if count > settings.VERIFY_CODE_DAILY_LIMIT:
+                retry_after = max(retry_after, ttl)
+        return retry_after
+
+    async def issue(self, phone: str, user_id: int) -> str:
+        """生成验证码（覆盖该手机号之前的验证码）"""
+        code = f"{secrets.randbelow(900000) + 100000}"
+        await self._store.set(f"code:{phone}", {"code": code, "user_id": user_id}, ttl=settings.VERIFY_CODE_TTL)
+        await self._store.delete(f"attempts:{phone}")
+        return code
+
+    async def verify(self, phone: str, user_id: int, code: str) -> Optional[str]:
+        """
+        校验验证码（校验通过后仍保留，业务完成后调用 consume 作废）
+
+        Returns:
+            错误信息，None 表示通过
+        """
+        stored = await self._store.get(f"code:{phone}")
+        if not stored:
+            return "验证码已过期，请重新获取"
+
+        if stored["user_id"] != user_id:
+            return "验证码无效"
+
+        attempts, _ = await self._store.incr(f"attempts:{phone}", settings.VERIFY_CODE_TTL)
+        if attempts > settings.VERIFY_CODE_MAX_ATTEMPTS:
+            await self.consume(phone)
+            return "验证码错误次数过多，请重新获取"
+
+        if not hmac.compare_digest(stored["code"].encode(), code.encode()):
+            return "验证码错误"
+        return None
+
+    async def consume(self, phone: str):
+        """作废验证码"""
+        await self._store.delete(f"code:{phone}")
+        await self._store.delete(f"attempts:{phone}")
+
+
+# 绑定手机号
+bind_phone_codes = VerifyCodeService("bind_phone")
@@ -0,0 +1,194 @@
+"""
+浏览事件队列
+
+动态详情接口只记录一条浏览事件，不再写数据库，接口本身是纯读、可缓存的。
+后台消费者按 VIEW_EVENT_FLUSH_INTERVAL 汇总同一动态的事件，合并为一次计数累加
+（见 counters，计数器再定期批量落库）。
+
+两种队列（VIEW_EVENT_BACKEND）：
+- memory：进程内 asyncio 队列，关闭时处理完剩余事件
+- stream：Redis Stream + 消费组，多进程共同消费；事件累加到计数器后才确认（至少一次），
+  进程异常退出时未确认的事件由其他消费者认领。未配置 Redis 时回退到 memory
+"""
+import asyncio
+import logging
+import os
+import socket
+from collections import Counter
+from typing import List, Optional
+
+from app.config import settings
+from app.redis_client import get_redis
+from app.services.counters import counters, POST_VIEWS
+
+logger = logging.getLogger(__name__)
+
+BACKEND_MEMORY = "memory"
+BACKEND_STREAM = "stream"
+
+STREAM_KEY = "events:post_view"
+STREAM_GROUP = "view_counter"
+# 流的最大长度（近似裁剪，防止消费者长时间停止时无限增长）
+STREAM_MAXLEN = 1_000_000
+# 每次读取的事件数
+STREAM_BATCH = 1000
+# 未确认超过该时长（毫秒）的事件视为消费者已退出，由其他消费者认领
+STREAM_CLAIM_IDLE_MS = 60_000
+
+
+class ViewEventQueue:
+    """浏览事件队列"""
+
+    def __init__(self):
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self._task: Optional[asyncio.Task] = None
+        self._consumer = f"{socket.gethostname()}-{os.getpid()}"
+        self.stats = {"recorded": 0, "flushed": 0}
+
+    @property
+    def _redis(self):
+        if settings.VIEW_EVENT_BACKEND != BACKEND_STREAM:
+            return None
+        return get_redis()
+
+    async def record(self, post_id: int):
+        """记录一次浏览"""
+        self.stats["recorded"] += 1
+        redis = self._redis
+        if redis is not None:
+            try:
+                await redis.xadd(STREAM_KEY, {"post_id": post_id}, maxlen=STREAM_MAXLEN, approximate=True)
+                return
+            except Exception as e:
+                logger.warning(f"写入浏览事件流失败，改用进程内队列: {e}")
+        self._queue.put_nowait(post_id)
+
+    async def pending(self) -> int:
+        """尚未累加到计数器的事件数"""
+        count = self._queue.qsize()
+        redis = self._redis
+        if redis is not None:
+            try:
+                # 已处理的事件会被删除，流长度即待处理数
+                count += await redis.xlen(STREAM_KEY)
+            except Exception as e:
+                logger.warning(f"读取浏览事件流失败: {e}")
+        return count
+
+    async def _apply(self, post_ids: List[int]):
+        """汇总后累加到计数器"""
+        for post_id, n in Counter(post_ids).items():
+            await counters.incr(POST_VIEWS, post_id, n)
+        self.stats["flushed"] += len(post_ids)
+
+    async def _drain_local(self):
+        post_ids = []
+        while not self._queue.empty():
+            post_ids.append(self._queue.get_nowait())
+        if not post_ids:
+            return
+        try:
+            await self._apply(post_ids)
+        except Exception:
+            # 放回队列，下次重试
+            for post_id in post_ids:
+                self._queue.put_nowait(post_id)
+            raise
+
+    async def _ensure_group(self, redis):
+        try:
+            await redis.xgroup_create(STREAM_KEY, STREAM_GROUP, id="0", mkstream=True)
+        except Exception as e:
+            if "BUSYGROUP" not in str(e):
+                raise
+
+    async def _consume_stream(self, redis, block_ms: Optional[int]):
+        """读取一批事件，累加到计数器后确认并删除"""
+        # 依次尝试：认领已退出消费者遗留的事件、本消费者已读取未确认的事件（上次累加失败）、新事件
+        entries = []
+        for source in ("claim", "0", ">"):
+            if source == "claim":
+                claimed = await redis.xautoclaim(
+                    STREAM_KEY, STREAM_GROUP, self._consumer,
+                    min_idle_time=STREAM_CLAIM_IDLE_MS, start_id="0-0", count=STREAM_BATCH,
+                )
+                batch = list(claimed[1]) if claimed else []
+            else:
+                result = await redis.xreadgroup(
+                    STREAM_GROUP, self._consumer, {STREAM_KEY: source},
+                    count=STREAM_BATCH, block=block_ms if source == ">" else None,
+                )
+                batch = [e for _, stream_entries in (result or []) for e in stream_entries]
+
+            # 未确认的事件可能已被 MAXLEN 裁剪，读到的内容为空：直接确认，
+            # 否则每次都会读到这些空事件而永远读不到新事件
+            trimmed = [entry_id for entry_id, fields in batch if not fields]
+            if trimmed:
+                await redis.xack(STREAM_KEY, STREAM_GROUP, *trimmed)
+                logger.warning(f"确认已被裁剪的浏览事件 {len(trimmed)} 条")
+
+            entries = [(entry_id, fields) for entry_id, fields in batch if fields]
+            if entries:
+                break
+
+        if not entries:
+            return 0
+
+        await self._apply([int(fields["post_id"]) for _, fields in entries])
+        entry_ids = [entry_id for entry_id, _ in entries]
+        await redis.xack(STREAM_KEY, STREAM_GROUP, *entry_ids)
+        await redis.xdel(STREAM_KEY, *entry_ids)
+        return len(entries)
+
+    async def flush(self):
+        """处理当前所有待处理事件"""
+        await self._drain_local()
+        redis = self._redis
+        if redis is not None:
+            await self._ensure_group(redis)
+            while await self._consume_stream(redis, block_ms=None) >= STREAM_BATCH:
+                pass
+
+    async def _consume_loop(self):
+        interval = settings.VIEW_EVENT_FLUSH_INTERVAL
+        group_ready = False
+        while True:
+            try:
+                redis = self._redis
+                if redis is not None:
+                    if not group_ready:
+                        await self._ensure_group(redis)
+                        group_ready = True
+                    # 阻塞读取，最长等待一个刷新间隔
+                    await self._consume_stream(redis, block_ms=int(interval * 1000))
+                else:
+                    await asyncio.sleep(interval)
+                await self._drain_local()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"处理浏览事件失败: {e}")
+                await asyncio.sleep(interval)
+
+    def start(self):
+        """启动后台消费者"""
+        if self._task is None:
+            self._task = asyncio.create_task(self._consume_loop())
+
+    async def stop(self):
+        """停止消费者并处理剩余事件（需在计数器停止前调用）"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        try:
+            await self.flush()
+        except Exception as e:
+            logger.error(f"处理剩余浏览事件失败: {e}")
+
+
+# 全局实例
+view_events = ViewEventQueue()
@@ -0,0 +1,83 @@
+"""
+进程内 LRU + TTL 缓存
+
+用于缓存计数、热点数据等短时效结果，进程内有效（多 worker 之间不共享）。
+"""
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+
+
+class TTLCache:
+    """带过期时间的 LRU 缓存"""
+
+    _MISSING = object()
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 60):
+        """
+        Args:
+            maxsize: 最大条目数，超出后淘汰最久未使用的条目
+            ttl: 默认过期时间（秒）
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """获取缓存值，不存在或已过期返回 default"""
+        item = self._data.get(key, self._MISSING)
+        if item is self._MISSING:
+            return default
+
+        value, expires_at = item
+        if expires_at < time.monotonic():
+            del self._data[key]
+            return default
+
+        self._data.move_to_end(key)
+        return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        """写入缓存值"""
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        self._data[key] = (value, expires_at)
+        self._data.move_to_end(key)
+
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        """删除并返回缓存值"""
+        item = self._data.pop(key, self._MISSING)
+        if item is self._MISSING:
+            return default
+        return item[0]
+
+    def remaining(self, key: Hashable) -> Optional[float]:
+        """剩余有效时间（秒），不存在或已过期返回 None"""
+        item = self._data.get(key, self._MISSING)
+        if item is self._MISSING:
+            return None
+        remaining = item[1] - time.monotonic()
+        if remaining <= 0:
+            del self._data[key]
+            return None
+        return remaining
+
+    def purge_expired(self) -> int:
+        """清除所有已过期的条目，返回清除数量"""
+        now = time.monotonic()
+        expired = [key for key, (_, expires_at) in self._data.items() if expires_at < now]
+        for key in expired:
+            del self._data[key]
+        return len(expired)
+
+    def clear(self) -> None:
+        """清空缓存"""
+        self._data.clear()
+
+    def __contains__(self, key: Hashable) -> bool:
+        return self.get(key, self._MISSING) is not self._MISSING
+
+    def __len__(self) -> int:
+        return len(self._data)
@@ -0,0 +1,77 @@
+"""
+游标分页工具模块
+
+游标为排序键的 base64 编码，对客户端不透明，只能原样回传。
+"""
+import base64
+import json
+from datetime import datetime
+from typing import Any, Hashable, List, Optional, Sequence
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.utils.lru import TTLCache
+
+
+def encode_cursor(values: List[Any]) -> str:
+    """将排序键编码为游标"""
+    payload = [v.isoformat() if isinstance(v, datetime) else v for v in values]
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, types: Sequence[type]) -> Optional[List[Any]]:
+    """
+    解析游标
+
+    Args:
+        cursor: 客户端回传的游标
+        types: 各排序键的类型（int / datetime），int 同时接受布尔值
+
+    Returns:
+        排序键列表（时间字符串会还原为 datetime），非法游标返回 None
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = json.loads(raw)
+    except (ValueError, TypeError):
+        return None
+
+    if not isinstance(values, list) or len(values) != len(types):
+        return None
+
+    result = []
+    for v, expected in zip(values, types):
+        if expected is datetime:
+            if not isinstance(v, str):
+                return None
+            try:
+                v = datetime.fromisoformat(v)
+            except ValueError:
+                return None
+        elif expected is int:
+            if not isinstance(v, int):
+                return None
+            v = int(v)
+        else:
+            return None
+        result.append(v)
+    return result
+
+
+async def cached_count(
+    db: AsyncSession,
+    count_query,
+    cache: TTLCache,
+    key: Hashable,
+) -> int:
+    """
+    带缓存的总数查询
+
+    总数只用于展示，允许在缓存有效期内略有偏差，避免每次翻页都做全量 COUNT。
+    """
+    total = cache.get(key)
+    if total is None:
+        total = (await db.execute(count_query)).scalar() or 0
+        cache.set(key, total)
+    return total
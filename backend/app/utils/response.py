@@ -45,6 +45,26 @@ def paginate(items: list, total: int, page: int, page_size: int) -> dict:
     }
 
 
+def cursor_paginate(
+    items: list,
+    next_cursor: Optional[str],
+    page_size: int,
+    total: Optional[int] = None,
+) -> dict:
+    """游标分页响应"""
+    return {
+        "code": 200,
+        "message": "success",
+        "data": {
+            "list": items,
+            "next_cursor": next_cursor,
+            "has_more": next_cursor is not None,
+            "page_size": page_size,
+            "total": total,
+        }
+    }
+
+
 
 
 
@@ -1,6 +1,14 @@
 """
 安全工具模块 - JWT认证、密码加密
 """
+import asyncio
+import base64
+import hashlib
+import hmac
+import json
+import secrets
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from typing import Optional
 from jose import JWTError, jwt
@@ -12,6 +20,9 @@ from sqlalchemy import select
 
 from app.config import settings
 from app.database import get_db
+from app.services.token_cache import token_cache, token_id
+from app.services.token_revocation import revocation_registry
+from app.services.user_cache import UserPrincipal, user_cache
 
 
 # 密码加密上下文
@@ -31,6 +42,33 @@ def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
 
 
+# bcrypt 每次计算约 100~300ms CPU，放到专用线程池执行（bcrypt 计算时释放 GIL），
+# 线程数即同时进行的哈希计算上限，不会占满默认线程池或阻塞事件循环
+_password_executor = ThreadPoolExecutor(
+    max_workers=settings.PASSWORD_HASH_WORKERS,
+    thread_name_prefix="password-hash",
+)
+
+# 用户名不存在时用于比对的哈希，使响应耗时与密码错误时一致
+_dummy_hash: Optional[str] = None
+
+
+async def verify_password_async(plain_password: str, hashed_password: Optional[str]) -> bool:
+    """
+    在专用线程池中验证密码
+
+    hashed_password 为空（如用户名不存在）时仍执行一次比对后返回 False
+    """
+    global _dummy_hash
+    loop = asyncio.get_running_loop()
+    if not hashed_password:
+        if _dummy_hash is None:
+            _dummy_hash = await loop.run_in_executor(_password_executor, get_password_hash, "dummy-password")
+        await loop.run_in_executor(_password_executor, verify_password, plain_password, _dummy_hash)
+        return False
+    return await loop.run_in_executor(_password_executor, verify_password, plain_password, hashed_password)
+
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     """
     创建 JWT Token
@@ -48,7 +86,8 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
     else:
         expire = datetime.utcnow() + timedelta(minutes=settings.JWT_EXPIRE_MINUTES)
     
-    to_encode.update({"exp": expire})
+    # iat 用于按账号吊销此前签发的 Token，jti 用于吊销单个 Token
+    to_encode.update({"exp": expire, "iat": datetime.utcnow(), "jti": secrets.token_hex(8)})
     encoded_jwt = jwt.encode(
         to_encode,
         settings.JWT_SECRET_KEY,
@@ -57,6 +96,40 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
     return encoded_jwt
 
 
+def _b64decode(segment: str) -> bytes:
+    return base64.urlsafe_b64decode(segment + "=" * (-len(segment) % 4))
+
+
+def _decode_hs256(token: str) -> Optional[dict]:
+    """
+    HS256 Token 快速校验（仅用标准库 HMAC + JSON）
+
+    与 jose 一致地校验签名、exp 和 nbf，省去 jose 的通用算法分发和声明校验开销
+    """
+    try:
+        header_b64, payload_b64, signature_b64 = token.split(".")
+        if json.loads(_b64decode(header_b64)).get("alg") != "HS256":
+            return None
+        expected = hmac.new(
+            settings.JWT_SECRET_KEY.encode(),
+            f"{header_b64}.{payload_b64}".encode(),
+            hashlib.sha256,
+        ).digest()
+        if not hmac.compare_digest(expected, _b64decode(signature_b64)):
+            return None
+        payload = json.loads(_b64decode(payload_b64))
+        if not isinstance(payload, dict):
+            return None
+        now = time.time()
+        if "exp" in payload and int(payload["exp"]) < now:
+            return None
+        if "nbf" in payload and int(payload["nbf"]) > now:
+            return None
+        return payload
+    except (ValueError, TypeError, AttributeError):
+        return None
+
+
 def decode_token(token: str) -> Optional[dict]:
     """
     解码 JWT Token
@@ -67,6 +140,9 @@ def decode_token(token: str) -> Optional[dict]:
     Returns:
         解码后的数据字典，失败返回 None
     """
+    if settings.JWT_FAST_PATH and settings.JWT_ALGORITHM == "HS256":
+        return _decode_hs256(token)
+    
     try:
         payload = jwt.decode(
             token,
@@ -78,34 +154,83 @@ def decode_token(token: str) -> Optional[dict]:
         return None
 
 
-async def get_current_user(
-    credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: AsyncSession = Depends(get_db)
-):
+async def verify_token(token: str) -> Optional[dict]:
     """
-    获取当前登录用户依赖
+    校验 Token（带缓存）
+    
+    已验证过的 Token 直接使用缓存的载荷，否则完整解码；两种情况都检查吊销记录（进程内完成）
     
-    通过 JWT Token 验证并获取当前用户信息
+    Returns:
+        载荷，无效或已吊销返回 None
     """
-    credentials_exception = HTTPException(
-        status_code=status.HTTP_401_UNAUTHORIZED,
-        detail={"code": 401, "message": "未登录或Token已失效", "data": None},
-        headers={"WWW-Authenticate": "Bearer"},
-    )
+    payload = token_cache.get(token)
+    if payload is None:
+        payload = decode_token(token)
+        if payload is None:
+            return None
+        token_cache.put(token, payload)
     
+    if await revocation_registry.is_revoked(payload, token_id(token, payload)):
+        return None
+    return payload
+
+
+async def revoke_token(token: str):
+    """吊销 Token（退出登录）"""
+    payload = await verify_token(token)
+    if payload is not None:
+        token_cache.pop(token)
+        await revocation_registry.revoke(token_id(token, payload), payload.get("exp"))
+
+
+async def revoke_subject_tokens(token_type: str, subject_id: int):
+    """吊销账号当前已签发的全部 Token（退出所有设备、禁用、注销）"""
+    await revocation_registry.revoke_subject(token_type, subject_id)
+
+
+async def _get_token_user_id(credentials: Optional[HTTPAuthorizationCredentials]) -> Optional[int]:
+    """从 Bearer Token 中解析用户ID（仅接受用户 Token），无效返回 None"""
     if not credentials:
-        raise credentials_exception
-    
-    token = credentials.credentials
-    payload = decode_token(token)
+        return None
     
-    if payload is None:
-        raise credentials_exception
+    payload = await verify_token(credentials.credentials)
+    if payload is None or payload.get("type") != "user":
+        return None
     
     user_id_str = payload.get("sub")
     if user_id_str is None:
-        raise credentials_exception
-    user_id = int(user_id_str)
+        return None
+    return int(user_id_str)
+
+
+def _credentials_exception() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail={"code": 401, "message": "未登录或Token已失效", "data": None},
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+
+
+def _disabled_exception() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_403_FORBIDDEN,
+        detail={"code": 403, "message": "账号已被禁用", "data": None}
+    )
+
+
+async def get_current_user(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    获取当前登录用户依赖
+    
+    通过 JWT Token 验证并从数据库加载 User，用于需要修改用户数据的接口；
+    只读接口请使用 get_current_principal
+    """
+    user_id = await _get_token_user_id(credentials)
+    if user_id is None:
+        raise _credentials_exception()
     
     # 查询用户
     from app.models.user import User
@@ -113,13 +238,10 @@ async def get_current_user(
     user = result.scalar_one_or_none()
     
     if user is None:
-        raise credentials_exception
+        raise _credentials_exception()
     
     if user.status != 1:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail={"code": 403, "message": "账号已被禁用", "data": None}
-        )
+        raise _disabled_exception()
     
     return user
 
@@ -133,20 +255,10 @@ async def get_current_user_optional(
     
     如果提供了有效 Token 则返回用户，否则返回 None
     """
-    if not credentials:
-        return None
-    
-    token = credentials.credentials
-    payload = decode_token(token)
-    
-    if payload is None:
+    user_id = await _get_token_user_id(credentials)
+    if user_id is None:
         return None
     
-    user_id_str = payload.get("sub")
-    if user_id_str is None:
-        return None
-    user_id = int(user_id_str)
-    
     # 查询用户
     from app.models.user import User
     result = await db.execute(select(User).where(User.id == user_id))
@@ -155,6 +267,45 @@ async def get_current_user_optional(
     return user
 
 
+async def get_current_principal(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: AsyncSession = Depends(get_db)
+) -> UserPrincipal:
+    """
+    获取当前登录用户信息（缓存）
+    
+    命中缓存时不查询数据库，返回只读的 UserPrincipal
+    """
+    user_id = await _get_token_user_id(credentials)
+    if user_id is None:
+        raise _credentials_exception()
+    
+    principal = await user_cache.get(db, user_id)
+    if principal is None:
+        raise _credentials_exception()
+    
+    if principal.status != 1:
+        raise _disabled_exception()
+    
+    return principal
+
+
+async def get_current_principal_optional(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: AsyncSession = Depends(get_db)
+) -> Optional[UserPrincipal]:
+    """
+    可选的当前用户信息（缓存）
+    
+    如果提供了有效 Token 则返回用户信息，否则返回 None
+    """
+    user_id = await _get_token_user_id(credentials)
+    if user_id is None:
+        return None
+    
+    return await user_cache.get(db, user_id)
+
+
 async def get_current_admin(
     credentials: HTTPAuthorizationCredentials = Depends(security),
     db: AsyncSession = Depends(get_db)
@@ -174,7 +325,7 @@ async def get_current_admin(
         raise credentials_exception
     
     token = credentials.credentials
-    payload = decode_token(token)
+    payload = await verify_token(token)
     
     if payload is None:
         raise credentials_exception
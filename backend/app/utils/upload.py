@@ -0,0 +1,206 @@
+"""
+图片上传保存
+
+按块读取上传文件，不把整个文件读入内存：
+- 边读边累计大小，超过 MAX_FILE_SIZE 立即停止读取
+- 边读边计算 SHA-256
+- 按文件头识别图片格式（不信任客户端声明的类型和扩展名）
+- 写入在线程中执行，不阻塞事件循环；先写同目录下的临时文件，完成后原子重命名，
+  失败时删除临时文件，不会留下不完整的文件
+
+FastAPI 在进入接口之前就会接收并解析整个表单，接口内的大小检查无法阻止超大请求体被完整接收，
+因此由 UploadSizeLimitMiddleware 在接收请求体之前按 Content-Length 拒绝超限的上传请求。
+"""
+import asyncio
+import hashlib
+import os
+import tempfile
+import uuid
+from dataclasses import dataclass
+from typing import BinaryIO, Optional
+
+from fastapi import UploadFile
+from fastapi.responses import JSONResponse
+
+from app.config import settings
+from app.utils.response import error
+
+# 每次读取的块大小
+CHUNK_SIZE = 256 * 1024
+
+# multipart 请求体中除文件内容外的开销上限（边界、各部分的头、分类等表单字段）
+MULTIPART_OVERHEAD = 64 * 1024
+
+# MIME 类型 -> 扩展名
+IMAGE_EXTENSIONS = {
+    "image/jpeg": "jpg",
+    "image/png": "png",
+    "image/gif": "gif",
+    "image/webp": "webp",
+}
+
+
+class UploadError(Exception):
+    """上传文件不符合要求"""
+
+    def __init__(self, message: str):
+        super().__init__(message)
+        self.message = message
+
+
+@dataclass
+class SavedFile:
+    """已保存的文件"""
+    filename: str
+    path: str
+    size: int
+    sha256: str
+    mime_type: str
+
+
+def detect_image_type(head: bytes) -> Optional[str]:
+    """按文件头识别图片 MIME 类型，无法识别返回 None"""
+    if head.startswith(b"\xff\xd8\xff"):
+        return "image/jpeg"
+    if head.startswith(b"\x89PNG\r\n\x1a\n"):
+        return "image/png"
+    if head[:6] in (b"GIF87a", b"GIF89a"):
+        return "image/gif"
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "image/webp"
+    return None
+
+
+def _open_temp(directory: str):
+    os.makedirs(directory, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(dir=directory, prefix=".upload-", suffix=".tmp")
+    return os.fdopen(fd, "wb"), temp_path
+
+
+def _commit(f: BinaryIO, temp_path: str, path: str):
+    f.close()
+    os.replace(temp_path, path)
+
+
+def _discard(f: BinaryIO, temp_path: str):
+    f.close()
+    try:
+        os.remove(temp_path)
+    except FileNotFoundError:
+        pass
+
+
+async def save_image(file: UploadFile, directory: str) -> SavedFile:
+    """
+    流式保存上传的图片
+
+    Args:
+        file: 上传文件
+        directory: 保存目录
+
+    Raises:
+        UploadError: 格式不支持或超过大小限制
+    """
+    max_size = settings.MAX_FILE_SIZE
+    hasher = hashlib.sha256()
+    size = 0
+    mime_type = None
+
+    f, temp_path = await asyncio.to_thread(_open_temp, directory)
+    try:
+        while True:
+            chunk = await file.read(CHUNK_SIZE)
+            if not chunk:
+                break
+
+            if mime_type is None:
+                mime_type = detect_image_type(chunk)
+                if mime_type not in settings.ALLOWED_IMAGE_TYPES or mime_type not in IMAGE_EXTENSIONS:
+                    raise UploadError("不支持的图片格式，仅支持 jpg/png/gif/webp")
+
+            size += len(chunk)
+            if size > max_size:
+                raise UploadError(f"文件大小超过限制，最大 {max_size // 1024 // 1024}MB")
+
+            hasher.update(chunk)
+            await asyncio.to_thread(f.write, chunk)
+
+        if mime_type is None:
+            raise UploadError("文件为空")
+
+        filename = f"{uuid.uuid4().hex}.{IMAGE_EXTENSIONS[mime_type]}"
+        path = os.path.join(directory, filename)
+        await asyncio.to_thread(_commit, f, temp_path, path)
+    except BaseException:
+        await asyncio.to_thread(_discard, f, temp_path)
+        raise
+
+    return SavedFile(
+        filename=filename,
+        path=path,
+        size=size,
+        sha256=hasher.hexdigest(),
+        mime_type=mime_type,
+    )
+
+
+class _BodyTooLarge(Exception):
+    pass
+
+
+class UploadSizeLimitMiddleware:
+    """
+    上传请求体大小限制（multipart/form-data 请求）
+
+    声明的 Content-Length 超过 MAX_FILE_SIZE + MULTIPART_OVERHEAD 时不读取请求体，直接返回 413；
+    未声明长度（分块传输）时边接收边计数，超限后立即停止接收并返回 413。
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    @staticmethod
+    def _too_large_response() -> JSONResponse:
+        max_mb = settings.MAX_FILE_SIZE // 1024 // 1024
+        return JSONResponse(error(413, f"文件大小超过限制，最大 {max_mb}MB"), status_code=413)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope["headers"])
+        if not headers.get(b"content-type", b"").startswith(b"multipart/form-data"):
+            await self.app(scope, receive, send)
+            return
+
+        limit = settings.MAX_FILE_SIZE + MULTIPART_OVERHEAD
+        content_length = headers.get(b"content-length")
+        if content_length is not None and content_length.isdigit() and int(content_length) > limit:
+            await self._too_large_response()(scope, receive, send)
+            return
+
+        received = 0
+        rejected = False
+
+        async def limited_receive():
+            nonlocal received, rejected
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > limit:
+                    rejected = True
+                    raise _BodyTooLarge()
+            return message
+
+        async def guarded_send(message):
+            # 超限后丢弃接口对解析失败生成的响应，改为返回 413
+            if not rejected:
+                await send(message)
+
+        try:
+            await self.app(scope, limited_receive, guarded_send)
+        except _BodyTooLarge:
+            pass
+        if rejected:
+            await self._too_large_response()(scope, receive, send)
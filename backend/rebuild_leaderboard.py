@@ -0,0 +1,31 @@
+"""
+重建排行榜脚本
+从 users / sport_records 表重新计算积分榜和本周运动榜，用于数据恢复
+运行方式: python rebuild_leaderboard.py
+
+注意：未配置 REDIS_URL 时榜单保存在各服务进程内存中，进程启动后会自动从数据库构建，无需运行本脚本
+"""
+import asyncio
+
+from app.config import settings
+from app.database import async_session_maker, close_db
+from app.redis_client import close_redis
+from app.services.leaderboard import leaderboard
+
+
+async def rebuild_leaderboard():
+    """重建全部排行榜"""
+    if not settings.REDIS_URL:
+        print("未配置 REDIS_URL，跳过重建")
+        return
+    
+    async with async_session_maker() as session:
+        await leaderboard.rebuild(session)
+    
+    await close_redis()
+    await close_db()
+    print("排行榜重建完成!")
+
+
+if __name__ == "__main__":
+    asyncio.run(rebuild_leaderboard())
@@ -0,0 +1,50 @@
+"""
+重建统计汇总脚本
+从原始记录重新计算 daily_stats / user_daily_stats，用于每日对账和历史数据回填
+运行方式:
+    python rebuild_stats.py                                   # 重建昨天（建议每日凌晨定时执行）
+    python rebuild_stats.py --start 2024-01-01 --end 2024-01-31
+
+当天的汇总仍在被写接口实时累加，重建会删除并重写当天数据，期间的增量会丢失，
+因此默认不允许重建今天及以后的日期；确需重建时（如停服维护）加 --include-today。
+"""
+import argparse
+import asyncio
+from datetime import date, datetime, timedelta
+
+from app.database import async_session_maker, close_db
+from app.services import rollup_service
+
+
+def parse_date(value: str) -> date:
+    return datetime.strptime(value, "%Y-%m-%d").date()
+
+
+async def rebuild_stats(start: date, end: date):
+    """按天重建 [start, end] 的汇总数据，每天单独提交"""
+    day = start
+    while day <= end:
+        async with async_session_maker() as session:
+            await rollup_service.rebuild_day(session, day)
+            await session.commit()
+        print(f"  {day} 已重建")
+        day += timedelta(days=1)
+    
+    await close_db()
+    print("统计汇总重建完成!")
+
+
+if __name__ == "__main__":
+    today = date.today()
+    parser = argparse.ArgumentParser(description="重建统计汇总表")
+    parser.add_argument("--start", type=parse_date, default=today - timedelta(days=1), help="开始日期 YYYY-MM-DD")
+    parser.add_argument("--end", type=parse_date, default=today - timedelta(days=1), help="结束日期 YYYY-MM-DD")
+    parser.add_argument("--include-today", action="store_true", help="允许重建今天（会丢失重建期间的实时增量）")
+    args = parser.parse_args()
+    
+    if args.start > args.end:
+        parser.error("开始日期不能晚于结束日期")
+    if args.end >= today and not args.include_today:
+        parser.error("今天的汇总仍在实时累加，重建会丢失增量；请将结束日期设为昨天或加 --include-today")
+    
+    asyncio.run(rebuild_stats(args.start, args.end))
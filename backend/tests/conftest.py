@@ -0,0 +1,127 @@
+"""
+测试公共夹具
+
+使用临时 SQLite 文件库（aiosqlite）代替 MySQL，不连接 Redis；需在导入 app 之前设置环境变量。
+"""
+import os
+import tempfile
+
+_db_dir = tempfile.mkdtemp(prefix="health-test-")
+os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{os.path.join(_db_dir, 'test.db')}"
+os.environ["DEBUG"] = "false"
+os.environ["REDIS_URL"] = ""
+os.environ["UPLOAD_DIR"] = os.path.join(_db_dir, "uploads")
+
+import pytest
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy import BigInteger, event
+from sqlalchemy.ext.compiler import compiles
+
+from app.database import Base, engine, async_session_maker
+from app.main import app
+from app.models.system import Admin
+from app.models.user import User
+from app.utils.security import create_access_token
+
+
+# SQLite 只有 INTEGER PRIMARY KEY 才会自增
+@compiles(BigInteger, "sqlite")
+def _compile_big_integer(type_, compiler, **kw):
+    return "INTEGER"
+
+
+def _reset_state():
+    """清空各模块的进程内缓存和缓冲，避免测试之间互相影响"""
+    from app.api.v1 import community
+    from app.services.cache import cache
+    from app.services.counters import counters
+    from app.services.ephemeral_store import local_store
+    from app.services.token_cache import token_cache
+    from app.services.user_cache import user_cache
+
+    cache._local.clear()
+    cache._local_tags.clear()
+    user_cache._local.clear()
+    token_cache._verified.clear()
+    local_store.data.clear()
+    local_store.counters.clear()
+    community._post_total_cache.clear()
+    counters._pending.clear()
+    counters._flushing.clear()
+
+
+@pytest.fixture(autouse=True)
+async def db():
+    """每个测试使用一份新建的空库"""
+    _reset_state()
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+    yield
+    await engine.dispose()
+
+
+@pytest.fixture
+async def session():
+    async with async_session_maker() as s:
+        yield s
+
+
+@pytest.fixture
+async def client():
+    """不运行 lifespan（不启动后台任务）的测试客户端"""
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as c:
+        yield c
+
+
+class QueryCounter:
+    """统计执行的 SQL 语句数"""
+
+    def __init__(self):
+        self.statements = []
+
+    def __call__(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement)
+
+    @property
+    def count(self) -> int:
+        return len(self.statements)
+
+    def reset(self):
+        self.statements.clear()
+
+
+@pytest.fixture
+def queries():
+    counter = QueryCounter()
+    event.listen(engine.sync_engine, "before_cursor_execute", counter)
+    yield counter
+    event.remove(engine.sync_engine, "before_cursor_execute", counter)
+
+
+async def create_user(session, **kwargs) -> User:
+    kwargs.setdefault("openid", f"openid-{os.urandom(4).hex()}")
+    kwargs.setdefault("nickname", "测试用户")
+    user = User(**kwargs)
+    session.add(user)
+    await session.commit()
+    return user
+
+
+def auth_headers(user_id: int) -> dict:
+    token = create_access_token({"sub": str(user_id), "type": "user"})
+    return {"Authorization": f"Bearer {token}"}
+
+
+async def create_admin(session, **kwargs) -> Admin:
+    kwargs.setdefault("username", f"admin-{os.urandom(4).hex()}")
+    kwargs.setdefault("password", "-")
+    admin = Admin(**kwargs)
+    session.add(admin)
+    await session.commit()
+    return admin
+
+
+def admin_headers(admin_id: int) -> dict:
+    token = create_access_token({"sub": str(admin_id), "type": "admin"})
+    return {"Authorization": f"Bearer {token}"}
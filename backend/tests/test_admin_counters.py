@@ -0,0 +1,32 @@
+"""
+管理后台返回的计数包含尚未刷新到数据库的增量
+"""
+from app.models.community import Post
+from app.services.counters import counters, POST_COMMENTS, POST_LIKES, POST_VIEWS, USER_FOLLOWERS
+from tests.conftest import admin_headers, create_admin, create_user
+
+
+async def test_audit_posts_merge_pending_counts(client, session):
+    admin = await create_admin(session)
+    user = await create_user(session)
+    post = Post(user_id=user.id, content="今天跑了5公里", view_count=10, like_count=2, comment_count=1)
+    session.add(post)
+    await session.commit()
+
+    await counters.incr(POST_VIEWS, post.id, 5)
+    await counters.incr(POST_LIKES, post.id)
+    await counters.incr(POST_COMMENTS, post.id)
+
+    resp = await client.get("/api/admin/v1/audit/posts", headers=admin_headers(admin.id))
+    item = resp.json()["data"]["list"][0]
+    assert (item["view_count"], item["like_count"], item["comment_count"]) == (15, 3, 2)
+
+
+async def test_user_detail_merges_pending_followers(client, session):
+    admin = await create_admin(session)
+    user = await create_user(session, follower_count=3)
+
+    await counters.incr(USER_FOLLOWERS, user.id, 2)
+
+    resp = await client.get(f"/api/admin/v1/user/{user.id}", headers=admin_headers(admin.id))
+    assert resp.json()["data"]["follower_count"] == 5
@@ -0,0 +1,63 @@
+"""
+AI 流式对话吞吐基准：本地桩服务器模拟大模型（每段输出间隔 DELAY 秒），50 个并发对话
+
+统计总耗时和对话期间无关接口（/health）的 p99 延迟：等待上游输出时不占用事件循环，
+总耗时应远小于顺序执行的耗时（pytest -s 查看数据）。
+"""
+import asyncio
+import time
+
+from tests.conftest import auth_headers, create_user
+from tests.test_ai_stream import CHUNKS, llm  # noqa: F401
+
+CHATS = 50
+DELAY = 0.1
+# 探测请求的计划间隔（秒）
+PROBE_INTERVAL = 0.02
+
+
+async def test_concurrent_chat_streams(client, session, llm):  # noqa: F811
+    users = [await create_user(session) for _ in range(CHATS)]
+    server = await llm(delay=DELAY)
+    latencies = []
+    done = asyncio.Event()
+
+    async def probe():
+        # 延迟从计划发出时间算起，事件循环被阻塞的时间也计入延迟
+        scheduled = time.perf_counter()
+        while not done.is_set():
+            await asyncio.sleep(max(scheduled - time.perf_counter(), 0))
+            await client.get("/health")
+            end = time.perf_counter()
+            latencies.append(end - scheduled)
+            scheduled = max(scheduled + PROBE_INTERVAL, end)
+
+    async def chat(i, user):
+        resp = await client.post(
+            "/api/v1/ai/chat/stream",
+            # 各用户的问题不同，不命中回复缓存
+            json={"message": f"第{i}个问题：怎么补充蛋白质", "session_id": f"bench-{i}"},
+            headers=auth_headers(user.id),
+        )
+        return resp.text.endswith("data: [DONE]\n\n")
+
+    prober = asyncio.create_task(probe())
+    start = time.perf_counter()
+    results = await asyncio.gather(*(chat(i, u) for i, u in enumerate(users)))
+    elapsed = time.perf_counter() - start
+    done.set()
+    await prober
+
+    latencies.sort()
+    p99 = latencies[min(int(len(latencies) * 0.99), len(latencies) - 1)]
+    single = DELAY * len(CHUNKS)
+    print(f"\n{CHATS} 个并发流式对话（单次上游耗时 {single:.1f}s）：总耗时 {elapsed:.2f}s，"
+          f"吞吐 {CHATS / elapsed:.1f} 次/秒，上游最大并发 {server.peak}，"
+          f"/health p99 {p99 * 1000:.1f}ms（{len(latencies)} 次）")
+
+    assert all(results)
+    # 测试库为 SQLite，各对话调用前后的消息写入串行执行，上游调用不会全部同时进行
+    assert server.peak >= 10
+    # 顺序执行需要 CHATS * single 秒
+    assert elapsed < CHATS * single / 3
+    assert p99 < single
@@ -0,0 +1,72 @@
+"""
+对话窗口：超过条数上限的较早消息进入待压缩部分，不会在并入摘要前被丢弃；
+追加消息时不覆盖后台压缩的结果
+"""
+from types import SimpleNamespace
+
+import pytest
+
+from app.services import ai_context
+from app.services.ai_context import MAX_WINDOW_MESSAGES, conversation_context
+from app.services.ai_service import ai_assistant
+from app.services.cache import FakeRedis
+
+
+def _window(count: int) -> dict:
+    return {
+        "summary": None,
+        "summary_until_id": 0,
+        "messages": [
+            {"id": i, "role": "user", "content": "嗯", "tokens": 1} for i in range(1, count + 1)
+        ],
+    }
+
+
+async def test_append_keeps_unsummarized_messages():
+    window = _window(MAX_WINDOW_MESSAGES)
+    record = SimpleNamespace(id=MAX_WINDOW_MESSAGES + 1, role="assistant", content="好的")
+    key = conversation_context._key(1, "s1")
+    await conversation_context._set_cached(key, window)
+    await conversation_context.append(1, "s1", record)
+    cached = await conversation_context._get_cached(key)
+    assert [m["id"] for m in cached["messages"]] == list(range(1, MAX_WINDOW_MESSAGES + 2))
+
+
+def test_select_history_overflows_beyond_message_limit():
+    window = _window(MAX_WINDOW_MESSAGES + 10)
+    history, overflow = conversation_context.select_history(window)
+    assert len(history) == MAX_WINDOW_MESSAGES
+    assert [m["id"] for m in overflow] == list(range(1, 11))
+
+
+@pytest.mark.parametrize("use_redis", [False, True])
+async def test_append_after_compress_keeps_summary(use_redis, monkeypatch):
+    if use_redis:
+        redis = FakeRedis()
+        monkeypatch.setattr(ai_context, "get_redis", lambda: redis)
+
+    async def summarize(previous, messages):
+        return f"摘要到 {messages[-1]['id']}"
+    monkeypatch.setattr(ai_assistant, "summarize", summarize)
+
+    # 准备对话时读取窗口，历史超过上限，较早的消息交给后台压缩
+    window = _window(MAX_WINDOW_MESSAGES + 10)
+    key = conversation_context._key(1, "s1")
+    await conversation_context._set_cached(key, window)
+    await conversation_context.append(
+        1, "s1", SimpleNamespace(id=MAX_WINDOW_MESSAGES + 11, role="user", content="问题")
+    )
+    prepared = await conversation_context._get_cached(key)
+    _, overflow = conversation_context.select_history(prepared)
+
+    # 流式回复期间压缩完成，之后保存回复
+    await conversation_context._compress(1, "s1", overflow)
+    await conversation_context.append(
+        1, "s1", SimpleNamespace(id=MAX_WINDOW_MESSAGES + 12, role="assistant", content="回答")
+    )
+
+    cached = await conversation_context._get_cached(key)
+    until_id = overflow[-1]["id"]
+    assert cached["summary"] == f"摘要到 {until_id}"
+    assert cached["summary_until_id"] == until_id
+    assert [m["id"] for m in cached["messages"]] == list(range(until_id + 1, MAX_WINDOW_MESSAGES + 13))
@@ -0,0 +1,49 @@
+"""
+AI 首轮问答回复缓存：同一分档、精确数据不同的两个用户共用缓存时，回复中不含任一用户的精确数据
+"""
+import pytest
+
+from app.services.ai_service import ai_assistant
+
+BUCKET = {"BMI分类": "偏胖", "BMI建议": "建议控制饮食，增加运动量", "健康目标": "减脂瘦身", "慢性病史": "无"}
+USER_A = {**BUCKET, "年龄": 30, "性别": "男", "身高": "175cm", "体重": "80kg", "BMI": 26.1, "目标体重": "70kg"}
+USER_B = {**BUCKET, "年龄": 45, "性别": "女", "身高": "160cm", "体重": "66kg", "BMI": 25.8, "目标体重": "58kg"}
+EXACT_VALUES = ["175cm", "80kg", "26.1", "70kg", "160cm", "66kg", "25.8", "58kg", "年龄"]
+
+
+@pytest.fixture
+def provider(monkeypatch):
+    prompts = []
+
+    async def complete(messages, max_tokens=1500):
+        # 模拟模型在回复中引用系统提示词里的用户数据
+        system = messages[0]["content"]
+        prompts.append(system)
+        profile = system.split("## 当前用户健康档案", 1)[-1]
+        return f"根据您的档案：{profile}"
+
+    monkeypatch.setattr(ai_assistant, "api_key", "test-key")
+    monkeypatch.setattr(ai_assistant, "_complete", complete)
+    ai_assistant._reply_cache.clear()
+    yield prompts
+    ai_assistant._reply_cache.clear()
+
+
+async def test_cached_reply_has_no_exact_user_data(provider):
+    reply_a = await ai_assistant.chat("怎么减肥比较健康", context=USER_A)
+    reply_b = await ai_assistant.chat("怎么减肥比较健康", context=USER_B)
+
+    # 第二个用户命中缓存
+    assert len(provider) == 1
+    assert reply_a == reply_b
+    assert "偏胖" in reply_b
+    for value in EXACT_VALUES:
+        assert value not in provider[0]
+        assert value not in reply_b
+
+
+async def test_follow_up_turns_use_full_context(provider):
+    history = [{"role": "user", "content": "你好"}, {"role": "assistant", "content": "你好！"}]
+    reply = await ai_assistant.chat("怎么减肥比较健康", context=USER_A, history=history)
+    assert "80kg" in reply
+    assert len(ai_assistant._reply_cache) == 0
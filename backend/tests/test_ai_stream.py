@@ -0,0 +1,173 @@
+"""
+AI 流式对话：本地桩服务器模拟大模型 SSE 接口，验证完整输出与客户端中途断开时的回复保存
+"""
+import asyncio
+import json
+
+import pytest
+from sqlalchemy import select
+
+from app import http_client
+from app.database import async_session_maker
+from app.main import app
+from app.models.system import AIChatRecord
+from app.services import ai_session
+from app.services.ai_service import ai_assistant
+from tests.conftest import auth_headers, create_user
+
+CHUNKS = ["你好", "，建议", "多喝水", "。"]
+
+
+class StubLLM:
+    """模拟 OpenAI 兼容的流式接口：每隔 delay 秒输出一段 CHUNKS，hold_after 段后挂起直到关闭"""
+
+    def __init__(self, hold_after: int = None, delay: float = 0.01):
+        self.hold_after = hold_after
+        self.delay = delay
+        self.active = 0
+        self.peak = 0
+        self._writers = []
+        self._server = None
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self._writers.append(writer)
+        try:
+            head = await reader.readuntil(b"\r\n\r\n")
+            length = 0
+            for line in head.decode().split("\r\n"):
+                if line.lower().startswith("content-length:"):
+                    length = int(line.split(":", 1)[1])
+            await reader.readexactly(length)
+
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+            writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: text/event-stream\r\nConnection: close\r\n\r\n")
+            for i, text in enumerate(CHUNKS):
+                if i == self.hold_after:
+                    await asyncio.Event().wait()
+                event = {"choices": [{"delta": {"content": text}}]}
+                writer.write(f"data: {json.dumps(event, ensure_ascii=False)}\n\n".encode())
+                await writer.drain()
+                await asyncio.sleep(self.delay)
+            writer.write(b"data: [DONE]\n\n")
+            await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError, asyncio.CancelledError):
+            pass
+        finally:
+            self.active = max(self.active - 1, 0)
+            writer.close()
+
+    async def start(self) -> str:
+        self._server = await asyncio.start_server(self._handle, "127.0.0.1", 0)
+        port = self._server.sockets[0].getsockname()[1]
+        return f"http://127.0.0.1:{port}"
+
+    async def stop(self):
+        self._server.close()
+        for writer in self._writers:
+            writer.close()
+        await self._server.wait_closed()
+
+
+async def _add_record(db, user_id, session_id, role, content):
+    # 会话汇总使用 MySQL 的 ON DUPLICATE KEY，测试中只写对话记录
+    record = AIChatRecord(user_id=user_id, session_id=session_id, role=role, content=content)
+    db.add(record)
+    await db.flush()
+    return record
+
+
+@pytest.fixture
+async def llm(monkeypatch):
+    servers = []
+    monkeypatch.setattr(ai_session, "add_message", _add_record)
+
+    async def use(hold_after: int = None, delay: float = 0.01) -> StubLLM:
+        server = StubLLM(hold_after, delay)
+        base_url = await server.start()
+        servers.append(server)
+        monkeypatch.setitem(http_client.HTTP_CLIENTS, "dashscope", {"base_url": base_url})
+        monkeypatch.setattr(ai_assistant, "api_key", "test-key")
+        ai_assistant._reply_cache.clear()
+        await http_client.close_http_clients()
+        return server
+
+    yield use
+    await http_client.close_http_clients()
+    for server in servers:
+        await server.stop()
+
+
+async def _replies(session_id: str) -> list:
+    async with async_session_maker() as session:
+        result = await session.execute(
+            select(AIChatRecord.content).where(
+                AIChatRecord.session_id == session_id,
+                AIChatRecord.role == "assistant",
+            )
+        )
+        return list(result.scalars())
+
+
+async def test_stream_saves_full_reply(client, session, llm):
+    user = await create_user(session)
+    await llm()
+
+    resp = await client.post(
+        "/api/v1/ai/chat/stream",
+        json={"message": "怎么补充营养", "session_id": "s-full"},
+        headers=auth_headers(user.id),
+    )
+
+    events = [line[6:] for line in resp.text.split("\n\n") if line.startswith("data: ")]
+    assert events[-1] == "[DONE]"
+    deltas = [json.loads(e)["delta"] for e in events[:-1]]
+    assert deltas == CHUNKS
+    assert await _replies("s-full") == ["".join(CHUNKS)]
+
+
+async def test_disconnect_saves_partial_reply(session, llm):
+    """上游输出两段后挂起，客户端此时断开，已输出的部分仍应保存"""
+    user = await create_user(session)
+    await llm(hold_after=2)
+
+    body = json.dumps({"message": "怎么补充营养", "session_id": "s-partial"}).encode()
+    headers = [(k.lower().encode(), v.encode()) for k, v in auth_headers(user.id).items()]
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "POST",
+        "scheme": "http",
+        "path": "/api/v1/ai/chat/stream",
+        "raw_path": b"/api/v1/ai/chat/stream",
+        "root_path": "",
+        "query_string": b"",
+        "headers": headers + [(b"content-type", b"application/json")],
+        "client": ("127.0.0.1", 1),
+        "server": ("test", 80),
+    }
+    disconnected = asyncio.Event()
+    request_sent = False
+    deltas = []
+
+    async def receive():
+        nonlocal request_sent
+        if not request_sent:
+            request_sent = True
+            return {"type": "http.request", "body": body, "more_body": False}
+        await disconnected.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        if message["type"] == "http.response.body":
+            for line in message.get("body", b"").decode().split("\n\n"):
+                if line.startswith("data: {"):
+                    deltas.append(json.loads(line[6:])["delta"])
+            if len(deltas) == 2:
+                disconnected.set()
+
+    await asyncio.wait_for(app(scope, receive, send), timeout=10)
+
+    assert deltas == CHUNKS[:2]
+    assert await _replies("s-partial") == ["".join(CHUNKS[:2])]
@@ -0,0 +1,107 @@
+"""
+两级缓存：一级缓存未命中时读取二级缓存、按标签失效、相同 key 只加载一次；
+管理后台更新商品后商品详情接口不再返回旧数据
+"""
+import asyncio
+from decimal import Decimal
+
+import pytest
+
+from app.models.shop import Product
+from app.services.cache import Cache, FakeRedis, cache
+from tests.conftest import admin_headers, create_admin
+
+
+def _process(redis: FakeRedis) -> Cache:
+    """共享同一 Redis 的另一个进程"""
+    return Cache(redis=redis)
+
+
+async def test_local_miss_falls_through_to_redis():
+    redis = FakeRedis()
+    first, second = _process(redis), _process(redis)
+    await first.set("k", {"v": 1}, ttl=60)
+
+    assert await second.get("k") == {"v": 1}
+    # 读到后写入一级缓存，二级缓存删除后仍能命中
+    await redis.delete("cache:k")
+    assert await second.get("k") == {"v": 1}
+    assert await _process(redis).get("k", "missing") == "missing"
+
+
+async def test_invalidate_tags_across_keys_and_processes():
+    redis = FakeRedis()
+    first, second = _process(redis), _process(redis)
+    await first.set("a", 1, tags=["t", "t:1"])
+    await first.set("b", 2, tags=["t", "t:2"])
+    await first.set("c", 3, tags=["u"])
+    # 另一进程读取后一级缓存中也有这些条目
+    assert [await second.get(k) for k in "abc"] == [1, 2, 3]
+
+    await second.invalidate_tags("t:1")
+    assert await _process(redis).get("a") is None
+    assert await _process(redis).get("b") == 2
+
+    await first.invalidate_tags("t")
+    assert await first.get("a") is None
+    assert await first.get("b") is None
+    assert await first.get("c") == 3
+    assert await _process(redis).get("b") is None
+
+
+@pytest.mark.parametrize("use_redis", [False, True])
+async def test_concurrent_misses_load_once(use_redis):
+    redis = FakeRedis() if use_redis else None
+    # 启用 Redis 时两个进程同时未命中，通过加载锁只有一个进程加载
+    processes = [Cache(redis=redis) for _ in range(2 if use_redis else 1)]
+    loads = 0
+
+    async def loader():
+        nonlocal loads
+        loads += 1
+        await asyncio.sleep(0.1)
+        return {"n": loads}
+
+    results = await asyncio.gather(*(
+        processes[i % len(processes)].get_or_load("slow", loader, ttl=60) for i in range(20)
+    ))
+    assert loads == 1
+    assert results == [{"n": 1}] * 20
+
+
+async def test_admin_update_invalidates_product_detail(client, session, monkeypatch):
+    monkeypatch.setattr(cache, "_redis", FakeRedis())
+    product = Product(name="旧名称", original_price=Decimal("10"), current_price=Decimal("10"),
+                      stock=5, is_on_sale=1)
+    session.add(product)
+    await session.commit()
+    admin = await create_admin(session)
+
+    url = f"/api/v1/shop/product/{product.id}"
+    assert (await client.get(url)).json()["data"]["name"] == "旧名称"
+
+    resp = await client.put(
+        f"/api/admin/v1/product/{product.id}", json={"name": "新名称", "stock": 3},
+        headers=admin_headers(admin.id),
+    )
+    assert resp.json()["code"] == 200
+
+    data = (await client.get(url)).json()["data"]
+    assert data["name"] == "新名称"
+    assert data["stock"] == 3
+
+
+async def test_product_stock_is_not_cached(client, session):
+    product = Product(name="商品", original_price=Decimal("10"), current_price=Decimal("10"),
+                      stock=5, sales_count=0, is_on_sale=1)
+    session.add(product)
+    await session.commit()
+
+    url = f"/api/v1/shop/product/{product.id}"
+    assert (await client.get(url)).json()["data"]["stock"] == 5
+
+    # 下单扣减库存不失效详情缓存
+    product.stock, product.sales_count = 3, 2
+    await session.commit()
+    data = (await client.get(url)).json()["data"]
+    assert (data["stock"], data["sales_count"]) == (3, 2)
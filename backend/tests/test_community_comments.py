@@ -0,0 +1,50 @@
+"""
+评论列表：回复数由一次分组聚合得出，查询数与评论数、每页条数无关
+"""
+from sqlalchemy import insert, select
+
+from app.models.community import Post, PostComment
+from tests.conftest import create_user
+
+TOP_LEVEL = 2000
+REPLIES_PER_COMMENT = 4
+
+
+async def _seed_post_with_comments(session) -> int:
+    """一条动态下 1 万条评论：2000 条顶层评论，每条 4 条回复"""
+    user = await create_user(session)
+    post = Post(user_id=user.id, content="测试动态", status=1)
+    session.add(post)
+    await session.commit()
+
+    await session.execute(insert(PostComment), [
+        {"post_id": post.id, "user_id": user.id, "content": f"评论{i}"}
+        for i in range(TOP_LEVEL)
+    ])
+    top_ids = (await session.execute(
+        select(PostComment.id).where(PostComment.post_id == post.id)
+    )).scalars().all()
+    await session.execute(insert(PostComment), [
+        {"post_id": post.id, "user_id": user.id, "parent_id": parent_id, "content": "回复"}
+        for parent_id in top_ids for _ in range(REPLIES_PER_COMMENT)
+    ])
+    await session.commit()
+    return post.id
+
+
+async def test_reply_counts_use_constant_queries(client, session, queries):
+    post_id = await _seed_post_with_comments(session)
+
+    counts = {}
+    for page, page_size in ((1, 5), (1, 50), (30, 50)):
+        queries.reset()
+        resp = await client.get(f"/api/v1/community/post/{post_id}/comments",
+                                params={"page": page, "page_size": page_size})
+        body = resp.json()
+        assert body["code"] == 200
+        items = body["data"]["list"]
+        assert len(items) == page_size
+        assert all(item["reply_count"] == REPLIES_PER_COMMENT for item in items)
+        counts[(page, page_size)] = queries.count
+
+    assert len(set(counts.values())) == 1, counts
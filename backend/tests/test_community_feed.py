@@ -0,0 +1,46 @@
+"""
+动态列表游标分页：置顶、相同发布时间的动态逐页读取不重复、不遗漏，且每页使用可走索引范围的条件
+"""
+from datetime import datetime, timedelta
+
+from sqlalchemy import insert
+
+from app.models.community import Post
+from tests.conftest import create_user
+
+POSTS = 23
+
+
+async def test_cursor_pages_cover_feed_in_order(client, session, queries):
+    user = await create_user(session)
+    base = datetime(2026, 1, 1, 12, 0, 0)
+    # 每 3 条共用一个发布时间，每 5 条置顶 1 条
+    await session.execute(insert(Post), [
+        {"user_id": user.id, "content": f"动态{i}", "status": 1,
+         "is_top": 1 if i % 5 == 0 else 0, "created_at": base + timedelta(minutes=i // 3)}
+        for i in range(POSTS)
+    ])
+    await session.commit()
+
+    expected = [
+        p["id"] for p in sorted(
+            [{"id": i + 1, "is_top": 1 if i % 5 == 0 else 0, "created_at": base + timedelta(minutes=i // 3)}
+             for i in range(POSTS)],
+            key=lambda p: (p["is_top"], p["created_at"], p["id"]), reverse=True,
+        )
+    ]
+
+    seen, cursor = [], ""
+    while True:
+        queries.reset()
+        resp = await client.get("/api/v1/community/posts", params={"cursor": cursor, "page_size": 4})
+        data = resp.json()["data"]
+        seen += [item["id"] for item in data["list"]]
+        if cursor:
+            seek = next(s for s in queries.statements if "FROM posts" in s and "LIMIT" in s)
+            assert " OR " in seek and "(posts.is_top, posts.created_at, posts.id) <" not in seek
+        if not data["has_more"]:
+            break
+        cursor = data["next_cursor"]
+
+    assert seen == expected
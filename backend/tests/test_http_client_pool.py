@@ -0,0 +1,93 @@
+"""
+共享 HTTP 连接池：本地桩服务器模拟微信 jscode2session，统计 1000 次登录建立的连接数
+"""
+import asyncio
+import json
+
+import pytest
+
+from app import http_client
+from app.config import settings
+from app.services import rollup_service
+from tests.conftest import create_user
+
+LOGINS = 1000
+CONCURRENCY = 50
+
+
+class StubServer:
+    """最小 HTTP/1.1 keep-alive 服务器，记录建立的连接数和请求数"""
+
+    def __init__(self):
+        self.connections = 0
+        self.requests = 0
+        self._server = None
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.connections += 1
+        body = json.dumps({"openid": "stub-openid", "session_key": "k"}).encode()
+        try:
+            while True:
+                await reader.readuntil(b"\r\n\r\n")
+                self.requests += 1
+                writer.write(
+                    b"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\n"
+                    b"Content-Length: " + str(len(body)).encode() + b"\r\n\r\n" + body
+                )
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    async def start(self) -> str:
+        self._server = await asyncio.start_server(self._handle, "127.0.0.1", 0)
+        port = self._server.sockets[0].getsockname()[1]
+        return f"http://127.0.0.1:{port}"
+
+    async def stop(self):
+        self._server.close()
+        await self._server.wait_closed()
+
+
+@pytest.fixture
+async def stub(monkeypatch, session):
+    # 预先创建桩服务器返回的用户，登录只走查询
+    await create_user(session, openid="stub-openid")
+    server = StubServer()
+    base_url = await server.start()
+
+    async def noop(*args, **kwargs):
+        pass
+    monkeypatch.setattr(rollup_service, "incr_daily", noop)
+    monkeypatch.setitem(http_client.HTTP_CLIENTS, "wechat", {"base_url": base_url})
+    monkeypatch.setattr(settings, "WECHAT_APPID", "appid")
+    monkeypatch.setattr(settings, "WECHAT_SECRET", "secret")
+    await http_client.close_http_clients()
+    yield server
+    await http_client.close_http_clients()
+    await server.stop()
+
+
+async def test_logins_reuse_pooled_connections(client, stub):
+    semaphore = asyncio.Semaphore(CONCURRENCY)
+
+    async def login():
+        async with semaphore:
+            resp = await client.post("/api/v1/auth/login", json={"code": "c"})
+            return resp.json()["code"]
+
+    codes = await asyncio.gather(*(login() for _ in range(LOGINS)))
+    print(f"\n{LOGINS} 次登录，建立连接 {stub.connections} 个")
+
+    assert codes == [200] * LOGINS
+    assert stub.requests == LOGINS
+    # 连接数受连接池上限约束，且远小于登录次数
+    assert stub.connections <= min(CONCURRENCY, settings.HTTP_MAX_CONNECTIONS)
+
+
+async def test_sequential_logins_use_one_connection(client, stub):
+    for _ in range(20):
+        resp = await client.post("/api/v1/auth/login", json={"code": "c"})
+        assert resp.json()["code"] == 200
+    assert stub.connections == 1
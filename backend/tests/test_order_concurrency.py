@@ -0,0 +1,62 @@
+"""
+并发下单：200 个同时下单请求抢 50 件库存，不超卖
+"""
+import asyncio
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import func, select
+
+from app.models.order import Order, OrderItem
+from app.models.shop import Product
+from app.models.user import UserAddress
+from app.services import rollup_service
+from tests.conftest import auth_headers, create_user
+
+STOCK = 50
+ORDERS = 200
+USERS = 20
+
+
+@pytest.fixture(autouse=True)
+def _skip_rollup(monkeypatch):
+    # 汇总表使用 MySQL 专有的 ON DUPLICATE KEY UPDATE，与库存无关，测试中跳过
+    async def noop(*args, **kwargs):
+        pass
+    monkeypatch.setattr(rollup_service, "incr_daily", noop)
+
+
+async def test_concurrent_orders_do_not_oversell(client, session):
+    product = Product(name="限量商品", original_price=Decimal("10"), current_price=Decimal("10"),
+                      stock=STOCK, is_on_sale=1)
+    session.add(product)
+    await session.commit()
+    product_id = product.id
+    buyers = []
+    for _ in range(USERS):
+        user = await create_user(session)
+        address = UserAddress(user_id=user.id, receiver_name="张三", receiver_phone="13800000000",
+                              province="省", city="市", district="区", detail="地址")
+        session.add(address)
+        await session.commit()
+        buyers.append((auth_headers(user.id), address.id))
+
+    async def place(n: int):
+        headers, address_id = buyers[n % USERS]
+        resp = await client.post("/api/v1/order", headers=headers, json={
+            "items": [{"product_id": product_id, "quantity": 1}],
+            "address_id": address_id,
+        })
+        return resp.json()
+
+    results = await asyncio.gather(*(place(n) for n in range(ORDERS)))
+
+    succeeded = [r for r in results if r["code"] == 200]
+    rejected = [r for r in results if r["code"] == 400]
+    assert len(succeeded) == STOCK
+    assert len(rejected) == ORDERS - STOCK
+    assert all("库存不足" in r["message"] for r in rejected)
+
+    assert (await session.execute(select(Product.stock).where(Product.id == product_id))).scalar() == 0
+    assert (await session.execute(select(func.count()).select_from(Order))).scalar() == STOCK
+    assert (await session.execute(select(func.count()).select_from(OrderItem))).scalar() == STOCK
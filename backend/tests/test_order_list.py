@@ -0,0 +1,66 @@
+"""
+订单列表：订单明细批量加载，查询数与订单数无关
+"""
+from decimal import Decimal
+
+from sqlalchemy import insert, select
+
+from app.models.order import Order, OrderItem
+from tests.conftest import admin_headers, auth_headers, create_admin, create_user
+
+ORDERS = 50
+ITEMS_PER_ORDER = 3
+
+
+async def _seed_orders(session, user_id: int):
+    await session.execute(insert(Order), [
+        {"order_no": f"NO{i:06d}", "user_id": user_id, "status": "pending",
+         "total_amount": Decimal("30.00"), "pay_amount": Decimal("30.00"),
+         "receiver_name": "张三", "receiver_phone": "13800000000", "receiver_address": "测试地址"}
+        for i in range(ORDERS)
+    ])
+    order_ids = (await session.execute(select(Order.id))).scalars().all()
+    await session.execute(insert(OrderItem), [
+        {"order_id": order_id, "product_id": n + 1, "product_name": f"商品{n}",
+         "price": Decimal("10.00"), "quantity": 1}
+        for order_id in order_ids for n in range(ITEMS_PER_ORDER)
+    ])
+    await session.commit()
+
+
+async def _query_counts(client, queries, url, headers):
+    counts = []
+    for page_size in (5, ORDERS):
+        queries.reset()
+        resp = await client.get(url, params={"page_size": page_size}, headers=headers)
+        body = resp.json()
+        assert body["code"] == 200, body
+        orders = body["data"]["list"]
+        assert len(orders) == page_size
+        assert all(len(o["items"]) == ITEMS_PER_ORDER for o in orders)
+        counts.append(queries.count)
+    return counts
+
+
+async def test_user_order_list_batches_items(client, session, queries):
+    user = await create_user(session)
+    await _seed_orders(session, user.id)
+    headers = auth_headers(user.id)
+
+    # 预热登录用户缓存，之后只统计订单相关查询
+    await client.get("/api/v1/order/list", headers=headers)
+    small, large = await _query_counts(client, queries, "/api/v1/order/list", headers)
+    assert small == large
+    # 总数 + 订单 + 明细
+    assert large == 3, queries.statements
+
+
+async def test_admin_order_list_batches_items(client, session, queries):
+    user = await create_user(session)
+    admin = await create_admin(session)
+    await _seed_orders(session, user.id)
+
+    small, large = await _query_counts(
+        client, queries, "/api/admin/v1/order/list", admin_headers(admin.id)
+    )
+    assert small == large
@@ -0,0 +1,80 @@
+"""
+动态浏览计数：详情缓存不含计数，其他进程落库后计数不回退；事件流中被裁剪的待确认事件不会阻塞消费
+"""
+from sqlalchemy import update
+
+from app.models.community import Post
+from app.services.counters import counters, POST_VIEWS
+from app.services.view_events import ViewEventQueue
+from tests.conftest import create_user
+
+
+async def test_detail_counts_do_not_go_backwards_after_flush(client, session):
+    user = await create_user(session)
+    post = Post(user_id=user.id, content="早餐吃了燕麦", status=1, view_count=0)
+    session.add(post)
+    await session.commit()
+    url = f"/api/v1/community/post/{post.id}"
+
+    # 首次读取写入详情缓存
+    assert (await client.get(url)).json()["data"]["view_count"] == 0
+
+    await counters.incr(POST_VIEWS, post.id, 3)
+    assert (await client.get(url)).json()["data"]["view_count"] == 3
+
+    # 模拟其他进程刷新计数：增量写入数据库并清空缓冲，本进程的详情缓存未失效
+    await session.execute(update(Post).where(Post.id == post.id).values(view_count=3))
+    await session.commit()
+    counters._pending.clear()
+
+    assert (await client.get(url)).json()["data"]["view_count"] == 3
+
+
+class FakeStream:
+    """模拟 Redis Stream 消费组：entries 为流中现存事件，pel 为本消费者已读取未确认的事件"""
+
+    def __init__(self, entries, pel):
+        self.entries = dict(entries)
+        self.pel = list(pel)
+        self.last_delivered = max(self.pel, default="0-0")
+        self.acked = []
+
+    async def xautoclaim(self, *args, **kwargs):
+        return ["0-0", [], []]
+
+    async def xreadgroup(self, group, consumer, streams, count=None, block=None):
+        stream_id = next(iter(streams.values()))
+        if stream_id == "0":
+            # 已被裁剪的事件仍在待确认列表中，内容为空
+            batch = [(i, self.entries.get(i)) for i in self.pel[:count]]
+        else:
+            batch = [(i, f) for i, f in sorted(self.entries.items()) if i > self.last_delivered][:count]
+            self.pel += [i for i, _ in batch]
+            if batch:
+                self.last_delivered = batch[-1][0]
+        return [["events:post_view", batch]] if batch else []
+
+    async def xack(self, key, group, *ids):
+        self.acked += ids
+        self.pel = [i for i in self.pel if i not in ids]
+
+    async def xdel(self, key, *ids):
+        for i in ids:
+            self.entries.pop(i, None)
+
+
+async def test_stream_acks_trimmed_pending_entries(monkeypatch):
+    applied = []
+
+    async def apply(post_ids):
+        applied.extend(post_ids)
+    queue = ViewEventQueue()
+    monkeypatch.setattr(queue, "_apply", apply)
+    # 1-1、1-2 已读取未确认，随后被 MAXLEN 裁剪；2-1 是新事件
+    redis = FakeStream(entries={"2-1": {"post_id": "7"}}, pel=["1-1", "1-2"])
+
+    assert await queue._consume_stream(redis, block_ms=None) == 1
+    assert applied == [7]
+    assert redis.pel == []
+    assert set(redis.acked) == {"1-1", "1-2", "2-1"}
+    assert redis.entries == {}
@@ -0,0 +1,73 @@
+"""
+搜索索引基准：10 万条名称，统计构建耗时、未缓存查询和缓存命中查询的单次耗时（pytest -s 查看数据）
+
+常见查询（命中几十到几百条）未缓存时应在 1ms 内完成；命中数千条的宽泛查询主要耗时在排序，
+排序结果缓存后与命中数无关。索引在后台线程中构建，构建时间不影响查询。
+"""
+import random
+import statistics
+import time
+
+import pytest
+
+from app.services import search_index
+from app.services.search_index import SearchIndex
+
+DOCS = 100_000
+ROUNDS = 20
+FOODS = ["西红柿", "番茄", "鸡蛋", "牛肉", "鸡胸肉", "豆腐", "菠菜", "土豆", "米饭", "面条",
+         "牛奶", "酸奶", "苹果", "香蕉", "燕麦", "玉米", "红薯", "黄瓜", "胡萝卜", "三文鱼",
+         "虾仁", "猪肉", "芹菜", "西兰花", "蘑菇", "青椒", "茄子", "白菜", "海带", "紫菜"]
+COOKING = ["炒", "炖", "蒸", "煮", "烤", "凉拌", "红烧", "清蒸", "炸", "焖"]
+# 常见查询：完整菜名、菜名 + 编号、不存在的菜名
+QUERIES = ["西红柿炒鸡蛋", "红烧牛肉", "鸡蛋1", "清蒸三文鱼", "土豆炖牛肉", "燕麦牛奶", "12345", "清蒸鲈鱼"]
+# 宽泛查询：命中约 6% 的条目
+BROAD_QUERIES = ["三文鱼", "西兰花"]
+
+
+def _rows() -> list:
+    rng = random.Random(0)
+    rows = []
+    for i in range(DOCS):
+        a, b = rng.sample(FOODS, 2)
+        name = f"{a}{rng.choice(COOKING)}{b}{i}"
+        rows.append((i, name, {"id": i, "name": name}))
+    return rows
+
+
+@pytest.fixture(scope="module")
+def index():
+    # pypinyin 逐条转换拼音占构建时间的大部分（10 万条约半分钟），基准只比较中文查询，不索引拼音
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setattr(search_index, "lazy_pinyin", None)
+        index = SearchIndex()
+        start = time.perf_counter()
+        index.build(_rows())
+        index.build_seconds = time.perf_counter() - start
+    return index
+
+
+def _timings(index: SearchIndex, query: str, cold: bool) -> list:
+    timings = []
+    for _ in range(ROUNDS):
+        if cold:
+            index._ranked.clear()
+        start = time.perf_counter()
+        index.search(query)
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def test_search_benchmark(index):
+    assert len(index) == DOCS
+    lines = []
+    cold, cached = {}, {}
+    for query in QUERIES + BROAD_QUERIES:
+        _, total = index.search(query)
+        cold[query] = statistics.median(_timings(index, query, cold=True))
+        cached[query] = max(_timings(index, query, cold=False))
+        lines.append(f"{query}（{total} 条）未缓存 {cold[query] * 1000:.3f}ms，缓存 {cached[query] * 1e6:.0f}µs")
+    print(f"\n{DOCS} 条构建 {index.build_seconds:.2f}s\n" + "\n".join(lines))
+
+    assert statistics.median(cold[q] for q in QUERIES) < 0.001
+    assert max(cached.values()) < 0.001
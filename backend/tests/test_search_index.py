@@ -0,0 +1,123 @@
+"""
+进程内搜索索引：排序、归一化、二元组交集后的子串校验、拼音（未安装 pypinyin 时跳过）、
+增删文档后倒排表与全量构建一致
+"""
+import pytest
+
+from app.services import search_index
+from app.services.search_index import SearchIndex, _candidates, normalize
+
+
+def _names(index: SearchIndex, keyword: str) -> list:
+    docs, _ = index.search(keyword, limit=None)
+    return [d["name"] for d in docs]
+
+
+def _index(*names, texts=None) -> SearchIndex:
+    index = SearchIndex()
+    index.build([(i, n, {"id": i, "name": n}, (texts or {}).get(n, ())) for i, n in enumerate(names)])
+    return index
+
+
+def _postings(index: SearchIndex) -> tuple:
+    state = index._state
+    return state.name_grams, state.pinyin_grams, state.text_grams, state.keys, state.docs
+
+
+def test_normalize():
+    assert normalize("ＡＢＣ１２") == "abc12"
+    assert normalize(" 西红柿（番茄）-Tomato ") == "西红柿番茄tomato"
+    assert normalize(None) == ""
+
+
+def test_ranking_order():
+    index = _index("西红柿汁", "小番茄西红柿", "西红柿", "西红柿炒鸡蛋", "番茄",
+                   texts={"番茄": ["又名西红柿"]})
+    # 完全匹配 > 前缀（短的在前）> 包含 > 附加文本
+    assert _names(index, "西红柿") == ["西红柿", "西红柿汁", "西红柿炒鸡蛋", "小番茄西红柿", "番茄"]
+    # 查询同样归一化
+    assert _names(index, " 西红柿！") == _names(index, "西红柿")
+    docs, total = index.search("西红柿", offset=1, limit=2)
+    assert [d["name"] for d in docs] == ["西红柿汁", "西红柿炒鸡蛋"]
+    assert total == 5
+
+
+def test_bigram_candidates_are_checked_as_substrings():
+    index = _index("红豆烧饼", "红烧肉")
+    # "红豆烧饼" 不含二元组 "红烧"
+    assert _candidates(index._state.name_grams, "红烧") == {1}
+    assert _candidates(index._state.name_grams, "鸡蛋") == set()
+    assert _names(index, "红烧") == ["红烧肉"]
+    # 含有查询的全部二元组但不连续，需要子串校验排除
+    index = _index("abxbc", "abc")
+    assert _candidates(index._state.name_grams, "abc") == {0, 1}
+    assert _names(index, "abc") == ["abc"]
+
+
+def test_where_filter_and_total():
+    index = _index("牛奶", "酸牛奶", "牛奶燕麦")
+    docs, total = index.search("牛奶", where=lambda d: d["name"] != "酸牛奶")
+    assert [d["name"] for d in docs] == ["牛奶", "牛奶燕麦"]
+    assert total == 2
+
+
+def test_pinyin_search():
+    pytest.importorskip("pypinyin")
+    index = _index("香蕉", "西红柿", "西红柿炒鸡蛋", "小番茄西红柿")
+    assert _names(index, "xihongshi") == ["西红柿", "西红柿炒鸡蛋", "小番茄西红柿"]
+    # 都只匹配首字母，同级按名称长度、名称排序
+    assert _names(index, "xhs") == ["西红柿", "小番茄西红柿", "西红柿炒鸡蛋"]
+    # 中文名称匹配排在拼音匹配之前
+    index = _index("西红柿", "xhs饮料")
+    assert _names(index, "xhs") == ["xhs饮料", "西红柿"]
+
+
+def test_pinyin_skipped_without_pypinyin(monkeypatch):
+    monkeypatch.setattr(search_index, "lazy_pinyin", None)
+    index = _index("西红柿", "tomato")
+    assert index._state.pinyin_grams == {}
+    assert _names(index, "xihongshi") == []
+    assert _names(index, "西红柿") == ["西红柿"]
+    assert _names(index, "TOMATO") == ["tomato"]
+
+
+def test_remove_clears_postings():
+    index = _index("西红柿炒鸡蛋", texts={"西红柿炒鸡蛋": ["家常菜"]})
+    assert _names(index, "家常") == ["西红柿炒鸡蛋"]
+    index.remove(0)
+    assert _postings(index) == ({}, {}, {}, {}, {})
+    assert _names(index, "西红柿") == []
+    assert index.get(0) is None
+    # 删除不存在的文档不报错
+    index.remove(0)
+
+
+def test_add_and_remove_match_full_build():
+    index = _index("西红柿", "鸡蛋", "牛奶")
+    assert _names(index, "鸡蛋") == ["鸡蛋"]
+
+    # 更新名称后旧名称不再命中，已缓存的查询结果失效
+    index.add(1, "鸭蛋", {"id": 1, "name": "鸭蛋"}, ["咸蛋"])
+    index.add(3, "牛奶燕麦", {"id": 3, "name": "牛奶燕麦"})
+    index.remove(0)
+    assert _names(index, "鸡蛋") == []
+    assert _names(index, "蛋") == ["鸭蛋"]
+    assert _names(index, "牛奶") == ["牛奶", "牛奶燕麦"]
+
+    rebuilt = SearchIndex()
+    rebuilt.build([
+        (1, "鸭蛋", {"id": 1, "name": "鸭蛋"}, ["咸蛋"]),
+        (2, "牛奶", {"id": 2, "name": "牛奶"}),
+        (3, "牛奶燕麦", {"id": 3, "name": "牛奶燕麦"}),
+    ])
+    assert _postings(index) == _postings(rebuilt)
+
+
+def test_cached_ranking_ignored_after_rebuild():
+    index = _index("西红柿")
+    assert _names(index, "西红柿") == ["西红柿"]
+    state = index._state
+    # 模拟后台线程替换索引后、清空查询缓存前的查询
+    index.build([(5, "西红柿汁", {"id": 5, "name": "西红柿汁"})])
+    index._ranked.set(normalize("西红柿"), (state, [0]))
+    assert _names(index, "西红柿") == ["西红柿汁"]
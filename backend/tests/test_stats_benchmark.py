@@ -0,0 +1,117 @@
+"""
+个人运动/饮食统计微基准：5000 条记录的用户
+
+对比分组聚合（当前实现）与加载全部 ORM 对象后在 Python 中累加（旧实现），
+校验结果一致，并比较峰值内存和耗时（pytest -s 查看数据）。
+"""
+import time
+import tracemalloc
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+
+from sqlalchemy import insert, select
+
+from app.models.food import FoodRecord
+from app.models.sport import SportRecord
+from tests.conftest import auth_headers, create_user
+
+RECORDS = 5000
+DAYS = 30
+# 每条运动记录附带的 GPS 轨迹点数
+GPS_POINTS = 50
+
+
+async def _seed(session, user_id: int):
+    now = datetime.now()
+    track = {"points": [[30.0 + i / 1e4, 120.0 + i / 1e4, i] for i in range(GPS_POINTS)]}
+    await session.execute(insert(SportRecord), [
+        {"user_id": user_id, "sport_type": ("running", "walking", "cycling")[i % 3],
+         "duration": 30, "calories": 200, "distance": Decimal("3000.00"), "gps_track": track,
+         "start_time": now - timedelta(days=i % (DAYS - 1), hours=1),
+         "end_time": now - timedelta(days=i % (DAYS - 1))}
+        for i in range(RECORDS)
+    ])
+    await session.execute(insert(FoodRecord), [
+        {"user_id": user_id, "meal_type": ("breakfast", "lunch", "dinner", "snack")[i % 4],
+         "record_date": date.today() - timedelta(days=i % (DAYS - 1)), "food_name": "米饭",
+         "calories": 100, "protein": Decimal("2.50"), "carbs": Decimal("20.00"), "fat": Decimal("0.50")}
+        for i in range(RECORDS)
+    ])
+    await session.commit()
+
+
+async def _measure(fn):
+    tracemalloc.start()
+    started = time.perf_counter()
+    result = await fn()
+    elapsed = time.perf_counter() - started
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return result, elapsed, peak
+
+
+def _report(name, new, old):
+    print(f"\n{name}: 聚合 {new[1] * 1000:.1f}ms / {new[2] / 1e6:.2f}MB，"
+          f"ORM 加载 {old[1] * 1000:.1f}ms / {old[2] / 1e6:.2f}MB")
+
+
+async def test_sport_stats_aggregates_in_sql(client, session):
+    user = await create_user(session)
+    await _seed(session, user.id)
+    headers = auth_headers(user.id)
+    await client.get("/api/v1/stats/sport", headers=headers)
+
+    async def aggregated():
+        return (await client.get("/api/v1/stats/sport", params={"days": DAYS}, headers=headers)).json()["data"]
+
+    async def hydrated():
+        start = datetime.now() - timedelta(days=DAYS)
+        records = (await session.execute(select(SportRecord).where(
+            SportRecord.user_id == user.id, SportRecord.start_time >= start
+        ))).scalars().all()
+        return {
+            "workout_count": len(records),
+            "total_duration": sum(r.duration for r in records),
+            "total_calories": sum(r.calories for r in records),
+            "total_distance": round(sum(float(r.distance or 0) for r in records), 2),
+        }
+
+    new = await _measure(aggregated)
+    old = await _measure(hydrated)
+    _report("运动统计", new, old)
+
+    for key, value in old[0].items():
+        assert new[0][key] == value, key
+    assert new[0]["workout_count"] == RECORDS
+    assert new[2] < old[2] / 5
+
+
+async def test_food_stats_aggregates_in_sql(client, session):
+    user = await create_user(session)
+    await _seed(session, user.id)
+    headers = auth_headers(user.id)
+    await client.get("/api/v1/stats/food", headers=headers)
+
+    async def aggregated():
+        return (await client.get("/api/v1/stats/food", params={"days": DAYS}, headers=headers)).json()["data"]
+
+    async def hydrated():
+        start = date.today() - timedelta(days=DAYS)
+        records = (await session.execute(select(FoodRecord).where(
+            FoodRecord.user_id == user.id, FoodRecord.record_date >= start
+        ))).scalars().all()
+        return {
+            "record_count": len(records),
+            "total_calories": sum(r.calories for r in records),
+            "total_protein": round(float(sum(r.protein for r in records)), 1),
+            "total_fat": round(float(sum(r.fat for r in records)), 1),
+        }
+
+    new = await _measure(aggregated)
+    old = await _measure(hydrated)
+    _report("饮食统计", new, old)
+
+    for key, value in old[0].items():
+        assert new[0][key] == value, key
+    assert new[0]["record_count"] == RECORDS
+    assert new[2] < old[2] / 2
@@ -0,0 +1,99 @@
+"""
+Token 吊销：载荷缓存命中时仍检查吊销、按账号吊销只影响此前签发的 Token、
+清理已过期的吊销记录；布隆过滤器的误判率
+"""
+import secrets
+import time
+
+import pytest
+from jose import jwt
+
+from app.config import settings
+from app.services.token_cache import token_cache
+from app.services.token_revocation import RevocationRegistry
+from app.utils import security
+from app.utils.bloom import BloomFilter
+from app.utils.security import create_access_token, revoke_subject_tokens, revoke_token, verify_token
+from tests.conftest import auth_headers, create_user
+
+
+@pytest.fixture(autouse=True)
+def registry(monkeypatch) -> RevocationRegistry:
+    registry = RevocationRegistry()
+    monkeypatch.setattr(security, "revocation_registry", registry)
+    return registry
+
+
+def _token(sub: int, iat: int) -> str:
+    claims = {"sub": str(sub), "type": "user", "iat": iat, "exp": iat + 600, "jti": secrets.token_hex(8)}
+    return jwt.encode(claims, settings.JWT_SECRET_KEY, algorithm=settings.JWT_ALGORITHM)
+
+
+async def test_revoked_token_rejected_on_cache_hit(registry):
+    token = create_access_token({"sub": "1", "type": "user"})
+    payload = await verify_token(token)
+    assert payload is not None
+    assert token_cache.get(token) == payload
+
+    # 其他进程吊销（同步到本进程），本进程的载荷缓存未清除
+    await registry.revoke(payload["jti"], payload["exp"])
+    assert token_cache.get(token) == payload
+    assert await verify_token(token) is None
+    assert registry.stats["bloom_hits"] == 1
+
+    other = create_access_token({"sub": "1", "type": "user"})
+    assert await verify_token(other) is not None
+
+
+async def test_logout_rejects_token_on_next_request(client, session):
+    user = await create_user(session)
+    headers = auth_headers(user.id)
+    assert (await client.get("/api/v1/user/profile", headers=headers)).status_code == 200
+
+    await revoke_token(headers["Authorization"].split()[1])
+    assert (await client.get("/api/v1/user/profile", headers=headers)).status_code == 401
+
+
+async def test_revoke_subject_only_rejects_earlier_tokens():
+    now = int(time.time())
+    before = _token(1, now - 10)
+    other_user = _token(2, now - 10)
+    assert await verify_token(before) is not None
+
+    await revoke_subject_tokens("user", 1)
+
+    assert await verify_token(before) is None
+    assert await verify_token(other_user) is not None
+    # 吊销后签发（含同一秒内重新登录）的 Token 有效
+    assert await verify_token(_token(1, now + 1)) is not None
+    assert await verify_token(create_access_token({"sub": "1", "type": "user"})) is not None
+
+
+async def test_prune_local_drops_expired(registry):
+    now = time.time()
+    await registry.revoke("expired", now - 1)
+    await registry.revoke("active", now + 600)
+    await registry.revoke_subject("user", 2)
+    # 早于 Token 有效期的账号级吊销，此前签发的 Token 都已过期
+    registry._not_before["user:1"] = int(now) - settings.JWT_EXPIRE_MINUTES * 60 - 1
+    assert "expired" in registry._bloom
+
+    await registry.sync(full=True)
+
+    assert set(registry._revoked) == {"active"}
+    assert "expired" not in registry._bloom
+    assert "active" in registry._bloom
+    assert set(registry._not_before) == {"user:2"}
+
+
+def test_bloom_filter_false_positive_rate():
+    capacity = 10000
+    bloom = BloomFilter(capacity, error_rate=0.01)
+    members = [f"member-{i}" for i in range(capacity)]
+    for m in members:
+        bloom.add(m)
+
+    assert all(m in bloom for m in members)
+    probes = 50000
+    false_positives = sum(f"other-{i}" in bloom for i in range(probes))
+    assert false_positives / probes < 0.02
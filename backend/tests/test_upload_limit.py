@@ -0,0 +1,81 @@
+"""
+上传大小限制：超限的请求在接收请求体之前（或接收到超限时）被拒绝，正常上传不受影响
+"""
+import json
+
+from app.config import settings
+from app.main import app
+from tests.conftest import auth_headers, create_user
+
+PNG = b"\x89PNG\r\n\x1a\n" + b"\x00" * 100
+CHUNK = 1024 * 1024
+PART_HEADER = (
+    b"--x\r\n"
+    b'Content-Disposition: form-data; name="file"; filename="a.png"\r\n'
+    b"Content-Type: image/png\r\n\r\n"
+)
+
+
+async def _call(headers: list, chunks: int):
+    """直接调用 ASGI 应用：请求体为一个文件部分的头和 chunks 个 1MB 块，返回 (状态码, 响应体, 读取的块数)"""
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "POST",
+        "scheme": "http",
+        "path": "/api/v1/upload/image",
+        "raw_path": b"/api/v1/upload/image",
+        "root_path": "",
+        "query_string": b"",
+        "headers": [(b"content-type", b"multipart/form-data; boundary=x")] + headers,
+        "client": ("127.0.0.1", 1),
+        "server": ("test", 80),
+    }
+    reads = 0
+    messages = []
+
+    async def receive():
+        nonlocal reads
+        if reads == 0:
+            reads += 1
+            return {"type": "http.request", "body": PART_HEADER + PNG, "more_body": True}
+        reads += 1
+        return {"type": "http.request", "body": b"\x00" * CHUNK, "more_body": reads <= chunks}
+
+    async def send(message):
+        messages.append(message)
+
+    await app(scope, receive, send)
+    status = messages[0]["status"]
+    body = json.loads(b"".join(m.get("body", b"") for m in messages[1:]))
+    return status, body, reads
+
+
+async def test_rejects_declared_length_without_reading_body():
+    length = str(settings.MAX_FILE_SIZE * 10).encode()
+    status, body, reads = await _call([(b"content-length", length)], chunks=100)
+    assert status == 413
+    assert body["code"] == 413
+    assert reads == 0
+
+
+async def test_stops_reading_chunked_body_past_limit():
+    chunks = settings.MAX_FILE_SIZE // CHUNK * 3
+    status, body, reads = await _call([(b"transfer-encoding", b"chunked")], chunks=chunks)
+    assert status == 413
+    assert body["code"] == 413
+    # 文件部分的头 + 刚超过上限的块数
+    assert reads == 1 + settings.MAX_FILE_SIZE // CHUNK + 1
+
+
+async def test_normal_upload_passes(client, session):
+    user = await create_user(session)
+    resp = await client.post(
+        "/api/v1/upload/image",
+        files={"file": ("a.png", PNG, "image/png")},
+        data={"category": "images"},
+        headers=auth_headers(user.id),
+    )
+    assert resp.json()["code"] == 200
+    assert resp.json()["data"]["size"] == len(PNG)
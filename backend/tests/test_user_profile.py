@@ -0,0 +1,38 @@
+"""
+个人信息和他人公开信息的计数包含尚未刷新到数据库的增量
+"""
+from app.models.community import Post
+from app.services.counters import counters, POST_LIKES, USER_FOLLOWERS, USER_FOLLOWING
+from tests.conftest import auth_headers, create_user
+
+
+async def test_own_profile_merges_pending_follows(client, session):
+    user = await create_user(session, follower_count=3, following_count=1)
+
+    await counters.incr(USER_FOLLOWERS, user.id, 2)
+    await counters.incr(USER_FOLLOWING, user.id)
+
+    resp = await client.get("/api/v1/user/profile", headers=auth_headers(user.id))
+    data = resp.json()["data"]
+    assert (data["follower_count"], data["following_count"]) == (5, 2)
+
+    resp = await client.put("/api/v1/user/profile", json={"nickname": "新昵称"}, headers=auth_headers(user.id))
+    data = resp.json()["data"]
+    assert data["nickname"] == "新昵称"
+    assert (data["follower_count"], data["following_count"]) == (5, 2)
+
+
+async def test_public_profile_merges_pending_likes(client, session):
+    user = await create_user(session)
+    posts = [Post(user_id=user.id, content=f"动态{i}", like_count=i) for i in range(3)]
+    session.add_all(posts)
+    await session.commit()
+
+    await counters.incr(POST_LIKES, posts[0].id, 2)
+    await counters.incr(POST_LIKES, posts[2].id)
+    await counters.incr(USER_FOLLOWERS, user.id)
+
+    resp = await client.get(f"/api/v1/user/{user.id}/profile")
+    data = resp.json()["data"]
+    assert data["like_count"] == 0 + 1 + 2 + 2 + 1
+    assert data["follower_count"] == 1
@@ -0,0 +1,64 @@
+"""
+短信验证码：发送频率限制不会被大量请求挤出进程内存储，非 ASCII 验证码不会导致异常
+"""
+from app.config import settings
+from app.services.ephemeral_store import EphemeralStore, local_store
+from app.services.verify_code import bind_phone_codes
+from app.utils.lru import TTLCache
+from tests.conftest import auth_headers, create_user
+
+
+async def test_limited_user_creates_no_new_keys():
+    limit = settings.VERIFY_CODE_DAILY_LIMIT
+    # 同一用户向大量不同手机号发送：达到当天上限后的请求不再创建任何条目
+    results = [await bind_phone_codes.check_send(f"138{i:08d}", user_id=1) for i in range(1000)]
+    for i, retry_after in enumerate(results[:limit]):
+        assert retry_after == 0
+        await bind_phone_codes.issue(f"138{i:08d}", user_id=1)
+    assert all(retry_after > 0 for retry_after in results[limit:])
+
+    # 用户计数 + 每个已发送手机号的重发计数和当天计数；验证码只有 limit 个
+    assert len(local_store.counters) == 1 + 2 * limit
+    assert len(local_store.data) == limit
+
+
+async def test_limited_phone_rejected_before_counting():
+    phone = "13900000000"
+    for user_id in range(settings.VERIFY_CODE_DAILY_LIMIT):
+        assert await bind_phone_codes.check_send(phone, user_id) == 0
+        # 跳过重发间隔
+        await bind_phone_codes._store.delete(f"resend:{phone}")
+
+    size = len(local_store.counters)
+    assert await bind_phone_codes.check_send(phone, user_id=999) > 0
+    assert len(local_store.counters) == size
+
+
+async def test_data_flood_does_not_evict_counters(monkeypatch):
+    monkeypatch.setattr(local_store, "data", TTLCache(maxsize=100))
+    phone = "13700000000"
+    assert await bind_phone_codes.check_send(phone, user_id=1) == 0
+
+    flood = EphemeralStore("flood")
+    for i in range(1000):
+        await flood.set(str(i), i, ttl=60)
+
+    # 重发间隔计数仍在
+    assert await bind_phone_codes.check_send(phone, user_id=1) > 0
+
+
+async def test_verify_non_ascii_code():
+    phone = "13600000000"
+    code = await bind_phone_codes.issue(phone, user_id=1)
+    assert await bind_phone_codes.verify(phone, 1, "１２３４５６") == "验证码错误"
+    assert await bind_phone_codes.verify(phone, 1, code) is None
+
+
+async def test_bind_phone_rejects_non_digit_code(client, session):
+    user = await create_user(session)
+    resp = await client.post(
+        "/api/v1/settings/bind-phone",
+        json={"phone": "13500000000", "code": "１２３４５６"},
+        headers=auth_headers(user.id),
+    )
+    assert resp.status_code == 422
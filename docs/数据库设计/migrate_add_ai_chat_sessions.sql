@@ -0,0 +1,60 @@
+-- =============================================
+-- 迁移脚本：添加 AI 会话表
+-- 执行方式：mysql -u root -p health_db < migrate_add_ai_chat_sessions.sql
+-- 会话表在写入对话记录时同步维护，本脚本同时从已有对话记录回填
+-- =============================================
+
+USE health_db;
+
+-- AI会话表
+CREATE TABLE IF NOT EXISTS ai_chat_sessions (
+    id BIGINT UNSIGNED PRIMARY KEY AUTO_INCREMENT,
+    user_id BIGINT UNSIGNED NOT NULL COMMENT '用户ID',
+    session_id VARCHAR(50) NOT NULL COMMENT '会话ID',
+    title VARCHAR(100) DEFAULT '' COMMENT '标题(第一条用户消息)',
+    last_message VARCHAR(255) DEFAULT '' COMMENT '最后一条消息',
+    message_count INT DEFAULT 0 COMMENT '消息数',
+    created_at DATETIME DEFAULT CURRENT_TIMESTAMP COMMENT '创建时间',
+    last_message_at DATETIME DEFAULT CURRENT_TIMESTAMP COMMENT '最后消息时间',
+
+    UNIQUE KEY uk_user_session (user_id, session_id),
+    INDEX idx_user_last_message (user_id, last_message_at)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COMMENT='AI会话表';
+
+-- 对话记录按会话读取历史的复合索引
+ALTER TABLE ai_chat_records ADD INDEX idx_user_session_time (user_id, session_id, created_at);
+
+-- 从已有对话记录回填
+INSERT INTO ai_chat_sessions (user_id, session_id, title, last_message, message_count, created_at, last_message_at)
+SELECT
+    s.user_id,
+    s.session_id,
+    COALESCE(LEFT(fu.content, 100), ''),
+    LEFT(lm.content, 255),
+    s.message_count,
+    s.created_at,
+    s.last_message_at
+FROM (
+    SELECT user_id, session_id, COUNT(*) AS message_count,
+           MIN(created_at) AS created_at, MAX(created_at) AS last_message_at
+    FROM ai_chat_records
+    GROUP BY user_id, session_id
+) s
+JOIN (
+    SELECT user_id, session_id, content,
+           ROW_NUMBER() OVER (PARTITION BY user_id, session_id ORDER BY created_at DESC, id DESC) AS rn
+    FROM ai_chat_records
+) lm ON lm.user_id = s.user_id AND lm.session_id = s.session_id AND lm.rn = 1
+LEFT JOIN (
+    SELECT user_id, session_id, content,
+           ROW_NUMBER() OVER (PARTITION BY user_id, session_id ORDER BY created_at, id) AS rn
+    FROM ai_chat_records
+    WHERE role = 'user'
+) fu ON fu.user_id = s.user_id AND fu.session_id = s.session_id AND fu.rn = 1
+ON DUPLICATE KEY UPDATE
+    title = VALUES(title),
+    last_message = VALUES(last_message),
+    message_count = VALUES(message_count),
+    last_message_at = VALUES(last_message_at);
+
+SELECT '迁移完成！已创建 ai_chat_sessions 表并回填会话数据' AS message;
@@ -0,0 +1,13 @@
+-- =============================================
+-- 迁移脚本：AI 会话滚动摘要
+-- 执行方式：mysql -u root -p health_db < migrate_add_ai_session_summary.sql
+-- 需先执行 migrate_add_ai_chat_sessions.sql
+-- =============================================
+
+USE health_db;
+
+ALTER TABLE ai_chat_sessions
+    ADD COLUMN summary TEXT NULL COMMENT '较早对话的滚动摘要' AFTER message_count,
+    ADD COLUMN summary_until_id BIGINT UNSIGNED DEFAULT 0 COMMENT '已并入摘要的最后一条记录ID' AFTER summary;
+
+SELECT '迁移完成！已添加 ai_chat_sessions.summary 字段' AS message;
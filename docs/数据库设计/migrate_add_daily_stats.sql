@@ -0,0 +1,55 @@
+-- =============================================
+-- 迁移脚本：添加统计汇总表
+-- 执行方式：mysql -u root -p health_db < migrate_add_daily_stats.sql
+-- 执行后、启动新版本服务前运行 python rebuild_stats.py --start <上线日期> --end <今天> --include-today 回填历史数据
+-- =============================================
+
+USE health_db;
+
+-- 全站每日汇总表
+CREATE TABLE IF NOT EXISTS daily_stats (
+    id BIGINT UNSIGNED PRIMARY KEY AUTO_INCREMENT,
+    stat_date DATE NOT NULL COMMENT '统计日期',
+    
+    new_users INT DEFAULT 0 COMMENT '新增用户数',
+    order_count INT DEFAULT 0 COMMENT '下单数',
+    order_amount DECIMAL(12,2) DEFAULT 0.00 COMMENT '成交金额(按下单日期)',
+    screening_count INT DEFAULT 0 COMMENT '健康筛查数',
+    sport_count INT DEFAULT 0 COMMENT '运动记录数',
+    food_count INT DEFAULT 0 COMMENT '饮食记录数',
+    checkin_count INT DEFAULT 0 COMMENT '打卡数',
+    
+    updated_at DATETIME DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    
+    UNIQUE KEY uk_stat_date (stat_date)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COMMENT='全站每日汇总表';
+
+-- 用户每日汇总表
+CREATE TABLE IF NOT EXISTS user_daily_stats (
+    id BIGINT UNSIGNED PRIMARY KEY AUTO_INCREMENT,
+    user_id BIGINT UNSIGNED NOT NULL COMMENT '用户ID',
+    stat_date DATE NOT NULL COMMENT '统计日期',
+    
+    -- 运动（按开始时间归日）
+    sport_count INT DEFAULT 0 COMMENT '运动次数',
+    sport_duration INT DEFAULT 0 COMMENT '运动时长(分钟)',
+    sport_calories INT DEFAULT 0 COMMENT '运动消耗(大卡)',
+    sport_distance DECIMAL(12,2) DEFAULT 0.00 COMMENT '运动距离(米)',
+    
+    -- 饮食（按记录日期归日）
+    food_count INT DEFAULT 0 COMMENT '饮食记录数',
+    food_calories INT DEFAULT 0 COMMENT '摄入热量(大卡)',
+    protein DECIMAL(10,2) DEFAULT 0.00 COMMENT '蛋白质(克)',
+    carbs DECIMAL(10,2) DEFAULT 0.00 COMMENT '碳水(克)',
+    fat DECIMAL(10,2) DEFAULT 0.00 COMMENT '脂肪(克)',
+    
+    -- 打卡
+    checkin_count INT DEFAULT 0 COMMENT '打卡数',
+    
+    updated_at DATETIME DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    
+    UNIQUE KEY uk_user_date (user_id, stat_date),
+    INDEX idx_stat_date (stat_date)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COMMENT='用户每日汇总表';
+
+SELECT '迁移完成！已创建 daily_stats 和 user_daily_stats 表' AS message;
@@ -0,0 +1,11 @@
+-- =============================================
+-- 迁移脚本：社区动态流游标分页索引
+-- 执行方式：mysql -u root -p health_db < migrate_add_feed_index.sql
+-- =============================================
+
+USE health_db;
+
+-- 与游标 (is_top, created_at, id) 排序一致的复合索引
+ALTER TABLE posts ADD INDEX idx_posts_feed (status, is_top, created_at, id);
+
+SELECT '迁移完成！已添加 posts.idx_posts_feed 索引' AS message;
@@ -0,0 +1,12 @@
+-- =============================================
+-- 迁移脚本：食物库名称 ngram 全文索引
+-- 执行方式：mysql -u root -p health_db < migrate_add_food_library_fulltext.sql
+-- 仅在 FOOD_SEARCH_BACKEND=fulltext 时需要，默认的进程内索引无需执行
+-- ngram 分词长度由 MySQL 参数 ngram_token_size 控制（默认 2，适合中文食物名）
+-- =============================================
+
+USE health_db;
+
+ALTER TABLE food_library ADD FULLTEXT INDEX ft_name (name) WITH PARSER ngram;
+
+SELECT '迁移完成！已为 food_library.name 添加全文索引' AS message;
@@ -0,0 +1,22 @@
+-- =============================================
+-- 迁移脚本：动态点赞表唯一索引
+-- 执行方式：mysql -u root -p health_db < migrate_add_post_like_unique.sql
+-- =============================================
+
+USE health_db;
+
+-- 清理重复点赞记录（保留最早的一条）
+DELETE l1 FROM post_likes l1
+JOIN post_likes l2
+  ON l1.user_id = l2.user_id AND l1.post_id = l2.post_id AND l1.id > l2.id;
+
+-- (user_id, post_id) 唯一索引，批量查询点赞状态时走该索引
+ALTER TABLE post_likes ADD UNIQUE KEY uk_user_post (user_id, post_id);
+
+-- 按点赞记录校正点赞数（重复点赞曾被计入）
+UPDATE posts p
+LEFT JOIN (SELECT post_id, COUNT(*) AS cnt FROM post_likes GROUP BY post_id) l
+  ON l.post_id = p.id
+SET p.like_count = COALESCE(l.cnt, 0);
+
+SELECT '迁移完成！已添加 post_likes.uk_user_post 唯一索引并校正点赞数' AS message;
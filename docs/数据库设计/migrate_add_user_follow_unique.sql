@@ -0,0 +1,28 @@
+-- =============================================
+-- 迁移脚本：关注关系表唯一索引
+-- 执行方式：mysql -u root -p health_db < migrate_add_user_follow_unique.sql
+-- 关注数/粉丝数改为缓冲计数后，由唯一索引拦截并发重复关注
+-- =============================================
+
+USE health_db;
+
+-- 清理重复关注记录（保留最早的一条）
+DELETE f1 FROM user_follows f1
+JOIN user_follows f2
+  ON f1.user_id = f2.user_id AND f1.follow_user_id = f2.follow_user_id AND f1.id > f2.id;
+
+-- (user_id, follow_user_id) 唯一索引
+ALTER TABLE user_follows ADD UNIQUE KEY uk_user_follow (user_id, follow_user_id);
+
+-- 按关注关系校正关注数和粉丝数
+UPDATE users u
+LEFT JOIN (SELECT follow_user_id, COUNT(*) AS cnt FROM user_follows GROUP BY follow_user_id) f
+  ON f.follow_user_id = u.id
+SET u.follower_count = COALESCE(f.cnt, 0);
+
+UPDATE users u
+LEFT JOIN (SELECT user_id, COUNT(*) AS cnt FROM user_follows GROUP BY user_id) f
+  ON f.user_id = u.id
+SET u.following_count = COALESCE(f.cnt, 0);
+
+SELECT '迁移完成！已添加 user_follows.uk_user_follow 唯一索引并校正关注计数' AS message;